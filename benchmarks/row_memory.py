@@ -0,0 +1,54 @@
+"""Report memory retained per parsed lesson.
+
+Usage: python -m benchmarks.row_memory [file.xlsx ...]
+Defaults to every workbook in data/schedules.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List
+import gc
+import sys
+import tracemalloc
+
+from bot.excel_importer import load_schedule_from_excel
+
+
+def measure(file_path: str) -> dict:
+	# Warm-up parse so one-time module and openpyxl caches are not counted
+	load_schedule_from_excel(file_path)
+	gc.collect()
+	tracemalloc.start()
+	before = tracemalloc.take_snapshot()
+	rows = load_schedule_from_excel(file_path)
+	gc.collect()
+	after = tracemalloc.take_snapshot()
+	tracemalloc.stop()
+	retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+	row_bytes = sum(sys.getsizeof(r) for r in rows)
+	strings = {id(v): v for r in rows for v in (r.group, r.day, r.time, r.subject, r.teacher, r.room) if v is not None}
+	string_bytes = sum(sys.getsizeof(v) for v in strings.values())
+	n = len(rows) or 1
+	return {
+		"file": file_path,
+		"lessons": len(rows),
+		"retained_per_lesson": retained / n,
+		"row_object_bytes": row_bytes / n,
+		"distinct_strings": len(strings),
+		"string_bytes_per_lesson": string_bytes / n,
+	}
+
+
+def main(argv: List[str]) -> None:
+	files = argv or [str(p) for p in sorted(Path("data/schedules").glob("*.xlsx")) if not p.name.startswith("~$")]
+	for f in files:
+		m = measure(f)
+		print(
+			f"{m['file']}: {m['lessons']} lessons, {m['retained_per_lesson']:.0f} B/lesson retained "
+			f"({m['row_object_bytes']:.0f} B row object, {m['string_bytes_per_lesson']:.0f} B strings "
+			f"across {m['distinct_strings']} distinct values)"
+		)
+
+
+if __name__ == "__main__":
+	main(sys.argv[1:])
@@ -0,0 +1,267 @@
+"""Importer and handler benchmarks, compared against a stored baseline.
+
+Usage: python -m benchmarks.suite [--quick] [--check] [--save-baseline] [--baseline PATH]
+
+Generates synthetic workbooks and a CSV export (benchmarks.synthetic), then measures for each:
+parse time and peak memory of load_schedule_from_excel with the openpyxl
+and the iterparse reader (checking both give the same lessons), index build time,
+ScheduleService.load_from_file end to end, and per-request latency of the
+student day and teacher week handlers driven by stub updates, both cold
+(empty render cache) and warm.
+
+A fixed pure-Python calibration loop is timed in the same process and
+stored with the baseline; timings are scaled by how much faster or slower
+it ran before they are compared, so a baseline recorded on another machine
+still means something. Regressions are reported; with --check the exit
+status is 1 when a metric is worse than the baseline by more than its
+tolerance.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import generate
+from bot.excel_importer import is_table_file, load_schedule_from_excel
+from bot.handlers.students import on_day_selected
+from bot.handlers.teachers import on_teacher_selected
+from bot.services.render import DAY_ORDER
+from bot.services.schedule_service import ScheduleService, index_rows
+
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# (name, layout, groups)
+CASES: List[Tuple[str, str, int]] = [
+	("matrix-50", "matrix", 50),
+	("matrix-300", "matrix", 300),
+	("flat-300", "flat", 300),
+	("csv-300", "csv", 300),
+]
+QUICK_CASES = CASES[:1]
+
+# Allowed slowdown before a metric counts as a regression; timings are noisy,
+# memory is not
+TOLERANCE = {"s": 0.30, "us": 0.50, "mib": 0.10}
+
+
+class _Chat:
+	id = 1
+
+	async def send_message(self, text: str, **kwargs) -> None:
+		pass
+
+
+class _Query:
+	def __init__(self, data: str) -> None:
+		self.data = data
+		self.text: Optional[str] = None
+
+	async def answer(self, *args, **kwargs) -> None:
+		pass
+
+	async def edit_message_text(self, text: str, **kwargs) -> None:
+		self.text = text
+
+	async def edit_message_reply_markup(self, **kwargs) -> None:
+		pass
+
+
+class _Update:
+	"""Just enough of telegram.Update for the callback handlers."""
+
+	effective_chat = _Chat()
+
+	def __init__(self, data: str) -> None:
+		self.callback_query = _Query(data)
+
+
+def _median_time(fn: Callable[[], object], repeat: int) -> float:
+	times = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		fn()
+		times.append(time.perf_counter() - start)
+	return statistics.median(times)
+
+
+def _calibration_workload() -> None:
+	# String, dict and sort work, roughly what parsing and rendering do
+	cells = {f"G{i % 300}:{i % 6}:{i % 8}": f"Subject {i % 97} ({i % 41})" for i in range(20000)}
+	lines = sorted(f"{key} {value.upper()}" for key, value in cells.items())
+	"\n".join(line.split(" ", 1)[1] for line in lines)
+
+
+def calibrate(repeat: int = 7) -> float:
+	"""Median time of the calibration loop on this machine, in seconds."""
+	_calibration_workload()
+	return _median_time(_calibration_workload, repeat)
+
+
+def _peak_mib(fn: Callable[[], object]) -> float:
+	gc.collect()
+	tracemalloc.start()
+	try:
+		fn()
+		_, peak = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+	return peak / (1024 * 1024)
+
+
+def _latencies(schedule: ScheduleService, requests: List[Tuple[Callable, str]], cold: bool, passes: int) -> List[float]:
+	"""Per-request latency, the best of several passes so scheduler noise drops out."""
+	async def run() -> List[float]:
+		best = [float("inf")] * len(requests)
+		for _ in range(passes):
+			for i, (handler, data) in enumerate(requests):
+				if cold:
+					schedule.render_cache.clear()
+				update = _Update(data)
+				start = time.perf_counter()
+				await handler(update, None, schedule)
+				best[i] = min(best[i], time.perf_counter() - start)
+				assert update.callback_query.text, data
+		return best
+	return asyncio.run(run())
+
+
+def _percentile(values: List[float], q: float) -> float:
+	ordered = sorted(values)
+	return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure(path: str, repeat: int) -> Dict[str, float]:
+	# parse_* is the openpyxl reader, the reference the iterparse one is held against
+	load_schedule_from_excel(path, reader="openpyxl")  # warm imports and openpyxl caches
+	rows = load_schedule_from_excel(path, reader="openpyxl")
+	metrics = {
+		"parse_s": _median_time(lambda: load_schedule_from_excel(path, reader="openpyxl"), repeat),
+		"parse_peak_mib": _peak_mib(lambda: load_schedule_from_excel(path, reader="openpyxl")),
+		"index_s": _median_time(lambda: index_rows(rows, path), repeat),
+		"index_peak_mib": _peak_mib(lambda: index_rows(rows, path)),
+	}
+	if not is_table_file(path):
+		assert load_schedule_from_excel(path, reader="iterparse") == rows, "readers disagree"
+		metrics["parse_iterparse_s"] = _median_time(lambda: load_schedule_from_excel(path, reader="iterparse"), repeat)
+		metrics["parse_iterparse_peak_mib"] = _peak_mib(lambda: load_schedule_from_excel(path, reader="iterparse"))
+	# A fresh service each time: reloading into a loaded one only diffs
+	metrics["load_from_file_s"] = _median_time(lambda: ScheduleService().load_from_file(path, write_snapshot=False), repeat)
+	schedule = ScheduleService()
+	schedule.load_from_file(path, write_snapshot=False)
+
+	requests: List[Tuple[Callable, str]] = []
+	for group in schedule.get_groups():
+		token = schedule.callbacks.encode_group(group)
+		requests.extend((on_day_selected, f"st_day:{token}:{day}") for day in DAY_ORDER)
+	for teacher in schedule.get_teachers():
+		requests.append((on_teacher_selected, f"tc_name:{schedule.callbacks.encode_teacher(teacher)}"))
+	for label, cold in (("cold", True), ("warm", False)):
+		lat = _latencies(schedule, requests, cold, repeat)
+		metrics[f"render_{label}_p50_us"] = _percentile(lat, 0.5) * 1e6
+		metrics[f"render_{label}_p95_us"] = _percentile(lat, 0.95) * 1e6
+	metrics["lessons"] = len(rows)
+	return metrics
+
+
+def _unit(metric: str) -> Optional[str]:
+	for unit in TOLERANCE:
+		if metric.endswith(f"_{unit}"):
+			return unit
+	return None
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], speed: float = 1.0) -> List[str]:
+	"""Metrics worse than baseline by more than their tolerance.
+
+	speed is this run's calibration time over the baseline's; expected
+	timings are scaled by it, memory is not.
+	"""
+	regressions = []
+	for case, metrics in results.items():
+		base = baseline.get(case, {})
+		for metric, value in metrics.items():
+			unit = _unit(metric)
+			if unit is None or metric not in base or not base[metric]:
+				continue
+			expected = base[metric] * (speed if unit != "mib" else 1.0)
+			ratio = value / expected
+			if ratio > 1 + TOLERANCE[unit]:
+				regressions.append(f"{case} {metric}: {value:.4g} vs {expected:.4g} expected (+{(ratio - 1) * 100:.0f}%)")
+	return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--quick", action="store_true", help="only the smallest workbook")
+	parser.add_argument("--check", action="store_true", help="exit with status 1 on a regression")
+	parser.add_argument("--save-baseline", action="store_true")
+	parser.add_argument("--baseline", default=str(BASELINE_PATH))
+	args = parser.parse_args(argv)
+
+	cases = QUICK_CASES if args.quick else CASES
+	repeat = 5
+	calibration_s = calibrate()
+	print(f"calibration loop {calibration_s * 1000:.1f} ms")
+	results: Dict[str, Dict[str, float]] = {}
+	with tempfile.TemporaryDirectory() as tmp:
+		for name, layout, groups in cases:
+			suffix = ".csv" if layout == "csv" else ".xlsx"
+			path = generate(layout, groups, str(Path(tmp) / f"{name}{suffix}"))
+			results[name] = measure(path, repeat)
+			m = results[name]
+			iterparse = (
+				f" / iterparse {m['parse_iterparse_s'] * 1000:.1f} ms (peak {m['parse_iterparse_peak_mib']:.1f} MiB)"
+				if "parse_iterparse_s" in m else ""
+			)
+			print(
+				f"{name}: {m['lessons']:.0f} lessons, parse {m['parse_s'] * 1000:.1f} ms "
+				f"(peak {m['parse_peak_mib']:.1f} MiB){iterparse}, index {m['index_s'] * 1000:.1f} ms, "
+				f"load_from_file {m['load_from_file_s'] * 1000:.1f} ms, "
+				f"render cold p50/p95 {m['render_cold_p50_us']:.0f}/{m['render_cold_p95_us']:.0f} us, "
+				f"warm {m['render_warm_p50_us']:.0f}/{m['render_warm_p95_us']:.0f} us"
+			)
+
+	baseline_path = Path(args.baseline)
+	if args.save_baseline:
+		stored = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+		stored.update(results)
+		stored["_machine"] = {
+			"python": platform.python_version(),
+			"platform": platform.platform(),
+			"calibration_s": calibration_s,
+		}
+		baseline_path.write_text(json.dumps(stored, indent=1, sort_keys=True) + "\n")
+		print(f"Baseline written to {baseline_path}")
+		return 0
+	if not baseline_path.exists():
+		print("No baseline yet; run with --save-baseline")
+		return 0
+	baseline = json.loads(baseline_path.read_text())
+	base_calibration = baseline.get("_machine", {}).get("calibration_s")
+	if base_calibration:
+		speed = calibration_s / base_calibration
+		print(f"Timings scaled by {speed:.2f} (calibration loop against the baseline machine)")
+	else:
+		speed = 1.0
+		print("Baseline has no calibration time; timings compared unscaled")
+	regressions = compare(results, baseline, speed)
+	for line in regressions:
+		print(f"REGRESSION {line}")
+	if not regressions:
+		print("No regressions against baseline")
+	return 1 if regressions and args.check else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
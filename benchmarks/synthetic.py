@@ -0,0 +1,203 @@
+"""Generate synthetic timetable workbooks of any size.
+
+Usage: python -m benchmarks.synthetic matrix|flat|csv|tsv GROUPS OUT [--seed N] [--sheets N] [--title-rows N] [--paras N]
+
+"matrix" reproduces the faculty sheet layout _try_parse_matrix reads: title
+rows, then group numbers and group names in the next two rows, a lesson
+column plus an s/s room column per group, merged day blocks with a subject
+row and a teacher row per para, and common lectures merged across
+neighbouring groups. --title-rows and --paras move and stretch the blocks. "flat" is
+the header-row table described in the README; "csv" and "tsv" write the
+same table as a plain export.
+"""
+from __future__ import annotations
+
+from typing import Iterator, List, Optional, Tuple
+import argparse
+import csv
+import random
+
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+
+DAY_LABELS = ["Dúyshembi", "Shiyshembi", "Sárshembi", "Piyshembi", "Juma", "Shembi"]
+FLAT_DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+PARA_TIMES = ["08:30-09:50", "10:00-11:20", "11:30-12:50", "13:30-14:50", "15:00-16:20", "16:30-17:50"]
+PROGRAMS = [
+	("KI", "Kompyuter injiniringi"),
+	("DI", "Dasturiy injiniring"),
+	("AT", "Axborot texnologiyalari"),
+	("KX", "Kiberxavfsizlik"),
+	("SI", "Sun'iy intellekt"),
+]
+SUBJECTS = [
+	"Joqarı matematika", "Fizika", "Programmalastırıw tiykarları", "Maǵlıwmatlar bazası",
+	"Algoritmler", "Diskret matematika", "Operaciyalıq sistemalar", "Kompyuter tarmaqları",
+	"Ingliz tili", "Tariyx", "Web-programmalastırıw", "MatLab da prog-rıw",
+]
+SURNAMES = [
+	"Aliyev", "Karimova", "Rustamov", "Saidov", "Tursunova", "Nazarov", "Yusupova",
+	"Qodirov", "Ermatov", "Bekmuratova", "Jumaniyazov", "Orazbaeva", "Xudaybergenov",
+]
+TITLES = ["ass.", "prof."]
+
+
+def _teacher(rng: random.Random, pool: int) -> str:
+	i = rng.randrange(pool)
+	surname = SURNAMES[i % len(SURNAMES)]
+	# Extra initials keep names distinct once the pool outgrows the surname list
+	initial = chr(ord("A") + (i // len(SURNAMES)) % 26)
+	suffix = f"{i // (len(SURNAMES) * 26)}" if i >= len(SURNAMES) * 26 else ""
+	return f"{TITLES[i % 2]} {surname}{suffix} {initial}."
+
+
+def _groups(count: int, first: int = 0) -> List[Tuple[str, str]]:
+	groups = []
+	for i in range(first, first + count):
+		code, name = PROGRAMS[i % len(PROGRAMS)]
+		groups.append((f"{101 + i}-{22 + i % 3} {code} (o'zb)", name))
+	return groups
+
+
+def day_blocks(first_row: int = 9, paras: int = 4) -> List[Tuple[int, int, str]]:
+	"""(first row, last row, label) per day; Saturday has one para less.
+
+	The defaults give the faculty workbooks' rows 9-16, 17-24, ... 49-54.
+	"""
+	blocks = []
+	for label in DAY_LABELS:
+		height = 2 * (paras - 1 if label == DAY_LABELS[-1] else paras)
+		blocks.append((first_row, first_row + height - 1, label))
+		first_row += height
+	return blocks
+
+
+def matrix_workbook(
+	groups: int,
+	seed: int = 0,
+	common_rate: float = 0.15,
+	empty_rate: float = 0.2,
+	sheets: int = 1,
+	title_rows: int = 6,
+	paras: int = 4,
+) -> Workbook:
+	"""groups are split across sheets, one per course, the way faculties keep them."""
+	rng = random.Random(seed)
+	teacher_pool = max(10, groups * 2)
+	wb = Workbook()
+	wb.remove(wb.active)
+	per_sheet = -(-groups // sheets)
+	for course in range(sheets):
+		first = course * per_sheet
+		count = min(per_sheet, groups - first)
+		if count > 0:
+			sheet = wb.create_sheet(f"{course + 1}-kurs")
+			_matrix_sheet(sheet, rng, first, count, teacher_pool, common_rate, empty_rate, title_rows, paras)
+	return wb
+
+
+def _matrix_sheet(
+	ws,
+	rng: random.Random,
+	first: int,
+	groups: int,
+	teacher_pool: int,
+	common_rate: float,
+	empty_rate: float,
+	title_rows: int,
+	paras: int,
+) -> None:
+	header = title_rows + 1
+	ws.cell(1, 1, "SABAQ KESTESI")
+	ws.cell(header, 1, "Kún")
+	ws.cell(header, 2, "Waqtı")
+	cols = []
+	for i, (number, name) in enumerate(_groups(groups, first)):
+		col = 3 + i * 2
+		cols.append(col)
+		ws.cell(header, col, number)
+		ws.cell(header + 1, col, name)
+		ws.cell(header, col + 1, "s/s")
+		ws.cell(header + 1, col + 1, "s/s")
+
+	for start, last, label in day_blocks(header + 2, paras):
+		ws.cell(start, 1, label)
+		ws.merge_cells(start_row=start, start_column=1, end_row=last, end_column=1)
+		for para, r in enumerate(range(start, last + 1, 2)):
+			ws.cell(r, 2, PARA_TIMES[para % len(PARA_TIMES)])
+			i = 0
+			while i < len(cols):
+				col = cols[i]
+				if rng.random() < empty_rate:
+					i += 1
+					continue
+				subject = rng.choice(SUBJECTS)
+				teacher = _teacher(rng, teacher_pool)
+				room = str(rng.randint(100, 450))
+				width = 1
+				if i + 1 < len(cols) and rng.random() < common_rate:
+					# Lecture shared with the next one or two groups, merged across their columns
+					width = min(len(cols) - i, rng.choice((2, 3)))
+					subject = f"{subject} (lek)"
+				last_col = cols[i + width - 1]
+				ws.cell(r, col, subject)
+				ws.cell(r + 1, col, teacher)
+				if width > 1:
+					ws.merge_cells(start_row=r, start_column=col, end_row=r, end_column=last_col)
+					ws.merge_cells(start_row=r + 1, start_column=col, end_row=r + 1, end_column=last_col)
+				ws.cell(r, last_col + 1, room)
+				i += width
+	for col in cols:
+		ws.column_dimensions[get_column_letter(col)].width = 22
+
+
+def flat_rows(groups: int, seed: int = 0, empty_rate: float = 0.2) -> Iterator[List[str]]:
+	"""Header row, then one row per lesson."""
+	rng = random.Random(seed)
+	teacher_pool = max(10, groups * 2)
+	yield ["group", "day", "time", "subject", "teacher", "room"]
+	for number, _ in _groups(groups):
+		for day in FLAT_DAYS:
+			for time in PARA_TIMES[:3 if day == "Sat" else 4]:
+				if rng.random() < empty_rate:
+					continue
+				yield [number, day, time, rng.choice(SUBJECTS), _teacher(rng, teacher_pool), f"B-{rng.randint(100, 450)}"]
+
+
+def flat_workbook(groups: int, seed: int = 0, empty_rate: float = 0.2) -> Workbook:
+	wb = Workbook()
+	ws = wb.active
+	for row in flat_rows(groups, seed, empty_rate):
+		ws.append(row)
+	return wb
+
+
+def generate(kind: str, groups: int, path: str, seed: int = 0, sheets: int = 1, title_rows: int = 6, paras: int = 4) -> str:
+	if kind in ("csv", "tsv"):
+		with open(path, "w", newline="", encoding="utf-8") as fh:
+			csv.writer(fh, delimiter="," if kind == "csv" else "\t").writerows(flat_rows(groups, seed))
+		return path
+	if kind == "matrix":
+		wb = matrix_workbook(groups, seed, sheets=sheets, title_rows=title_rows, paras=paras)
+	else:
+		wb = flat_workbook(groups, seed)
+	wb.save(path)
+	return path
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("kind", choices=("matrix", "flat", "csv", "tsv"))
+	parser.add_argument("groups", type=int)
+	parser.add_argument("out")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--sheets", type=int, default=1, help="matrix only: split groups over this many sheets")
+	parser.add_argument("--title-rows", type=int, default=6, help="matrix only: rows above the group header")
+	parser.add_argument("--paras", type=int, default=4, help="matrix only: paras per weekday")
+	args = parser.parse_args(argv)
+	print(generate(args.kind, args.groups, args.out, args.seed, args.sheets, args.title_rows, args.paras))
+
+
+if __name__ == "__main__":
+	main()
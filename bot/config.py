@@ -12,6 +12,33 @@ class Config:
 	bot_token: str
 	admin_ids: set[int]
 	database_path: str
+	# "memory" keeps indexes in-process; "sqlite" serves lookups from database_path;
+	# "image" maps the file at schedule_image_path shared by every process
+	schedule_backend: str
+	# Reimport .xlsx files dropped into data/schedules while running
+	watch_schedules: bool
+	# "polling" or "webhook"; webhook mode needs webhook_url
+	update_mode: str = "polling"
+	webhook_url: str = ""
+	webhook_listen: str = "0.0.0.0"
+	webhook_port: int = 8080
+	webhook_secret: str = ""
+	webhook_max_connections: int = 40
+	schedule_image_path: str = ""
+	# "all" also imports files and sends digests; "worker" only answers updates
+	bot_role: str = "all"
+	webhook_reuse_port: bool = False
+	# Serve /healthz and /metrics on this port in polling mode (0 = off);
+	# in webhook mode they are served by the webhook server
+	metrics_port: int = 0
+	# Updates handled at once; each chat's own updates still run in order
+	max_concurrent_updates: int = 32
+	# .xlsx backend: "iterparse" streams the sheet XML, "openpyxl" is the reference reader
+	xlsx_reader: str = "iterparse"
+	# Uploaded timetable versions kept per faculty for /rollback
+	keep_versions: int = 10
+	# Recent timetables kept in memory, so rolling back to them needs no import
+	warm_versions: int = 3
 
 
 def get_config() -> Config:
@@ -29,8 +56,72 @@ def get_config() -> Config:
 
 	database_path = os.getenv("DATABASE_PATH", os.path.join(os.getcwd(), "schedule.db"))
 
+	schedule_backend = os.getenv("SCHEDULE_BACKEND", "memory").strip().lower() or "memory"
+	if schedule_backend not in ("memory", "sqlite", "image"):
+		schedule_backend = "memory"
+
+	watch_schedules = os.getenv("WATCH_SCHEDULES", "1").strip().lower() not in ("0", "false", "no", "off")
+
+	schedule_image_path = os.getenv("SCHEDULE_IMAGE_PATH", os.path.join(os.getcwd(), "data", "schedule.img"))
+	bot_role = os.getenv("BOT_ROLE", "all").strip().lower()
+	if bot_role not in ("all", "worker"):
+		bot_role = "all"
+
+	webhook_url = os.getenv("WEBHOOK_URL", "").strip()
+	update_mode = os.getenv("UPDATE_MODE", "webhook" if webhook_url else "polling").strip().lower()
+	if update_mode not in ("polling", "webhook") or (update_mode == "webhook" and not webhook_url):
+		update_mode = "polling"
+
+	try:
+		webhook_port = int(os.getenv("WEBHOOK_PORT", "8080"))
+	except ValueError:
+		webhook_port = 8080
+	try:
+		webhook_max_connections = min(max(int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40")), 1), 100)
+	except ValueError:
+		webhook_max_connections = 40
+
+	try:
+		max_concurrent_updates = max(int(os.getenv("MAX_CONCURRENT_UPDATES", "32")), 1)
+	except ValueError:
+		max_concurrent_updates = 32
+
+	xlsx_reader = os.getenv("XLSX_READER", "iterparse").strip().lower()
+	if xlsx_reader not in ("iterparse", "openpyxl"):
+		xlsx_reader = "iterparse"
+
+	try:
+		keep_versions = max(int(os.getenv("KEEP_VERSIONS", "10")), 1)
+	except ValueError:
+		keep_versions = 10
+	try:
+		warm_versions = max(int(os.getenv("WARM_VERSIONS", "3")), 0)
+	except ValueError:
+		warm_versions = 3
+
+	try:
+		metrics_port = int(os.getenv("METRICS_PORT", "0"))
+	except ValueError:
+		metrics_port = 0
+
 	return Config(
 		bot_token=bot_token,
 		admin_ids=admin_ids,
 		database_path=database_path,
+		schedule_backend=schedule_backend,
+		watch_schedules=watch_schedules,
+		update_mode=update_mode,
+		webhook_url=webhook_url,
+		webhook_listen=os.getenv("WEBHOOK_LISTEN", "0.0.0.0").strip() or "0.0.0.0",
+		webhook_port=webhook_port,
+		webhook_secret=os.getenv("WEBHOOK_SECRET", "").strip(),
+		webhook_max_connections=webhook_max_connections,
+		max_concurrent_updates=max_concurrent_updates,
+		metrics_port=metrics_port,
+		xlsx_reader=xlsx_reader,
+		keep_versions=keep_versions,
+		warm_versions=warm_versions,
+		schedule_image_path=schedule_image_path,
+		bot_role=bot_role,
+		webhook_reuse_port=os.getenv("WEBHOOK_REUSE_PORT", "0").strip().lower() in ("1", "true", "yes", "on"),
 	)
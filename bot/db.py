@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+import sqlite3
+import threading
+
+
+class Database:
+	"""SQLite database with one reusable connection per thread, opened in WAL mode.
+
+	WAL lets any number of bot processes read while a loader process writes;
+	readers keep seeing the last committed import until the writer commits.
+	"""
+
+	def __init__(self, path: str) -> None:
+		self.path = path
+		self._local = threading.local()
+		self._lock = threading.Lock()
+		self._connections: List[sqlite3.Connection] = []
+		if path != ":memory:":
+			Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+	def connection(self) -> sqlite3.Connection:
+		conn = getattr(self._local, "conn", None)
+		if conn is None:
+			conn = sqlite3.connect(self.path, timeout=30)
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("PRAGMA synchronous=NORMAL")
+			conn.execute("PRAGMA foreign_keys=ON")
+			self._local.conn = conn
+			with self._lock:
+				self._connections.append(conn)
+		return conn
+
+	@contextmanager
+	def transaction(self) -> Iterator[sqlite3.Connection]:
+		conn = self.connection()
+		conn.execute("BEGIN IMMEDIATE")
+		try:
+			yield conn
+		except BaseException:
+			conn.rollback()
+			raise
+		else:
+			conn.commit()
+
+	def executescript(self, script: str) -> None:
+		self.connection().executescript(script)
+
+	def close(self) -> None:
+		with self._lock:
+			for conn in self._connections:
+				try:
+					conn.close()
+				except sqlite3.Error:
+					pass
+			self._connections.clear()
+		self._local = threading.local()
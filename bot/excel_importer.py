@@ -1,13 +1,29 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Dict
+from bisect import bisect_right
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from xml.etree.ElementTree import iterparse
+import csv
+import logging
 import re
+import zipfile
+from time import perf_counter
 
 from openpyxl import load_workbook
 from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.utils.cell import range_boundaries
 
+from bot.xlsx_reader import StreamingWorkbook
+
+
+logger = logging.getLogger(__name__)
+
+# "iterparse" (bot.xlsx_reader) or "openpyxl" (read-only mode); iterparse
+# falls back to openpyxl on workbooks it cannot read
+XLSX_READERS = ("iterparse", "openpyxl")
+DEFAULT_XLSX_READER = "iterparse"
 
 DAY_ALIASES: Dict[str, str] = {
 	"mon": "Mon",
@@ -63,7 +79,7 @@ DAY_ALIASES: Dict[str, str] = {
 }
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class NormalizedRow:
 	group: str
 	day: str
@@ -73,83 +89,352 @@ class NormalizedRow:
 	room: str | None
 
 
+def _normalize_teacher(name: str) -> str:
+	if not name:
+		return ""
+	# Drop anything in parentheses and trim
+	clean = re.sub(r"\s*\(.*?\)\s*$", "", name).strip()
+	# Collapse internal whitespace
+	clean = re.sub(r"\s+", " ", clean)
+	return clean
+
+
+class _RowBuilder:
+	"""Creates NormalizedRow instances that share one str object per distinct value.
+
+	Group, day, teacher, room and subject strings repeat across most lessons, so
+	every row only holds references into this per-import table.
+	"""
+
+	def __init__(self) -> None:
+		self._strings: Dict[str, str] = {}
+		self._teachers: Dict[str, str] = {}
+
+	def intern(self, value: str | None) -> str | None:
+		if value is None:
+			return None
+		return self._strings.setdefault(value, value)
+
+	def row(self, group: str, day: str, time: str | None, subject: str, teacher: str, room: str | None) -> NormalizedRow:
+		teacher_norm = self._teachers.get(teacher)
+		if teacher_norm is None:
+			teacher_norm = self._teachers[teacher] = self.intern(_normalize_teacher(teacher))
+		return NormalizedRow(
+			group=self.intern(group),
+			day=self.intern(day),
+			time=self.intern(time),
+			subject=self.intern(subject),
+			teacher=teacher_norm,
+			room=self.intern(room),
+		)
+
+
 def _normalize_day(value: str) -> str:
 	key = (value or "").strip().lower()
 	return DAY_ALIASES.get(key, value.strip())
 
 
+# Every alias in one alternation, longest first so "shanba" wins over "sha";
+# word boundaries keep two-letter aliases like "se" from matching inside words
+_DAY_PATTERN = re.compile(
+	r"\b(?:" + "|".join(re.escape(k) for k in sorted(DAY_ALIASES, key=len, reverse=True)) + r")\b"
+)
+_DAY_ALIAS_MAX_LEN = max(len(k) for k in DAY_ALIASES)
+
+
 def _find_day_in_text(value: str) -> str | None:
-	text = (value or "").lower()
-	for k, std in DAY_ALIASES.items():
-		if k and k in text:
-			return std
-	return None
-
-
-def _expand_merged_cells(ws: Worksheet) -> Dict[tuple[int, int], str]:
-	# Map of (row, col) -> value for cells covered by merges
-	# In read_only mode, merged ranges are not available; handle gracefully
-	expanded: Dict[tuple[int, int], str] = {}
-	merged_ranges = getattr(ws, "merged_cells", None)
-	if not merged_ranges:
-		return expanded
-	for mr in merged_ranges.ranges:
-		min_col, min_row, max_col, max_row = range_boundaries(str(mr))
-		base_val = ws.cell(row=min_row, column=min_col).value
-		for r in range(min_row, max_row + 1):
-			for c in range(min_col, max_col + 1):
-				expanded[(r, c)] = base_val
-	return expanded
-
-
-def _try_parse_matrix(ws: Worksheet) -> List[NormalizedRow]:
-    max_row = ws.max_row or 0
-    max_col = ws.max_column or 0
-    merged_map = _expand_merged_cells(ws)
+	match = _DAY_PATTERN.search((value or "").lower())
+	return DAY_ALIASES[match.group()] if match else None
+
+
+def _day_label(text: str) -> str | None:
+	"""The day a cell names when the whole cell is a day alias, e.g. "Dúyshembi"."""
+	if not text or len(text) > _DAY_ALIAS_MAX_LEN:
+		return None
+	key = text.lower()
+	return DAY_ALIASES[key] if _DAY_PATTERN.fullmatch(key) else None
+
+
+class MergeIndex:
+	"""Answers "which merged range covers (row, col)" without expanding ranges to cells.
+
+	Ranges are bucketed per row and bisected by start column, so memory grows
+	with the height of merges rather than with the number of covered cells.
+	"""
+
+	def __init__(self, ranges: Iterable[tuple[int, int, int, int]]) -> None:
+		# ranges are (min_col, min_row, max_col, max_row), as returned by range_boundaries
+		by_row: Dict[int, List[tuple[int, int, int, int]]] = {}
+		for min_col, min_row, max_col, max_row in ranges:
+			if min_col == max_col and min_row == max_row:
+				continue
+			for r in range(min_row, max_row + 1):
+				by_row.setdefault(r, []).append((min_col, max_col, min_row, max_row))
+		self._spans: Dict[int, List[tuple[int, int, int, int]]] = {}
+		self._starts: Dict[int, List[int]] = {}
+		for r, spans in by_row.items():
+			spans.sort()
+			self._spans[r] = spans
+			self._starts[r] = [s[0] for s in spans]
+
+	def __bool__(self) -> bool:
+		return bool(self._spans)
+
+	def find(self, row: int, col: int) -> tuple[int, int, int, int] | None:
+		"""Return (min_row, min_col, max_row, max_col) of the range covering the cell."""
+		starts = self._starts.get(row)
+		if not starts:
+			return None
+		i = bisect_right(starts, col) - 1
+		if i < 0:
+			return None
+		min_col, max_col, min_row, max_row = self._spans[row][i]
+		if col > max_col:
+			return None
+		return min_row, min_col, max_row, max_col
+
+	def anchor(self, row: int, col: int) -> tuple[int, int] | None:
+		span = self.find(row, col)
+		return None if span is None else (span[0], span[1])
+
+
+def _read_merge_index(ws: Worksheet) -> MergeIndex:
+	# Read-only worksheets do not expose merged_cells; pull <mergeCell ref=".."/>
+	# straight from the sheet XML, clearing rows as we go to keep memory flat
+	get_source = getattr(ws, "_get_source", None)
+	if get_source is None:
+		merged = getattr(ws, "merged_cells", None)
+		if not merged:
+			return MergeIndex(())
+		return MergeIndex(range_boundaries(str(mr)) for mr in merged.ranges)
+
+	ranges: List[tuple[int, int, int, int]] = []
+	src = get_source()
+	try:
+		for _, elem in iterparse(src, events=("end",)):
+			tag = elem.tag.rsplit("}", 1)[-1]
+			if tag == "mergeCell":
+				ref = elem.get("ref")
+				if ref:
+					ranges.append(range_boundaries(ref))
+			elif tag == "row":
+				elem.clear()
+			elif tag == "mergeCells":
+				break
+	finally:
+		src.close()
+	return MergeIndex(ranges)
+
+
+def _read_grid(ws: Worksheet) -> List[Sequence[object]]:
+	# Single sequential pass over the sheet; random access through ws.cell()
+	# re-scans the sheet XML on every call in read_only mode
+	return list(ws.iter_rows(values_only=True))
+
+
+# Accepted header names per flat-table column, for xlsx sheets and CSV/TSV files alike
+FLAT_HEADERS: Dict[str, List[str]] = {
+	"group": ["group", "guruh", "группа", "gruppa"],
+	"day": ["day", "kun", "день", "den"],
+	"time": ["time", "soat", "время", "vaqt"],
+	"subject": ["subject", "fan", "предмет"],
+	"teacher": ["teacher", "o'qituvchi", "oqituvchi", "преподаватель", "teacher name"],
+	"room": ["room", "auditoriya", "аудитория"],
+}
+TABLE_SUFFIXES = (".csv", ".tsv")
+SCHEDULE_SUFFIXES = (".xlsx",) + TABLE_SUFFIXES
+
+
+def _flat_columns(headers: Sequence[object]) -> Dict[str, int | None] | None:
+	"""Column index of each flat-table field, or None if headers are not a flat table."""
+	index: Dict[str, int] = {}
+	for i, h in enumerate(headers):
+		if not h:
+			continue
+		index[str(h).strip().lower()] = i
+	columns = {field: next((index[n] for n in alts if n in index), None) for field, alts in FLAT_HEADERS.items()}
+	if columns["group"] is None and (columns["day"] is None or columns["subject"] is None):
+		return None
+	return columns
+
+
+def _iter_flat_rows(rows: Iterable[Sequence[object]], columns: Dict[str, int | None], builder: _RowBuilder) -> Iterator[NormalizedRow]:
+	group_col, day_col, time_col, subject_col, teacher_col, room_col = (columns[f] for f in FLAT_HEADERS)
+
+	def v(row: Sequence[object], idx: int | None) -> str:
+		if idx is None or idx >= len(row):
+			return ""
+		val = row[idx]
+		return "" if val is None else str(val).strip()
+
+	for row in rows:
+		group = v(row, group_col)
+		day = _normalize_day(v(row, day_col))
+		subject = v(row, subject_col)
+		if not group or not day or not subject:
+			continue
+		yield builder.row(
+			group=group,
+			day=day,
+			time=v(row, time_col) or None,
+			subject=subject,
+			teacher=v(row, teacher_col),
+			room=v(row, room_col) or None,
+		)
+
+
+# Header of the room column next to each group's lesson column
+ROOM_HEADER = "s/s"
+
+
+@dataclass(frozen=True, slots=True)
+class MatrixLayout:
+	"""Where a faculty sheet keeps its headers and day blocks (1-based rows and columns)."""
+
+	header_row: int
+	name_row: int | None
+	day_col: int
+	time_col: int | None
+	group_cols: Tuple[int, ...]
+	# (first row, last row, day) per block, in sheet order
+	day_blocks: Tuple[Tuple[int, int, str], ...]
+
+
+def _is_group_header(text: str) -> bool:
+	# Group numbers look like "301-22 KI (qq)"
+	return "(" in text and ")" in text and "-" in text and text != ROOM_HEADER
+
+
+def _detect_matrix_layout(grid: List[Sequence[object]], merges: MergeIndex) -> MatrixLayout | None:
+	"""Find the header row, group columns and day blocks of a faculty sheet in one pass.
+
+	The header is the first row with an s/s room column (else the first with
+	a group number); day blocks start at each day label left of the groups and
+	end where the label's merge ends, at the next label, or, for an unmerged
+	last label, after as many rows as the block before it.
+	"""
+	room_row: int | None = None
+	group_row: int | None = None
+	labels: List[Tuple[int, int, str]] = []
+	for r, row in enumerate(grid, 1):
+		for c, val in enumerate(row, 1):
+			if val is None:
+				continue
+			text = str(val).strip()
+			if not text:
+				continue
+			if room_row is None and text.lower() == ROOM_HEADER:
+				room_row = r
+			elif group_row is None and _is_group_header(text):
+				group_row = r
+			else:
+				day = _day_label(text)
+				if day is not None:
+					labels.append((r, c, day))
+
+	header_row = room_row or group_row
+	if header_row is None:
+		return None
+	header = grid[header_row - 1]
+	group_cols = tuple(
+		c for c, val in enumerate(header, 1)
+		if val is not None
+		and merges.anchor(header_row, c) in (None, (header_row, c))
+		and _is_group_header(str(val).strip())
+	)
+	if not group_cols:
+		return None
+
+	labels = [label for label in labels if label[0] > header_row and label[1] < group_cols[0]]
+	if not labels:
+		return None
+	day_col = labels[0][1]
+	starts = [(r, day) for r, c, day in labels if c == day_col]
+	blocks: List[Tuple[int, int, str]] = []
+	for i, (start, day) in enumerate(starts):
+		next_start = starts[i + 1][0] if i + 1 < len(starts) else None
+		span = merges.find(start, day_col)
+		if span and span[0] == start and span[2] > start:
+			end = span[2]
+		elif next_start is not None:
+			end = next_start - 1
+		elif blocks:
+			end = start + blocks[-1][1] - blocks[-1][0]
+		else:
+			end = len(grid)
+		if next_start is not None:
+			end = min(end, next_start - 1)
+		blocks.append((start, min(end, len(grid)), day))
+
+	return MatrixLayout(
+		header_row=header_row,
+		name_row=header_row + 1 if header_row + 1 < starts[0][0] else None,
+		day_col=day_col,
+		time_col=day_col + 1 if day_col + 1 < group_cols[0] else None,
+		group_cols=group_cols,
+		day_blocks=tuple(blocks),
+	)
+
+
+def _try_parse_matrix(grid: List[Sequence[object]], merges: MergeIndex | None = None) -> List[NormalizedRow]:
+    max_row = len(grid)
+    max_col = max((len(row) for row in grid), default=0)
+    merges = merges or MergeIndex(())
+    layout = _detect_matrix_layout(grid, merges)
+    if layout is None:
+        return []
+
+    def raw_val(r: int, c: int) -> str:
+        if 1 <= r <= max_row:
+            row = grid[r - 1]
+            if 1 <= c <= len(row):
+                val = row[c - 1]
+                return "" if val is None else str(val).strip()
+        return ""
 
     def get_val(r: int, c: int) -> str:
-        val = merged_map.get((r, c))
-        if val is None:
-            val = ws.cell(row=r, column=c).value
-        return "" if val is None else str(val).strip()
+        # Cells covered by a merge read the value of the range's top-left anchor
+        anchor = merges.anchor(r, c)
+        if anchor is not None:
+            return raw_val(*anchor)
+        return raw_val(r, c)
+
+    def is_covered(r: int, c: int) -> bool:
+        anchor = merges.anchor(r, c)
+        return anchor is not None and anchor != (r, c)
 
-    # Find group headers in row 7 (group numbers) and row 8 (group names)
+    # Group numbers from the header row, specialty names from the row under it
     group_cols: Dict[str, int] = {}
     group_names: Dict[int, str] = {}
-    
-    # Get group numbers from row 7
-    for c in range(1, max_col + 1):
-        val = get_val(7, c)
-        if val and "(" in val and ")" in val and "-" in val and val != "s/s":
-            group_cols[val] = c
-    
-    # Get group names from row 8
-    for c in range(1, max_col + 1):
-        val = get_val(8, c)
-        if val and val not in ["s/s"] and not val.isdigit():
-            group_names[c] = val
-
-    if not group_cols:
-        return []
+    for c in layout.group_cols:
+        group_cols[get_val(layout.header_row, c)] = c
+        if layout.name_row is not None and not is_covered(layout.name_row, c):
+            val = get_val(layout.name_row, c)
+            if val and val != ROOM_HEADER and not val.isdigit():
+                group_names[c] = val
+
+    col_groups: Dict[int, str] = {c: g for g, c in group_cols.items()}
+    sorted_group_cols = sorted(col_groups)
+
+    def display_name(col: int) -> str:
+        group_number = col_groups[col]
+        group_name = group_names.get(col, "")
+        if group_name and group_name != group_number:
+            return f"{group_number} ({group_name})"
+        return group_number
 
     rows: List[NormalizedRow] = []
-    
-    # Process each day block
-    day_blocks = [
-        (9, 16, "Mon"),   # Dúyshembi
-        (17, 24, "Tue"),  # Shiyshembi  
-        (25, 32, "Wed"),  # Sárshembi
-        (33, 40, "Thu"),  # Piyshembi
-        (41, 48, "Fri"),  # Juma
-        (49, 54, "Sat"),  # Shembi
-    ]
+    builder = _RowBuilder()
     
     # Helper to convert 1..10 to Roman numerals
     roman_map = {1: "I", 2: "II", 3: "III", 4: "IV", 5: "V", 6: "VI", 7: "VII", 8: "VIII", 9: "IX", 10: "X"}
+    teacher_titles = ('ass.', 'prof.', 'phd.', 'dr.', 'doc.', 'assistant', 'professor')
 
-    for start_row, end_row, day_name in day_blocks:
-        for r in range(start_row, min(end_row + 1, max_row + 1)):
-            time_val = get_val(r, 2).strip() or None
+    for start_row, end_row, day_name in layout.day_blocks:
+        for r in range(start_row, end_row + 1):
+            # Read the raw cell: a para label merged over its teacher row
+            # belongs to the subject row only
+            time_val = (raw_val(r, layout.time_col) if layout.time_col else "") or None
             # If time is missing, derive para number from row position within the day block (every two rows per para)
             if not time_val:
                 offset = r - start_row
@@ -157,9 +442,14 @@ def _try_parse_matrix(ws: Worksheet) -> List[NormalizedRow]:
                 time_val = roman_map.get(para_num, str(para_num))
             
             # Process each group individually
-            for group_number, group_col in group_cols.items():
+            for group_col in sorted_group_cols:
+                # Covered cells belong to a lesson emitted from the merge anchor
+                if is_covered(r, group_col):
+                    continue
+                span = merges.find(r, group_col)
                 subject_cell = get_val(r, group_col)
-                teacher_cell = get_val(r + 1, group_col)
+                # A subject merged down over its teacher row has no teacher line
+                teacher_cell = "" if span and span[2] > r else get_val(r + 1, group_col)
                 
                 if not subject_cell or not teacher_cell:
                     continue
@@ -174,9 +464,8 @@ def _try_parse_matrix(ws: Worksheet) -> List[NormalizedRow]:
                 subject_raw = subject_lines[0]
                 
                 # Skip if subject is actually a teacher name
-                teacher_titles = ['ass.', 'prof.', 'phd.', 'dr.', 'doc.', 'assistant', 'professor']
                 subject_lower = subject_raw.lower()
-                if any(subject_lower.startswith(title) for title in teacher_titles):
+                if subject_lower.startswith(teacher_titles):
                     continue
                 
                 # Parse teacher
@@ -184,105 +473,42 @@ def _try_parse_matrix(ws: Worksheet) -> List[NormalizedRow]:
                 teacher_clean = re.sub(r'\s*\([^)]*\)\s*$', '', teacher_raw).strip()
                 
                 teacher = ""
-                if teacher_clean:
-                    teacher_lower = teacher_clean.lower()
-                    if any(teacher_lower.startswith(title) for title in teacher_titles):
-                        teacher = teacher_clean
+                if teacher_clean and teacher_clean.lower().startswith(teacher_titles):
+                    teacher = teacher_clean
                 
-                # Check if this is a common subject and get room number from s/s column
-                is_common_subject = False
+                # Groups sharing this lesson: a subject merged across the next
+                # group's column (or, for unmerged sheets, an empty s/s column
+                # followed by an empty next group cell) is a common subject
+                target_cols = [group_col]
                 room = None
+                next_group_col = next((c for c in sorted_group_cols if c > group_col), None)
+                spans_next = bool(span and next_group_col and span[3] >= next_group_col)
                 
                 # Find s/s column after this group
                 s_s_col = group_col + 1
                 if s_s_col <= max_col:
-                    s_s_val = get_val(r, s_s_col)
+                    s_s_val = "" if spans_next else get_val(r, s_s_col)
                     
-                    # If s/s column is empty, this might be a common subject
-                    if not s_s_val or str(s_s_val).strip() == "":
-                        # Check if next group column is also empty (common subject)
-                        next_group_col = None
-                        for g_num, g_col in group_cols.items():
-                            if g_col > group_col:
-                                next_group_col = g_col
-                                break
-                        
-                        if next_group_col:
-                            next_subject_cell = get_val(r, next_group_col)
-                            if not next_subject_cell or str(next_subject_cell).strip() == "":
-                                # Both current group and next group columns are empty
-                                # This means it's a common subject
-                                is_common_subject = True
-                                
-                                # For common subjects, look for room number in the next s/s column
-                                next_s_s_col = next_group_col + 1
-                                if next_s_s_col <= max_col:
-                                    next_s_s_val = get_val(r, next_s_s_col)
-                                    if next_s_s_val and str(next_s_s_val).strip().isdigit():
-                                        room = str(next_s_s_val).strip()
-                    elif s_s_val and str(s_s_val).strip().isdigit():
-                        # This is a room number - individual subject
-                        room = str(s_s_val).strip()
-                        is_common_subject = False
-                
-                if is_common_subject:
-                    # This is a common subject - add to current group and next group
-                    # Find next group
-                    next_group_col = None
-                    for g_num, g_col in group_cols.items():
-                        if g_col > group_col:
-                            next_group_col = g_col
-                            break
-                    
-                    # Add to current group
-                    group_name = group_names.get(group_col, "")
-                    if group_name and group_name != group_number:
-                        group_display_name = f"{group_number} ({group_name})"
-                    else:
-                        group_display_name = group_number
-                    
-                    rows.append(NormalizedRow(
-                        group=group_display_name, 
-                        day=day_name, 
-                        time=time_val, 
-                        subject=subject_raw, 
-                        teacher=teacher, 
-                        room=room
-                    ))
-                    
-                    # Add to next group if exists
-                    if next_group_col:
-                        next_group_number = None
-                        for g_num, g_col in group_cols.items():
-                            if g_col == next_group_col:
-                                next_group_number = g_num
-                                break
-                        
-                        if next_group_number:
-                            next_group_name = group_names.get(next_group_col, "")
-                            if next_group_name and next_group_name != next_group_number:
-                                next_group_display_name = f"{next_group_number} ({next_group_name})"
+                    if not s_s_val:
+                        if next_group_col and (spans_next or not get_val(r, next_group_col)):
+                            if spans_next:
+                                target_cols = [c for c in sorted_group_cols if group_col <= c <= span[3]]
                             else:
-                                next_group_display_name = next_group_number
+                                target_cols = [group_col, next_group_col]
                             
-                            rows.append(NormalizedRow(
-                                group=next_group_display_name, 
-                                day=day_name, 
-                                time=time_val, 
-                                subject=subject_raw, 
-                                teacher=teacher, 
-                                room=room
-                            ))
-                else:
-                    # Individual subject
-                    group_name = group_names.get(group_col, "")
-                    if group_name and group_name != group_number:
-                        group_display_name = f"{group_number} ({group_name})"
-                    else:
-                        group_display_name = group_number
-                    
-                    rows.append(NormalizedRow(
-                        group=group_display_name, 
+                            # For common subjects, look for room number in the s/s column after the last group
+                            next_s_s_col = target_cols[-1] + 1
+                            if next_s_s_col <= max_col:
+                                next_s_s_val = get_val(r, next_s_s_col)
+                                if next_s_s_val.isdigit():
+                                    room = next_s_s_val
+                    elif s_s_val.isdigit():
+                        # This is a room number - individual subject
+                        room = s_s_val
+                
+                for col in target_cols:
+                    rows.append(builder.row(
+                        group=display_name(col), 
                         day=day_name, 
                         time=time_val, 
                         subject=subject_raw, 
@@ -293,76 +519,154 @@ def _try_parse_matrix(ws: Worksheet) -> List[NormalizedRow]:
     return rows
 
 
-# Monkey-patch: if the flat-table parser yields nothing, attempt matrix parser
-def load_schedule_from_excel(file_path: str) -> List[NormalizedRow]:
-	wb = load_workbook(filename=file_path, read_only=True, data_only=True)
-	ws = wb.active
-	# First, try flat-table format
-	rows_iter = ws.iter_rows(values_only=True)
-	try:
-		headers = next(rows_iter)
-	except StopIteration:
-		headers = []
+def sheet_names(file_path: str) -> List[str]:
+	"""Names of the visible worksheets, read from workbook.xml without loading the workbook."""
+	with zipfile.ZipFile(file_path) as zf, zf.open("xl/workbook.xml") as fh:
+		names: List[str] = []
+		for _, el in iterparse(fh):
+			if el.tag.rsplit("}", 1)[-1] == "sheet" and el.get("state", "visible") == "visible":
+				names.append(el.get("name"))
+			el.clear()
+	return names
 
-	index: Dict[str, int] = {}
-	for i, h in enumerate(headers or []):
-		if not h:
-			continue
-		n = str(h).strip().lower()
-		index[n] = i
 
-	def col(name_alts: List[str]) -> int | None:
-		for n in name_alts:
-			if n in index:
-				return index[n]
-		return None
+def load_schedule_with_phases(
+	file_path: str,
+	sheet: Optional[str] = None,
+	reader: str = DEFAULT_XLSX_READER,
+) -> Tuple[List[NormalizedRow], Dict[str, float]]:
+	"""load_schedule_from_excel plus seconds spent in each phase, for metrics."""
+	phases: Dict[str, float] = {}
+	return load_schedule_from_excel(file_path, phases, sheet=sheet, reader=reader), phases
+
+
+def _add_phase(phases: Dict[str, float], name: str, started: float) -> None:
+	phases[name] = phases.get(name, 0.0) + perf_counter() - started
+
+
+def is_table_file(file_path: str) -> bool:
+	"""Whether file_path is a plain CSV/TSV export rather than a workbook."""
+	return file_path.lower().endswith(TABLE_SUFFIXES)
 
-	group_col = col(["group", "guruh", "группа", "gruppa"]) 
-	day_col = col(["day", "kun", "день", "den"]) 
-	time_col = col(["time", "soat", "время", "vaqt"]) 
-	subject_col = col(["subject", "fan", "предмет"]) 
-	teacher_col = col(["teacher", "o'qituvchi", "oqituvchi", "преподаватель", "teacher name"]) 
-	room_col = col(["room", "auditoriya", "аудитория"]) 
 
+def iter_schedule_table(file_path: str) -> Iterator[NormalizedRow]:
+	"""Stream lessons from a CSV/TSV file with the flat-table headers, one row at a time.
+
+	.tsv is tab separated; for .csv the delimiter (",", ";" or tab, as Excel
+	exports differ by locale) is whichever the header line uses most.
+	"""
+	with open(file_path, newline="", encoding="utf-8-sig") as fh:
+		header_line = fh.readline()
+		delimiter = "\t" if file_path.lower().endswith(".tsv") else max(",;\t", key=header_line.count)
+		headers = next(csv.reader([header_line], delimiter=delimiter), [])
+		columns = _flat_columns(headers)
+		if columns is None:
+			return
+		yield from _iter_flat_rows(csv.reader(fh, delimiter=delimiter), columns, _RowBuilder())
+
+
+def load_schedule_from_table(file_path: str, phases: Optional[Dict[str, float]] = None) -> List[NormalizedRow]:
+	started = perf_counter()
+	rows = list(iter_schedule_table(file_path))
+	if phases is not None:
+		_add_phase(phases, "table_parse", started)
+	return rows
+
+
+Sheet = Tuple[List[Sequence[object]], MergeIndex]
+
+
+def _openpyxl_sheets(file_path: str, sheet: Optional[str], phases: Dict[str, float]) -> Iterator[Sheet]:
+	started = perf_counter()
+	wb = load_workbook(filename=file_path, read_only=True, data_only=True)
+	try:
+		_add_phase(phases, "open", started)
+		if sheet is not None:
+			worksheets = [wb[sheet]]
+		else:
+			worksheets = [ws for ws in wb.worksheets if getattr(ws, "sheet_state", "visible") == "visible"] or [wb.active]
+		for ws in worksheets:
+			started = perf_counter()
+			grid = _read_grid(ws)
+			_add_phase(phases, "grid_read", started)
+			started = perf_counter()
+			merges = _read_merge_index(ws)
+			_add_phase(phases, "merge_read", started)
+			yield grid, merges
+	finally:
+		wb.close()
+
+
+def _iterparse_sheets(file_path: str, sheet: Optional[str], phases: Dict[str, float]) -> Iterator[Sheet]:
+	started = perf_counter()
+	with StreamingWorkbook(file_path) as wb:
+		_add_phase(phases, "open", started)
+		names = [sheet] if sheet is not None else wb.sheet_names() or wb.sheet_names(visible_only=False)[:1]
+		for name in names:
+			started = perf_counter()
+			# Cells and merged ranges come out of one pass over the sheet XML
+			grid, ranges = wb.read_sheet(name)
+			_add_phase(phases, "grid_read", started)
+			yield grid, MergeIndex(ranges)
+
+
+def _parse_sheets(sheets: Iterator[Sheet], phases: Dict[str, float]) -> Tuple[List[NormalizedRow], List[Sequence[object]]]:
+	"""Lessons of every sheet, plus the first sheet's grid for the debugging preview."""
 	result: List[NormalizedRow] = []
-	if headers and (group_col is not None or (day_col is not None and subject_col is not None)):
-		for row in rows_iter:
-			def v(idx: int | None) -> str:
-				if idx is None or idx >= len(row):
-					return ""
-				val = row[idx]
-				return "" if val is None else str(val).strip()
-
-			group = v(group_col)
-			day = _normalize_day(v(day_col))
-			time = v(time_col) or None
-			subject = v(subject_col)
-			teacher = v(teacher_col)
-			room = v(room_col) or None
-
-			if not group or not day or not subject:
-				continue
-			result.append(NormalizedRow(group=group, day=day, time=time, subject=subject, teacher=teacher, room=room))
+	first_grid: List[Sequence[object]] = []
+	for i, (grid, merges) in enumerate(sheets):
+		if i == 0:
+			first_grid = grid
+		# Parsed one sheet at a time so only one grid is alive at once
+		result.extend(_parse_sheet(grid, merges, phases))
+	return result, first_grid
+
 
+# Monkey-patch: if the flat-table parser yields nothing, attempt matrix parser
+def load_schedule_from_excel(
+	file_path: str,
+	phases: Optional[Dict[str, float]] = None,
+	sheet: Optional[str] = None,
+	reader: str = DEFAULT_XLSX_READER,
+) -> List[NormalizedRow]:
+	"""Parse every visible sheet of file_path (or only sheet) and concatenate the lessons.
+
+	Faculties keep one sheet per course in the same workbook; sheets that are
+	neither a flat table nor a timetable matrix contribute nothing. CSV/TSV
+	files skip the workbook entirely and go through iter_schedule_table.
+	reader picks the xlsx backend, one of XLSX_READERS.
+	"""
+	if is_table_file(file_path):
+		return load_schedule_from_table(file_path, phases)
+	# Phase timings go to phases when given; normalization happens row by row
+	# and is counted in the parse pass that produced the row
+	if phases is None:
+		phases = {}
+	result: List[NormalizedRow] = []
+	first_grid: List[Sequence[object]] = []
+	if reader == "iterparse":
+		# Timed separately so a failed attempt does not count toward the import
+		attempt: Dict[str, float] = {}
+		try:
+			result, first_grid = _parse_sheets(_iterparse_sheets(file_path, sheet, attempt), attempt)
+		except Exception:
+			logger.warning("iterparse reader failed on %s, using openpyxl", file_path, exc_info=True)
+			reader = "openpyxl"
+		else:
+			for phase, seconds in attempt.items():
+				phases[phase] = phases.get(phase, 0.0) + seconds
+	if reader != "iterparse":
+		result, first_grid = _parse_sheets(_openpyxl_sheets(file_path, sheet, phases), phases)
 	if result:
 		return result
 
-	# Fallback to matrix parser
-	rows = _try_parse_matrix(ws)
-	if rows:
-		return rows
-
 	# As a last resort, dump a preview for debugging so user can share it
 	try:
 		from pathlib import Path
+		grid = first_grid
 		preview_lines: List[str] = []
-		max_r = min(ws.max_row or 0, 60)
-		max_c = min(ws.max_column or 0, 30)
-		for r in range(1, max_r + 1):
-			vals = []
-			for c in range(1, max_c + 1):
-				cell = ws.cell(row=r, column=c).value
-				vals.append("" if cell is None else str(cell).replace("\n", " "))
+		for row in grid[:60]:
+			vals = ["" if cell is None else str(cell).replace("\n", " ") for cell in row[:30]]
 			preview_lines.append("\t".join(vals))
 		out_dir = Path.cwd() / "data"
 		out_dir.mkdir(parents=True, exist_ok=True)
@@ -371,4 +675,23 @@ def load_schedule_from_excel(file_path: str) -> List[NormalizedRow]:
 	except Exception:
 		pass
 
-	return []
\ No newline at end of file
+	return []
+
+
+def _parse_sheet(grid: List[Sequence[object]], merges: MergeIndex, phases: Dict[str, float]) -> List[NormalizedRow]:
+	started = perf_counter()
+	# First, try flat-table format
+	columns = _flat_columns(grid[0] if grid else [])
+	result: List[NormalizedRow] = []
+	if columns is not None:
+		result = list(_iter_flat_rows(islice(grid, 1, None), columns, _RowBuilder()))
+
+	_add_phase(phases, "flat_parse", started)
+	if result:
+		return result
+
+	# Fallback to matrix parser
+	started = perf_counter()
+	rows = _try_parse_matrix(grid, merges)
+	_add_phase(phases, "matrix_parse", started)
+	return rows
@@ -1,60 +1,269 @@
+import asyncio
+import html
+import io
 import os
+import re
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional
 
-from telegram import Update
+from telegram import InputFile, Update
 from telegram.constants import ChatAction
 from telegram.ext import Application, CallbackContext, CommandHandler, MessageHandler, filters
 
 from bot.config import get_config
-from bot.services.schedule_service import ScheduleService
+from bot.services import metrics
+from bot.services.notifier import ChangeNotifier
+from bot.services.diff import ChangeSet
+from bot.services.profiling import profile_call
+from bot.excel_importer import SCHEDULE_SUFFIXES
+from bot.services.schedule_service import DEFAULT_SHARD, ScheduleService
+from bot.services.versions import VersionManager
+from bot.storage.versions import ScheduleVersion
 
 
 def _is_admin(user_id: int) -> bool:
 	return user_id in get_config().admin_ids
 
 
-def register_admin_handlers(app: Application, schedule: ScheduleService) -> None:
+def register_admin_handlers(
+	app: Application,
+	schedule: ScheduleService,
+	notifier: Optional[ChangeNotifier] = None,
+	versions: Optional[VersionManager] = None,
+	accept_uploads: bool = True,
+) -> None:
+	app.add_handler(CommandHandler("metrics", lambda u, c: cmd_metrics(u, c, schedule)))
+	if not accept_uploads:
+		# Workers only read the shared store; importing here would bypass the one loading process
+		app.add_handler(CommandHandler(["upload", "profile"], lambda u, c: reply_read_only(u, c)))
+		app.add_handler(MessageHandler(filters.Document.ALL, lambda u, c: reply_read_only(u, c)))
+		return
 	app.add_handler(CommandHandler("upload", lambda u, c: cmd_upload(u, c)))
-	app.add_handler(MessageHandler(filters.Document.ALL, lambda u, c: on_document(u, c, schedule)))
+	app.add_handler(CommandHandler("profile", lambda u, c: cmd_profile(u, c)))
+	if versions is not None:
+		app.add_handler(CommandHandler("versions", lambda u, c: cmd_versions(u, c, versions)))
+		app.add_handler(CommandHandler("rollback", lambda u, c: cmd_rollback(u, c, schedule, versions, notifier)))
+	app.add_handler(MessageHandler(filters.Document.ALL, lambda u, c: on_document(u, c, schedule, notifier, versions)))
+
+
+async def reply_read_only(update: Update, context: CallbackContext):
+	if not _is_admin(update.effective_user.id):
+		return
+	await update.effective_chat.send_message("Bul process tek oqıydı: faylı tiykarǵı bot processine (BOT_ROLE=all) júkleń.")
 
 
 async def cmd_upload(update: Update, context: CallbackContext):
 	if not _is_admin(update.effective_user.id):
 		await update.effective_chat.send_message("Siz admin emessiz.")
 		return
-	await update.effective_chat.send_message("Excel (.xlsx) faylin jiberiń.")
+	await update.effective_chat.send_message(
+		"Excel (.xlsx) yamasa CSV/TSV (.csv, .tsv) faylin jiberiń.\nFakultet kestesi bolsa, fakultet atın faylǵa túsindirme (caption) etip jazıń."
+	)
+
+
+def faculty_shard(caption: Optional[str]) -> str:
+	"""Shard (and subdirectory) name for an upload: its caption reduced to a safe folder name."""
+	if not caption:
+		return DEFAULT_SHARD
+	return re.sub(r"[^\w-]+", "_", caption.strip()).strip("_")[:40]
+
+
+def _ms(seconds: float) -> str:
+	return f"{seconds * 1000:.1f}"
+
+
+def format_metrics(schedule: ScheduleService, processing: Optional[dict] = None) -> str:
+	lines: List[str] = ["<b>Handlerler</b> (sanı, p50/p95/p99 ms)"]
+	handlers = sorted(metrics.HANDLER_SECONDS.summary().items(), key=lambda kv: -kv[1]["count"])
+	for (name,), s in handlers[:15]:
+		lines.append(f"{name}: {s['count']:.0f}, {_ms(s['p50'])}/{_ms(s['p95'])}/{_ms(s['p99'])}")
+	if not handlers:
+		lines.append("—")
+
+	lines.append("")
+	lines.append("<b>Telegram API</b> (sanı, p50/p95 ms)")
+	api = sorted(metrics.TELEGRAM_API_SECONDS.summary().items(), key=lambda kv: -kv[1]["count"])
+	errors = metrics.TELEGRAM_API_ERRORS.values()
+	for (method,), s in api[:10]:
+		failed = errors.get((method,), 0)
+		lines.append(f"{method}: {s['count']:.0f}, {_ms(s['p50'])}/{_ms(s['p95'])}" + (f", qáte {failed:.0f}" if failed else ""))
+	if not api:
+		lines.append("—")
+
+	lines.append("")
+	lines.append("<b>Kesh</b>")
+	for cache, (rate, lookups) in sorted(metrics.cache_hit_rates().items()):
+		lines.append(f"{cache}: {rate * 100:.1f}% ({lookups})")
+
+	if metrics.last_import:
+		lines.append("")
+		lines.append("<b>Aqırǵı import</b> (ms)")
+		lines.extend(f"{phase}: {_ms(sec)}" for phase, sec in metrics.last_import.items())
+
+	if processing:
+		lines.append("")
+		lines.append("<b>Navbet</b>")
+		lines.append(", ".join(f"{k}={v}" for k, v in processing.items()))
+
+	stats = schedule.stats()
+	lines.append("")
+	lines.append(f"Versiya {schedule.version()}: gruppalar {stats['groups']}, muǵallimler {stats['teachers']}, pánler {stats['lessons']}")
+	return "\n".join(lines)
+
+
+async def cmd_metrics(update: Update, context: CallbackContext, schedule: ScheduleService):
+	if not _is_admin(update.effective_user.id):
+		return
+	processor = context.application.update_processor
+	processing = processor.stats() if hasattr(processor, "stats") else None
+	await update.effective_chat.send_message(format_metrics(schedule, processing), parse_mode="HTML")
+
+
+async def cmd_profile(update: Update, context: CallbackContext):
+	if not _is_admin(update.effective_user.id):
+		return
+	# The next upload in this chat is imported in-process under the profiler
+	context.chat_data["profile_next_import"] = True
+	await update.effective_chat.send_message("Kelesi júklengen fayl profiler menen import etiledi.")
+
+
+# How a version was loaded, as told to the admin
+_LOADED_FROM = {"warm": "yadtan", "snapshot": "snapshot-tan", "parsed": "fayldan"}
+
+
+def format_versions(history: List[ScheduleVersion], active: Dict[str, int]) -> str:
+	if not history:
+		return "Versiyalar joq."
+	lines = ["<b>Versiyalar</b>"]
+	for v in history:
+		faculty = f" [{html.escape(v.shard)}]" if v.shard else ""
+		mark = " ✅" if active.get(v.shard) == v.id else ""
+		when = datetime.fromtimestamp(v.activated_at or v.created_at).strftime("%d.%m %H:%M")
+		lines.append(f"#{v.id}{faculty} {html.escape(v.file_name)} · {when}{mark}")
+	lines.append("")
+	lines.append("Qaytarıw: /rollback yamasa /rollback &lt;nomer&gt;")
+	return "\n".join(lines)
+
 
+def _changes_message(title: str, schedule: ScheduleService, changes: ChangeSet) -> str:
+	stats = schedule.stats()
+	diff = changes.summary()
+	return (
+		f"{title}\nGruppalar: {stats['groups']}\nMuǵallimler: {stats['teachers']}\nPánler: {stats['lessons']}"
+		f"\nÓzgerisler: +{diff['added']} / −{diff['removed']} / ↔{diff['moved']}"
+	)
 
-async def on_document(update: Update, context: CallbackContext, schedule: ScheduleService):
+
+async def _notify(update: Update, notifier: Optional[ChangeNotifier], changes: ChangeSet) -> None:
+	if notifier is not None:
+		notified = await notifier.notify(changes)
+		if notified:
+			await update.effective_chat.send_message(f"Xabarlandırıw jiberiledi: {notified}")
+
+
+async def cmd_versions(update: Update, context: CallbackContext, versions: VersionManager):
+	if not _is_admin(update.effective_user.id):
+		return
+	history, active = await asyncio.to_thread(versions.history)
+	await update.effective_chat.send_message(format_versions(history, active), parse_mode="HTML")
+
+
+async def cmd_rollback(
+	update: Update,
+	context: CallbackContext,
+	schedule: ScheduleService,
+	versions: VersionManager,
+	notifier: Optional[ChangeNotifier] = None,
+):
+	if not _is_admin(update.effective_user.id):
+		return
+	version_id: Optional[int] = None
+	if context.args:
+		try:
+			version_id = int(context.args[0].lstrip("#"))
+		except ValueError:
+			await update.effective_chat.send_message("Paydalanıw: /rollback yamasa /rollback <nomer>")
+			return
+	started = time.perf_counter()
+	try:
+		version, changes, how = await versions.rollback(version_id)
+	except LookupError:
+		await update.effective_chat.send_message("Qaytarıw ushın versiya tabılmadı. /versions")
+		return
+	except Exception as exc:
+		await update.effective_chat.send_message(f"Qaytarıwda qátelik: {exc}")
+		return
+	elapsed = (time.perf_counter() - started) * 1000
+	faculty = f" ({version.shard})" if version.shard else ""
+	await update.effective_chat.send_message(
+		_changes_message(f"#{version.id} versiyaǵa qaytıldı{faculty} ✅ ({_LOADED_FROM.get(how, how)}, {elapsed:.0f} ms)", schedule, changes)
+	)
+	await _notify(update, notifier, changes)
+
+
+async def on_document(
+	update: Update,
+	context: CallbackContext,
+	schedule: ScheduleService,
+	notifier: Optional[ChangeNotifier] = None,
+	versions: Optional[VersionManager] = None,
+):
 	if not _is_admin(update.effective_user.id):
 		return
 	if not update.message or not update.message.document:
 		return
 	doc = update.message.document
-	if not doc.file_name.lower().endswith(".xlsx"):
-		await update.effective_chat.send_message("Tek .xlsx fayl qabıl qılınadı.")
+	suffix = Path(doc.file_name or "").suffix.lower()
+	if suffix not in SCHEDULE_SUFFIXES:
+		await update.effective_chat.send_message("Tek .xlsx, .csv yamasa .tsv fayl qabıl qılınadı.")
 		return
 
 	await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.UPLOAD_DOCUMENT)
-	data_dir = Path(os.getcwd()) / "data" / "schedules"
-	data_dir.mkdir(parents=True, exist_ok=True)
-	stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-	local_path = data_dir / f"schedule_{stamp}.xlsx"
+	# A caption names the faculty: its timetable is kept in a subdirectory and replaces only that shard
+	shard = faculty_shard(update.message.caption)
+	if versions is not None:
+		# Moved into the version store under its content hash once downloaded
+		local_path = versions.store.incoming_path(suffix)
+	else:
+		data_dir = Path(os.getcwd()) / "data" / "schedules"
+		if shard:
+			data_dir = data_dir / shard
+		data_dir.mkdir(parents=True, exist_ok=True)
+		stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+		local_path = data_dir / f"schedule_{stamp}{suffix}"
 
 	file = await doc.get_file()
 	await file.download_to_drive(custom_path=str(local_path))
 
-	# Load schedule
+	# Parse off the event loop; the new timetable is swapped in only once fully built
 	try:
-		schedule.load_from_file(str(local_path))
-		stats = schedule.stats()
-		await update.effective_chat.send_message(
-			f"Tablica jańalandı ✅\nGruppalar: {stats['groups']}\nMuǵallimler: {stats['teachers']}\nPánler: {stats['lessons']}"
-		)
+		faculty = f" ({shard})" if shard else ""
+		if context.chat_data.pop("profile_next_import", False):
+			path = str(local_path)
+			sha256 = None
+			if versions is not None:
+				sha256, path = await asyncio.to_thread(versions.store.store_file, path)
+			try:
+				changes, report, report_name = await asyncio.to_thread(profile_call, schedule.load_from_file, path, True, shard)
+			except Exception:
+				if sha256 is not None:
+					await asyncio.to_thread(versions.store.discard_file, path)
+				raise
+			if sha256 is not None:
+				await versions.record(shard, sha256, path, doc.file_name or local_path.name)
+			await update.effective_chat.send_document(document=InputFile(io.BytesIO(report), filename=report_name))
+		elif versions is not None:
+			version, changes, _ = await versions.publish_file(shard, str(local_path), doc.file_name or local_path.name)
+			if changes is None:
+				await update.effective_chat.send_message(f"Bul fayl házir isletilip tur (#{version.id}){faculty}, ózgeris joq.")
+				return
+		else:
+			changes = await schedule.load_from_file_async(str(local_path), shard=shard)
+		await update.effective_chat.send_message(_changes_message(f"Tablica jańalandı{faculty} ✅", schedule, changes))
+		await _notify(update, notifier, changes)
 	except Exception as exc:
 		await update.effective_chat.send_message(f"Júklewde qátelik: {exc}")
 		# Keep file for debugging
 		return
-
-
@@ -0,0 +1,64 @@
+import re
+
+from telegram import Update, InlineKeyboardButton
+from telegram.ext import Application, CallbackContext, CommandHandler, CallbackQueryHandler
+
+from bot.services.schedule_service import ScheduleService
+from bot.storage.digests import DEFAULT_MINUTE, DigestStore
+
+
+TIME_RE = re.compile(r"^(\d{1,2})[:.](\d{2})$")
+
+
+def digest_button(token: str) -> InlineKeyboardButton:
+	return InlineKeyboardButton(text="⏰ Erteńgi keste hár kúni", callback_data=f"dg:{token}")
+
+
+def _fmt(minute: int) -> str:
+	return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def register_digest_handlers(app: Application, schedule: ScheduleService, digests: DigestStore) -> None:
+	app.add_handler(CallbackQueryHandler(lambda u, c: on_digest_button(u, c, schedule, digests), pattern=r"^dg:"))
+	app.add_handler(CommandHandler("digest", lambda u, c: cmd_digest(u, c, digests)))
+
+
+async def on_digest_button(update: Update, context: CallbackContext, schedule: ScheduleService, digests: DigestStore):
+	query = update.callback_query
+	group = schedule.callbacks.decode_group(query.data.split(":", 1)[1])
+	if group is None:
+		await query.answer("Tablica jańalandı, menyunı qaytadan ashıń.", show_alert=True)
+		return
+	existing = dict(digests.for_chat(update.effective_chat.id))
+	minute = existing.get(group, DEFAULT_MINUTE)
+	digests.set(update.effective_chat.id, group, minute)
+	await query.answer(f"{group}: erteńgi keste hár kúni {_fmt(minute)} de jiberiledi. Waqıttı ózgertiw: /digest SS:MM", show_alert=True)
+
+
+async def cmd_digest(update: Update, context: CallbackContext, digests: DigestStore):
+	chat_id = update.effective_chat.id
+	arg = (context.args[0] if context.args else "").strip().lower()
+	if arg in ("off", "stop", "0"):
+		removed = digests.remove_all(chat_id)
+		await update.effective_chat.send_message(f"Kúndelikli jiberiw toqtatıldı: {removed}")
+		return
+	if arg:
+		m = TIME_RE.match(arg)
+		if not m or int(m.group(1)) > 23 or int(m.group(2)) > 59:
+			await update.effective_chat.send_message("Waqıttı SS:MM formatında jazıń, mısalı: /digest 20:00")
+			return
+		minute = int(m.group(1)) * 60 + int(m.group(2))
+		updated = digests.set_minute(chat_id, minute)
+		if not updated:
+			await update.effective_chat.send_message("Aldın gruppa menyusındaǵı ⏰ túymesin basıń.")
+			return
+		await update.effective_chat.send_message(f"Jiberiw waqtı: {_fmt(minute)}")
+		return
+	entries = digests.for_chat(chat_id)
+	if not entries:
+		await update.effective_chat.send_message("Kúndelikli jiberiw joq. Gruppa menyusındaǵı ⏰ túymesin basıń.")
+		return
+	lines = ["Kúndelikli jiberiw:"] + [f"• {grp} — {_fmt(minute)}" for grp, minute in entries]
+	lines.append("")
+	lines.append("Waqıttı ózgertiw: /digest SS:MM, toqtatıw: /digest off")
+	await update.effective_chat.send_message("\n".join(lines))
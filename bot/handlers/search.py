@@ -0,0 +1,50 @@
+from datetime import datetime
+import hashlib
+
+from telegram import InlineQueryResultArticle, InputTextMessageContent, Update
+from telegram.ext import Application, CallbackContext, InlineQueryHandler
+
+from bot.services.render import DAY_NAMES, DAY_ORDER, truncate_message
+from bot.services.schedule_service import ScheduleService
+
+
+KIND_LABELS = {
+	"group": "Gruppa",
+	"teacher": "Muǵallim",
+	"subject": "Pán",
+	"room": "Auditoriya",
+}
+
+
+def register_search_handlers(app: Application, schedule: ScheduleService) -> None:
+	app.add_handler(InlineQueryHandler(lambda u, c: on_inline_query(u, c, schedule)))
+
+
+def _today() -> str:
+	weekday = datetime.now().weekday()
+	return DAY_ORDER[weekday] if weekday < len(DAY_ORDER) else DAY_ORDER[0]
+
+
+async def on_inline_query(update: Update, context: CallbackContext, schedule: ScheduleService):
+	query = update.inline_query
+	text = (query.query or "").strip()
+	if not text:
+		await query.answer([], cache_time=5)
+		return
+
+	hits, day = schedule.search(text, limit=20)
+	day = day or _today()
+	results = []
+	for hit in hits:
+		description = KIND_LABELS.get(hit.kind, hit.kind)
+		if hit.kind == "group":
+			description = f"{description} · {DAY_NAMES.get(day, day)}"
+		result_id = hashlib.sha1(f"{schedule.version()}:{hit.kind}:{hit.value}:{day}".encode("utf-8")).hexdigest()
+		results.append(InlineQueryResultArticle(
+			id=result_id,
+			title=hit.value,
+			description=description,
+			# One oversized text would make Telegram reject the whole answer
+			input_message_content=InputTextMessageContent(truncate_message(schedule.render_search_hit(hit, day)), parse_mode='HTML'),
+		))
+	await query.answer(results, cache_time=60)
@@ -1,72 +1,64 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CallbackContext, CommandHandler, CallbackQueryHandler
 
-from bot.keyboards.menus import chunk_buttons
+from bot.handlers.digests import digest_button
+from bot.handlers.subscriptions import subscribe_button
+from bot.keyboards.menus import chunk_buttons, menu_letters, menu_page, parse_menu_nav
+from bot.services.render import DAY_ORDER as DAYS
 from bot.services.schedule_service import ScheduleService
 
 
-DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
-
-DAY_NAMES = {
-    "Mon": "Dúyshembi",
-    "Tue": "Shiyshembi", 
-    "Wed": "Sárshembi",
-    "Thu": "Piyshembi",
-    "Fri": "Juma",
-    "Sat": "Shembi"
-}
+STALE_MENU_TEXT = "Tablica jańalandı. Qaytadan /student buyrıǵın jiberiń."
 
 
 def register_student_handlers(app: Application, schedule: ScheduleService) -> None:
 	app.add_handler(CommandHandler("student", lambda u, c: start_student(u, c, schedule)))
 	app.add_handler(CallbackQueryHandler(lambda u, c: on_group_selected(u, c, schedule), pattern=r"^st_group:"))
+	app.add_handler(CallbackQueryHandler(lambda u, c: on_group_menu_nav(u, c, schedule), pattern=r"^st_(page|letters|letter):"))
 	app.add_handler(CallbackQueryHandler(lambda u, c: on_day_selected(u, c, schedule), pattern=r"^st_day:"))
 
 
 async def start_student(update: Update, context: CallbackContext, schedule: ScheduleService):
-	groups = schedule.get_groups()
-	if not groups:
+	markup = menu_page(schedule, "st")
+	if markup is None:
 		await update.effective_chat.send_message("Tablica ele júklenbegen.")
 		return
 
-	buttons = [[InlineKeyboardButton(text=g, callback_data=f"st_group:{g}")] for g in groups]
-	markup = InlineKeyboardMarkup(chunk_buttons(buttons))
 	await update.effective_chat.send_message("Gruppanı tańlań:", reply_markup=markup)
 
 
+async def on_group_menu_nav(update: Update, context: CallbackContext, schedule: ScheduleService):
+	query = update.callback_query
+	await query.answer()
+	mode, bucket, page = parse_menu_nav(query.data)
+	markup = menu_letters(schedule, "st") if mode == "letters" else menu_page(schedule, "st", page, bucket)
+	if markup is None:
+		await query.edit_message_text("Tablica ele júklenbegen.")
+		return
+	await query.edit_message_reply_markup(reply_markup=markup)
+
+
 async def on_group_selected(update: Update, context: CallbackContext, schedule: ScheduleService):
 	query = update.callback_query
 	await query.answer()
-	group = query.data.split(":", 1)[1]
+	token = query.data.split(":", 1)[1]
+	group = schedule.callbacks.decode_group(token)
+	if group is None:
+		await query.edit_message_text(STALE_MENU_TEXT)
+		return
 	# Ask for day
-	buttons = [[InlineKeyboardButton(text=day, callback_data=f"st_day:{group}:{day}")] for day in DAYS]
-	markup = InlineKeyboardMarkup(chunk_buttons(buttons, row_size=3))
+	buttons = [[InlineKeyboardButton(text=day, callback_data=f"st_day:{token}:{day}")] for day in DAYS]
+	markup = InlineKeyboardMarkup(chunk_buttons(buttons, row_size=3) + [[subscribe_button("g", token)], [digest_button(token)]])
 	await query.edit_message_text(f"Gruppa: {group}.\nKundi tańlań:", reply_markup=markup)
 
 
 async def on_day_selected(update: Update, context: CallbackContext, schedule: ScheduleService):
 	query = update.callback_query
 	await query.answer()
-	_, group, day = query.data.split(":", 2)
-	rows = schedule.get_group_day(group, day)
-	if not rows:
-		await query.edit_message_text(f"{group} gruppasında {day} kúni sabaq joq.")
+	_, token, day = query.data.split(":", 2)
+	group = schedule.callbacks.decode_group(token)
+	if group is None or day not in DAYS:
+		await query.edit_message_text(STALE_MENU_TEXT)
 		return
-
-	day_name = DAY_NAMES.get(day, day)
-	lines = [f"<b>{group} — {day_name} ({day})</b>", ""]  # Bold group name + empty line
-	
-	# Filter out rows that are just teacher names (no subject)
-	valid_rows = [r for r in rows if r.subject and r.subject.strip()]
-	
-	for i, r in enumerate(valid_rows, 1):
-		lines.append(f"{i}. Pán: {r.subject}")
-		if r.teacher:
-			lines.append(f"   Muǵallim: {r.teacher}")
-		if r.room:
-			lines.append(f"   [{r.room}-auditoriya]")
-		lines.append("")  # Empty line between subjects
-
-	await query.edit_message_text("\n".join(lines), parse_mode='HTML')
-
-
+	text = schedule.render_group_day(group, day)
+	await query.edit_message_text(text, parse_mode='HTML')
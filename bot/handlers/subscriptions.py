@@ -0,0 +1,49 @@
+from telegram import Update, InlineKeyboardButton
+from telegram.ext import Application, CallbackContext, CommandHandler, CallbackQueryHandler
+
+from bot.services.schedule_service import ScheduleService
+from bot.storage.subscriptions import SubscriptionStore
+
+
+def subscribe_button(kind: str, token: str) -> InlineKeyboardButton:
+	"""Toggle button for change notifications; kind is "g" (group) or "t" (teacher)."""
+	return InlineKeyboardButton(text="🔔 Ózgerislerge jazılıw", callback_data=f"sub:{kind}:{token}")
+
+
+def register_subscription_handlers(app: Application, schedule: ScheduleService, subscriptions: SubscriptionStore) -> None:
+	app.add_handler(CallbackQueryHandler(lambda u, c: on_subscribe(u, c, schedule, subscriptions), pattern=r"^sub:"))
+	app.add_handler(CommandHandler("subscriptions", lambda u, c: cmd_subscriptions(u, c, subscriptions)))
+	app.add_handler(CommandHandler("unsubscribe", lambda u, c: cmd_unsubscribe(u, c, subscriptions)))
+
+
+async def on_subscribe(update: Update, context: CallbackContext, schedule: ScheduleService, subscriptions: SubscriptionStore):
+	query = update.callback_query
+	_, kind_raw, token = query.data.split(":", 2)
+	if kind_raw == "g":
+		kind, name = "group", schedule.callbacks.decode_group(token)
+	else:
+		kind, name = "teacher", schedule.callbacks.decode_teacher(token)
+	if name is None:
+		await query.answer("Tablica jańalandı, menyunı qaytadan ashıń.", show_alert=True)
+		return
+	subscribed = subscriptions.toggle(update.effective_chat.id, kind, name)
+	if subscribed:
+		await query.answer(f"Jazıldıńız ✅ {name}")
+	else:
+		await query.answer(f"Jazılıw biykar etildi: {name}")
+
+
+async def cmd_subscriptions(update: Update, context: CallbackContext, subscriptions: SubscriptionStore):
+	subs = subscriptions.for_chat(update.effective_chat.id)
+	if not subs:
+		await update.effective_chat.send_message("Siz hesh nársege jazılmaǵansız.")
+		return
+	lines = ["Jazılıwlarıńız:"] + [f"• {name}" for _, name in subs]
+	lines.append("")
+	lines.append("Barlıǵın biykar etiw: /unsubscribe")
+	await update.effective_chat.send_message("\n".join(lines))
+
+
+async def cmd_unsubscribe(update: Update, context: CallbackContext, subscriptions: SubscriptionStore):
+	removed = subscriptions.unsubscribe_all(update.effective_chat.id)
+	await update.effective_chat.send_message(f"Jazılıwlar biykar etildi: {removed}")
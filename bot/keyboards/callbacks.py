@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+
+
+# (version, groups, teachers) read consistently from one published timetable
+Catalog = Tuple[int, List[str], List[str]]
+
+
+class _Tables:
+	__slots__ = ("groups", "teachers", "group_ids", "teacher_ids")
+
+	def __init__(self, groups: List[str], teachers: List[str]) -> None:
+		self.groups = groups
+		self.teachers = teachers
+		self.group_ids: Dict[str, int] = {g: i for i, g in enumerate(groups)}
+		self.teacher_ids: Dict[str, int] = {t: i for i, t in enumerate(teachers)}
+
+
+class CallbackCodec:
+	"""Encodes groups and teachers in callback_data as short "<version>.<id>" tokens.
+
+	Raw names can exceed Telegram's 64-byte callback_data limit. Ids index the
+	sorted name lists of one schedule version; tables of the last few versions
+	are kept so buttons sent before an upload still resolve.
+	"""
+
+	def __init__(self, catalog: Callable[[], Catalog], keep_versions: int = 4) -> None:
+		self._catalog = catalog
+		self._keep = keep_versions
+		self._tables: "OrderedDict[int, _Tables]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	def _current(self) -> Tuple[int, _Tables]:
+		version, groups, teachers = self._catalog()
+		with self._lock:
+			tables = self._tables.get(version)
+			if tables is None:
+				tables = _Tables(groups, teachers)
+				self._tables[version] = tables
+				while len(self._tables) > self._keep:
+					self._tables.popitem(last=False)
+			else:
+				self._tables.move_to_end(version)
+			return version, tables
+
+	def _lookup(self, token: str) -> Tuple[Optional[_Tables], int]:
+		try:
+			version_raw, id_raw = token.split(".", 1)
+			version, item_id = int(version_raw), int(id_raw)
+		except ValueError:
+			return None, -1
+		with self._lock:
+			tables = self._tables.get(version)
+		if tables is None:
+			current_version, current = self._current()
+			tables = current if current_version == version else None
+		return tables, item_id
+
+	def groups(self) -> List[Tuple[str, str]]:
+		"""(name, token) for every group of the current version, in menu order."""
+		version, tables = self._current()
+		return [(g, f"{version}.{i}") for i, g in enumerate(tables.groups)]
+
+	def teachers(self) -> List[Tuple[str, str]]:
+		version, tables = self._current()
+		return [(t, f"{version}.{i}") for i, t in enumerate(tables.teachers)]
+
+	def encode_group(self, name: str) -> Optional[str]:
+		version, tables = self._current()
+		i = tables.group_ids.get(name)
+		return None if i is None else f"{version}.{i}"
+
+	def encode_teacher(self, name: str) -> Optional[str]:
+		version, tables = self._current()
+		i = tables.teacher_ids.get(name)
+		return None if i is None else f"{version}.{i}"
+
+	def decode_group(self, token: str) -> Optional[str]:
+		"""Group name for token, or None if it came from a version no longer retained."""
+		tables, i = self._lookup(token)
+		if tables is None or not 0 <= i < len(tables.groups):
+			return None
+		return tables.groups[i]
+
+	def decode_teacher(self, token: str) -> Optional[str]:
+		tables, i = self._lookup(token)
+		if tables is None or not 0 <= i < len(tables.teachers):
+			return None
+		return tables.teachers[i]
@@ -1,4 +1,17 @@
-from typing import List
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import re
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.services.schedule_service import ScheduleService
+
+
+PAGE_SIZE = 20
+
+_TITLE_PREFIX = re.compile(r"^(ass\.|assistant|prof\.|professor|phd\.|dr\.|doc\.)\s*", re.IGNORECASE)
 
 
 def chunk_buttons(buttons: List[List[object]], row_size: int = 2) -> List[List[object]]:
@@ -15,3 +28,111 @@ def chunk_buttons(buttons: List[List[object]], row_size: int = 2) -> List[List[o
 	return chunked
 
 
+def bucket_key(name: str) -> str:
+	"""First letter used for letter navigation; teacher titles are skipped so "ass. Djalimov" files under D."""
+	clean = _TITLE_PREFIX.sub("", name.strip())
+	for ch in clean:
+		if ch.isalnum():
+			return ch.upper()
+	return "#"
+
+
+def _entries(schedule: ScheduleService, kind: str) -> List[Tuple[str, str]]:
+	return schedule.callbacks.groups() if kind == "st" else schedule.callbacks.teachers()
+
+
+def _select_prefix(kind: str) -> str:
+	return "st_group" if kind == "st" else "tc_name"
+
+
+def _page_markup(entries: List[Tuple[str, str]], kind: str, page: int, bucket: Optional[str]) -> InlineKeyboardMarkup:
+	pages = max(1, (len(entries) + PAGE_SIZE - 1) // PAGE_SIZE)
+	page = min(max(page, 0), pages - 1)
+	chunk = entries[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+	prefix = _select_prefix(kind)
+	rows = chunk_buttons([[InlineKeyboardButton(text=name, callback_data=f"{prefix}:{token}")] for name, token in chunk])
+
+	nav_base = f"{kind}_letter:{bucket}" if bucket else f"{kind}_page"
+	nav: List[InlineKeyboardButton] = []
+	if page > 0:
+		nav.append(InlineKeyboardButton(text="◀", callback_data=f"{nav_base}:{page - 1}"))
+	label = f"🔤 {bucket}" if bucket else "🔤"
+	if pages > 1:
+		label = f"{label} {page + 1}/{pages}"
+	nav.append(InlineKeyboardButton(text=label, callback_data=f"{kind}_letters:"))
+	if page < pages - 1:
+		nav.append(InlineKeyboardButton(text="▶", callback_data=f"{nav_base}:{page + 1}"))
+	rows.append(nav)
+	return InlineKeyboardMarkup(rows)
+
+
+def _letters_markup(entries: List[Tuple[str, str]], kind: str) -> InlineKeyboardMarkup:
+	letters = sorted({bucket_key(name) for name, _ in entries})
+	buttons = [[InlineKeyboardButton(text=letter, callback_data=f"{kind}_letter:{letter}:0")] for letter in letters]
+	rows = chunk_buttons(buttons, row_size=5)
+	rows.append([InlineKeyboardButton(text="◀ Barlıǵı", callback_data=f"{kind}_page:0")])
+	return InlineKeyboardMarkup(rows)
+
+
+def _bucket_sizes(schedule: ScheduleService, kind: str) -> Dict[Optional[str], int]:
+	"""Number of names filed under each letter, and under None in all."""
+	version = schedule.version()
+
+	def build() -> Dict[Optional[str], int]:
+		entries = _entries(schedule, kind)
+		sizes: Dict[Optional[str], int] = dict(Counter(bucket_key(name) for name, _ in entries))
+		sizes[None] = len(entries)
+		return sizes
+
+	return schedule.menu_cache.get_or_render((kind, "buckets"), version, build)
+
+
+def menu_page(schedule: ScheduleService, kind: str, page: int = 0, bucket: Optional[str] = None) -> Optional[InlineKeyboardMarkup]:
+	"""Cached picker page for kind "st" (groups) or "tc" (teachers); None when nothing is loaded.
+
+	bucket restricts the page to names filed under one letter. page and
+	bucket come from callback data, so they are checked against the loaded
+	names before they become part of the cache key: an unknown letter shows
+	all names and the page is clamped to the pages there are.
+	"""
+	version = schedule.version()
+	sizes = _bucket_sizes(schedule, kind)
+	if bucket not in sizes:
+		bucket = None
+	pages = max(1, (sizes[bucket] + PAGE_SIZE - 1) // PAGE_SIZE)
+	page = min(max(page, 0), pages - 1)
+
+	def build() -> Optional[InlineKeyboardMarkup]:
+		entries = _entries(schedule, kind)
+		if not entries:
+			return None
+		if bucket is not None:
+			entries = [e for e in entries if bucket_key(e[0]) == bucket]
+		return _page_markup(entries, kind, page, bucket)
+
+	return schedule.menu_cache.get_or_render((kind, "page", bucket, page), version, build)
+
+
+def menu_letters(schedule: ScheduleService, kind: str) -> Optional[InlineKeyboardMarkup]:
+	version = schedule.version()
+
+	def build() -> Optional[InlineKeyboardMarkup]:
+		entries = _entries(schedule, kind)
+		return _letters_markup(entries, kind) if entries else None
+
+	return schedule.menu_cache.get_or_render((kind, "letters"), version, build)
+
+
+def parse_menu_nav(data: str) -> Tuple[str, Optional[str], int]:
+	"""Split "<kind>_page:<n>", "<kind>_letters:" or "<kind>_letter:<L>:<n>" into (mode, bucket, page)."""
+	head, _, rest = data.partition(":")
+	mode = head.split("_", 1)[1]
+	bucket: Optional[str] = None
+	page_raw = rest
+	if mode == "letter":
+		bucket, _, page_raw = rest.rpartition(":")
+	try:
+		page = int(page_raw) if page_raw else 0
+	except ValueError:
+		page = 0
+	return mode, bucket, page
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, Iterable, List, Set, Tuple
+
+from bot.excel_importer import NormalizedRow
+
+
+Slot = Tuple[str, str, str | None]  # (group, day, time)
+
+
+def _slot(r: NormalizedRow) -> Slot:
+	return r.group, r.day, r.time
+
+
+@dataclass
+class ChangeSet:
+	"""Lessons that differ between two timetables, diffed by (group, day, time) slot.
+
+	A lesson of the same group, subject and teacher whose slot or room
+	changed is reported as moved rather than removed plus added.
+
+	Lessons of a group-day or teacher that are all still there but listed in
+	another order (a re-sorted file) are kept in reordered: their buckets
+	and renders must be rebuilt, but subscribers have nothing to be told.
+	"""
+
+	added: List[NormalizedRow] = field(default_factory=list)
+	removed: List[NormalizedRow] = field(default_factory=list)
+	moved: List[Tuple[NormalizedRow, NormalizedRow]] = field(default_factory=list)
+	reordered: List[NormalizedRow] = field(default_factory=list)
+
+	def is_empty(self) -> bool:
+		return not (self.added or self.removed or self.moved or self.reordered)
+
+	def _all_rows(self) -> Iterable[NormalizedRow]:
+		yield from self.added
+		yield from self.removed
+		for old, new in self.moved:
+			yield old
+			yield new
+		yield from self.reordered
+
+	@property
+	def groups(self) -> Set[str]:
+		return {r.group for r in self._all_rows()}
+
+	@property
+	def teachers(self) -> Set[str]:
+		return {r.teacher for r in self._all_rows() if r.teacher}
+
+	@property
+	def group_days(self) -> Set[Tuple[str, str]]:
+		return {(r.group, r.day) for r in self._all_rows()}
+
+	@property
+	def subjects(self) -> Set[str]:
+		return {r.subject for r in self._all_rows()}
+
+	@property
+	def rooms(self) -> Set[str]:
+		return {r.room for r in self._all_rows() if r.room}
+
+	def by_group(self) -> Dict[str, "ChangeSet"]:
+		return self._split(lambda r: [r.group])
+
+	def by_teacher(self) -> Dict[str, "ChangeSet"]:
+		return self._split(lambda r: [r.teacher] if r.teacher else [])
+
+	def _split(self, keys) -> Dict[str, "ChangeSet"]:
+		out: Dict[str, ChangeSet] = {}
+		for r in self.added:
+			for k in keys(r):
+				out.setdefault(k, ChangeSet()).added.append(r)
+		for r in self.removed:
+			for k in keys(r):
+				out.setdefault(k, ChangeSet()).removed.append(r)
+		for old, new in self.moved:
+			for k in dict.fromkeys(keys(old) + keys(new)):
+				out.setdefault(k, ChangeSet()).moved.append((old, new))
+		return out
+
+	def affects_render_key(self, key: Hashable) -> bool:
+		"""Whether a RenderCache key built by ScheduleService depends on a changed lesson."""
+		return self.render_key_filter()(key)
+
+	def render_key_filter(self) -> Callable[[Hashable], bool]:
+		"""affects_render_key with the changed names collected once, for checking many keys.
+
+		Each property walks every changed row, so asking it per cached entry
+		made a publish cost entries × changes under the render cache lock.
+		"""
+		names = {
+			"group_day": frozenset(self.group_days),
+			"teacher_week": frozenset(self.teachers),
+			"subject": frozenset(self.subjects),
+			"room": frozenset(self.rooms),
+		}
+
+		def affects(key: Hashable) -> bool:
+			if not isinstance(key, tuple) or not key:
+				return True
+			changed = names.get(key[0])
+			if changed is None:
+				return True
+			return (key[1], key[2]) in changed if key[0] == "group_day" else key[1] in changed
+
+		return affects
+
+	def inverted(self) -> "ChangeSet":
+		"""The changes that lead back from the new timetable to the old one."""
+		# reordered only names the buckets involved, which are the same both ways
+		return ChangeSet(
+			added=list(self.removed),
+			removed=list(self.added),
+			moved=[(new, old) for old, new in self.moved],
+			reordered=list(self.reordered),
+		)
+
+	def summary(self) -> Dict[str, int]:
+		return {"added": len(self.added), "removed": len(self.removed), "moved": len(self.moved)}
+
+
+def _buckets(rows: Iterable[NormalizedRow]) -> Dict[Tuple[str, ...], List[NormalizedRow]]:
+	"""Rows per group-day and per teacher, in row order: the lists ScheduleData indexes."""
+	out: Dict[Tuple[str, ...], List[NormalizedRow]] = {}
+	for r in rows:
+		out.setdefault(("group_day", r.group, r.day), []).append(r)
+		if r.teacher:
+			out.setdefault(("teacher", r.teacher), []).append(r)
+	return out
+
+
+def diff_rows(old: Iterable[NormalizedRow], new: Iterable[NormalizedRow]) -> ChangeSet:
+	old = list(old)
+	new = list(new)
+	old_by_slot: Dict[Slot, Counter] = {}
+	for r in old:
+		old_by_slot.setdefault(_slot(r), Counter())[r] += 1
+	new_by_slot: Dict[Slot, Counter] = {}
+	for r in new:
+		new_by_slot.setdefault(_slot(r), Counter())[r] += 1
+
+	added: List[NormalizedRow] = []
+	removed: List[NormalizedRow] = []
+	for slot in dict.fromkeys([*old_by_slot, *new_by_slot]):
+		before = old_by_slot.get(slot, Counter())
+		after = new_by_slot.get(slot, Counter())
+		if before == after:
+			continue
+		removed.extend((before - after).elements())
+		added.extend((after - before).elements())
+
+	# Pair removals with additions of the same lesson in another slot
+	pending: Dict[Tuple[str, str, str], List[NormalizedRow]] = {}
+	for r in removed:
+		pending.setdefault((r.group, r.subject, r.teacher), []).append(r)
+	changes = ChangeSet()
+	for r in added:
+		candidates = pending.get((r.group, r.subject, r.teacher))
+		if candidates:
+			changes.moved.append((candidates.pop(0), r))
+		else:
+			changes.added.append(r)
+	for remaining in pending.values():
+		changes.removed.extend(remaining)
+
+	# Slots compare as multisets, so a bucket whose lessons only changed order is found here
+	touched_group_days = changes.group_days
+	touched_teachers = changes.teachers
+	new_buckets = _buckets(new)
+	# Group-days first: their rows already bring their teachers' buckets along
+	for key, before in sorted(_buckets(old).items(), key=lambda kv: kv[0][0] != "group_day"):
+		after = new_buckets.get(key)
+		if after is None or after == before:
+			continue
+		if key[0] == "group_day" and (key[1], key[2]) in touched_group_days:
+			continue
+		if key[0] == "teacher" and key[1] in touched_teachers:
+			continue
+		changes.reordered.extend(after)
+		touched_teachers.update(r.teacher for r in after if r.teacher)
+	return changes
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import asyncio
+import logging
+
+from telegram.ext import Application, CallbackContext
+
+from bot.services.notifier import SendQueue
+from bot.services.render import DAY_ORDER
+from bot.services.schedule_service import ScheduleService
+from bot.storage.digests import DigestStore
+
+
+logger = logging.getLogger(__name__)
+
+
+def minute_of_day(moment: datetime) -> int:
+	return moment.hour * 60 + moment.minute
+
+
+class DigestScheduler:
+	"""Sends each subscriber tomorrow's timetable at their chosen minute.
+
+	Runs once a minute on the Application's job queue. A tick reads only the
+	subscribers of the minutes elapsed since the previous tick, renders each
+	group's day once and queues the same text for all of its subscribers.
+	"""
+
+	def __init__(self, schedule: ScheduleService, digests: DigestStore, queue: SendQueue) -> None:
+		self.schedule = schedule
+		self.digests = digests
+		self.queue = queue
+		self._last: Optional[datetime] = None
+		self._task: Optional[asyncio.Task] = None
+
+	def start(self, app: Application) -> None:
+		now = datetime.now()
+		self._last = now.replace(second=0, microsecond=0)
+		first = 60 - now.second - now.microsecond / 1_000_000
+		if app.job_queue is not None:
+			app.job_queue.run_repeating(self._on_job, interval=60, first=first, name="daily-digest")
+		else:
+			# python-telegram-bot installed without the job-queue extra
+			logger.warning("JobQueue unavailable; running digest ticks on a plain asyncio task")
+			self._task = asyncio.get_running_loop().create_task(self._loop(first))
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			self._task = None
+
+	async def _loop(self, first: float) -> None:
+		await asyncio.sleep(first)
+		while True:
+			await self.tick()
+			now = datetime.now()
+			await asyncio.sleep(60 - now.second - now.microsecond / 1_000_000)
+
+	async def _on_job(self, context: CallbackContext) -> None:
+		await self.tick()
+
+	async def tick(self, now: Optional[datetime] = None) -> int:
+		"""Deliver every minute since the previous tick (a late tick catches up); returns messages queued.
+
+		Reading subscribers and rendering run in a worker thread: catching
+		up after a suspend can take a whole day of minutes. The messages are
+		queued on the event loop once they are ready.
+		"""
+		now = (now or datetime.now()).replace(second=0, microsecond=0)
+		last = self._last or now - timedelta(minutes=1)
+		self._last = now
+		# Bound catch-up to one day after a long suspend
+		first = max(last + timedelta(minutes=1), now - timedelta(minutes=1439))
+		sends = await asyncio.to_thread(self._collect, first, now)
+		for chat_id, text in sends:
+			self.queue.put(chat_id, text)
+		return len(sends)
+
+	def _collect(self, first: datetime, last: datetime) -> List[Tuple[int, str]]:
+		sends: List[Tuple[int, str]] = []
+		moment = first
+		while moment <= last:
+			sends.extend(self._due_messages(moment))
+			moment += timedelta(minutes=1)
+		return sends
+
+	def _due_messages(self, moment: datetime) -> List[Tuple[int, str]]:
+		due = self.digests.due(minute_of_day(moment))
+		if not due:
+			return []
+		weekday = (moment + timedelta(days=1)).weekday()
+		if weekday >= len(DAY_ORDER):
+			return []  # no lessons on Sunday
+		day = DAY_ORDER[weekday]
+		sends: List[Tuple[int, str]] = []
+		for group, chats in due.items():
+			text = "⏰ Erteńgi sabaqlar\n\n" + self.schedule.render_group_day(group, day)
+			sends.extend((chat_id, text) for chat_id in chats)
+		return sends
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, List, Sequence, Tuple
+import bisect
+import threading
+import time
+
+
+# Seconds; covers a cached render (~10us) up to a full import (seconds)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+	0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+# Recent observations kept per series for the quantiles /metrics shows in chat
+RECENT_SAMPLES = 1024
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+	parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+	if extra:
+		parts.append(extra)
+	return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+	if value == float("inf"):
+		return "+Inf"
+	return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def quantile(samples: Sequence[float], q: float) -> float:
+	if not samples:
+		return 0.0
+	ordered = sorted(samples)
+	return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _Metric:
+	kind = ""
+
+	def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+		self.name = name
+		self.help = help
+		self.labelnames = tuple(labelnames)
+		self._lock = threading.Lock()
+
+	def _key(self, labels: Dict[str, str]) -> LabelValues:
+		return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+	def header(self) -> List[str]:
+		return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+	def render(self) -> List[str]:
+		raise NotImplementedError
+
+
+class Counter(_Metric):
+	kind = "counter"
+
+	def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+		super().__init__(name, help, labelnames)
+		self._values: Dict[LabelValues, float] = {}
+
+	def inc(self, amount: float = 1.0, **labels: str) -> None:
+		key = self._key(labels)
+		with self._lock:
+			self._values[key] = self._values.get(key, 0.0) + amount
+
+	def values(self) -> Dict[LabelValues, float]:
+		with self._lock:
+			return dict(self._values)
+
+	def render(self) -> List[str]:
+		return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in sorted(self.values().items())]
+
+
+class Gauge(_Metric):
+	"""Value read from a callback at scrape time, e.g. a queue length."""
+
+	kind = "gauge"
+
+	def __init__(self, name: str, help: str, read: Callable[[], Dict[LabelValues, float]], labelnames: Sequence[str] = ()) -> None:
+		super().__init__(name, help, labelnames)
+		self._read = read
+
+	def render(self) -> List[str]:
+		try:
+			values = self._read()
+		except Exception:
+			return []
+		return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in sorted(values.items())]
+
+
+class _Series:
+	__slots__ = ("buckets", "count", "sum", "recent")
+
+	def __init__(self, size: int) -> None:
+		self.buckets = [0] * size
+		self.count = 0
+		self.sum = 0.0
+		self.recent: Deque[float] = deque(maxlen=RECENT_SAMPLES)
+
+
+class Histogram(_Metric):
+	"""Cumulative buckets for Prometheus plus a window of recent samples for quick quantiles."""
+
+	kind = "histogram"
+
+	def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+		super().__init__(name, help, labelnames)
+		self.bounds = tuple(sorted(buckets))
+		self._series: Dict[LabelValues, _Series] = {}
+
+	def observe(self, value: float, **labels: str) -> None:
+		key = self._key(labels)
+		with self._lock:
+			series = self._series.get(key)
+			if series is None:
+				series = self._series[key] = _Series(len(self.bounds))
+			i = bisect.bisect_left(self.bounds, value)
+			if i < len(self.bounds):
+				series.buckets[i] += 1
+			series.count += 1
+			series.sum += value
+			series.recent.append(value)
+
+	@contextmanager
+	def time(self, **labels: str) -> Iterator[None]:
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.observe(time.perf_counter() - start, **labels)
+
+	def summary(self) -> Dict[LabelValues, Dict[str, float]]:
+		"""count, p50, p95 and p99 (over the recent window) for each label set."""
+		with self._lock:
+			snapshot = {k: (s.count, list(s.recent)) for k, s in self._series.items()}
+		return {
+			k: {"count": count, "p50": quantile(recent, 0.5), "p95": quantile(recent, 0.95), "p99": quantile(recent, 0.99)}
+			for k, (count, recent) in snapshot.items()
+		}
+
+	def render(self) -> List[str]:
+		with self._lock:
+			snapshot = {k: (list(s.buckets), s.count, s.sum) for k, s in self._series.items()}
+		lines = []
+		for key, (buckets, count, total) in sorted(snapshot.items()):
+			running = 0
+			for bound, n in zip(self.bounds, buckets):
+				running += n
+				le = 'le="%s"' % _fmt(bound)
+				lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {running}")
+			le = 'le="+Inf"'
+			lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count}")
+			lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}")
+			lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+		return lines
+
+
+class Registry:
+	def __init__(self) -> None:
+		self._metrics: Dict[str, _Metric] = {}
+		self._lock = threading.Lock()
+
+	def register(self, metric: _Metric) -> _Metric:
+		with self._lock:
+			self._metrics[metric.name] = metric
+		return metric
+
+	def render(self) -> str:
+		"""Prometheus text exposition format (version 0.0.4)."""
+		with self._lock:
+			metrics = list(self._metrics.values())
+		lines: List[str] = []
+		for metric in metrics:
+			body = metric.render()
+			if body:
+				lines.extend(metric.header())
+				lines.extend(body)
+		return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HANDLER_SECONDS: Histogram = REGISTRY.register(Histogram(
+	"schedule_bot_handler_seconds", "Time spent handling one update, by handler.", ("handler",)))
+TELEGRAM_API_SECONDS: Histogram = REGISTRY.register(Histogram(
+	"schedule_bot_telegram_api_seconds", "Duration of Bot API calls, by method.", ("method",)))
+TELEGRAM_API_ERRORS: Counter = REGISTRY.register(Counter(
+	"schedule_bot_telegram_api_errors_total", "Bot API calls that raised, by method.", ("method",)))
+CACHE_LOOKUPS: Counter = REGISTRY.register(Counter(
+	"schedule_bot_cache_lookups_total", "Render and menu cache lookups, by cache and result.", ("cache", "result")))
+IMPORT_PHASE_SECONDS: Histogram = REGISTRY.register(Histogram(
+	"schedule_bot_import_phase_seconds", "Duration of each schedule import phase.", ("phase",)))
+
+# Phase timings of the most recent import, for the admin /metrics reply
+last_import: Dict[str, float] = {}
+
+
+def record_import(phases: Dict[str, float]) -> None:
+	for phase, seconds in phases.items():
+		IMPORT_PHASE_SECONDS.observe(seconds, phase=phase)
+	last_import.clear()
+	last_import.update(phases)
+
+
+def cache_hit_rates() -> Dict[str, Tuple[float, int]]:
+	"""cache name -> (hit rate, lookups)."""
+	totals: Dict[str, List[float]] = {}
+	for (cache, result), n in CACHE_LOOKUPS.values().items():
+		hits_total = totals.setdefault(cache, [0.0, 0.0])
+		hits_total[1] += n
+		if result == "hit":
+			hits_total[0] += n
+	return {cache: (hits / total if total else 0.0, int(total)) for cache, (hits, total) in totals.items()}
+
+
+def register_gauge(name: str, help: str, read: Callable[[], Dict[LabelValues, float]], labelnames: Sequence[str] = ()) -> Gauge:
+	return REGISTRY.register(Gauge(name, help, read, labelnames))
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+from bot.services.diff import ChangeSet
+from bot.services.render import render_changes, split_message
+from bot.storage.subscriptions import SubscriptionStore
+
+
+logger = logging.getLogger(__name__)
+
+# Telegram allows about 30 messages per second overall and 1 per second per chat
+GLOBAL_RATE = 25.0
+PER_CHAT_INTERVAL = 1.0
+
+
+class SendQueue:
+	"""Background sender that respects Telegram's global and per-chat rate limits.
+
+	Texts queued for a chat that has not been served yet are joined into one
+	message, so a burst of changes reaches each user as a single notification.
+	"""
+
+	def __init__(self, bot: Bot, global_rate: float = GLOBAL_RATE, per_chat_interval: float = PER_CHAT_INTERVAL, max_attempts: int = 3) -> None:
+		self.bot = bot
+		self.global_rate = global_rate
+		self.per_chat_interval = per_chat_interval
+		self.max_attempts = max_attempts
+		self._pending: Dict[int, List[str]] = {}
+		self._attempts: Dict[int, int] = {}
+		self._heap: List[Tuple[float, int, int]] = []
+		self._seq = itertools.count()
+		self._last_sent: Dict[int, float] = {}
+		self._paused_until = 0.0
+		self._tokens = global_rate
+		self._refilled = time.monotonic()
+		self._wakeup = asyncio.Event()
+		self._task: Optional[asyncio.Task] = None
+
+	def __len__(self) -> int:
+		return len(self._pending)
+
+	def put(self, chat_id: int, text: str) -> None:
+		texts = self._pending.get(chat_id)
+		if texts is not None:
+			texts.append(text)
+			return
+		self._pending[chat_id] = [text]
+		ready_at = self._last_sent.get(chat_id, 0.0) + self.per_chat_interval
+		heapq.heappush(self._heap, (ready_at, next(self._seq), chat_id))
+		self._wakeup.set()
+
+	def start(self) -> None:
+		if self._task is None:
+			self._task = asyncio.get_running_loop().create_task(self._run())
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			try:
+				await self._task
+			except asyncio.CancelledError:
+				pass
+			self._task = None
+
+	async def _take_token(self) -> None:
+		while True:
+			now = time.monotonic()
+			if now < self._paused_until:
+				await asyncio.sleep(self._paused_until - now)
+				continue
+			self._tokens = min(self.global_rate, self._tokens + (now - self._refilled) * self.global_rate)
+			self._refilled = now
+			if self._tokens >= 1:
+				self._tokens -= 1
+				return
+			await asyncio.sleep((1 - self._tokens) / self.global_rate)
+
+	async def _run(self) -> None:
+		while True:
+			if not self._heap:
+				self._wakeup.clear()
+				await self._wakeup.wait()
+				continue
+			ready_at, _, chat_id = self._heap[0]
+			delay = ready_at - time.monotonic()
+			if delay > 0:
+				self._wakeup.clear()
+				try:
+					await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+				except asyncio.TimeoutError:
+					pass
+				continue
+			heapq.heappop(self._heap)
+			texts = self._pending.pop(chat_id, None)
+			if not texts:
+				continue
+			await self._take_token()
+			await self._deliver(chat_id, texts)
+
+	async def _deliver(self, chat_id: int, texts: List[str]) -> None:
+		# One message per turn: the rest waits out the per-chat interval and takes its own token,
+		# and a failure retries only what was not sent yet
+		part, *rest = split_message("\n\n".join(texts))
+		try:
+			await self.bot.send_message(chat_id=chat_id, text=part, parse_mode='HTML')
+			self._last_sent[chat_id] = time.monotonic()
+		except RetryAfter as exc:
+			retry_after = exc.retry_after.total_seconds() if isinstance(exc.retry_after, timedelta) else float(exc.retry_after)
+			# Flood control applies to the whole bot, not just this chat
+			self._paused_until = time.monotonic() + retry_after
+			self._requeue(chat_id, [part, *rest], retry_after, count_attempt=False)
+		except BadRequest as exc:
+			logger.warning("Dropping notification for chat %s: %s", chat_id, exc)
+		except (TimedOut, NetworkError):
+			self._requeue(chat_id, [part, *rest], self.per_chat_interval * 2)
+		except Forbidden:
+			# Blocked by the user; nothing to retry
+			logger.info("Chat %s blocked the bot; dropping notification", chat_id)
+		except Exception:
+			logger.exception("Failed to send notification to chat %s", chat_id)
+		else:
+			self._attempts.pop(chat_id, None)
+			if rest:
+				self._requeue(chat_id, rest, self.per_chat_interval, count_attempt=False)
+
+	def _requeue(self, chat_id: int, texts: List[str], delay: float, count_attempt: bool = True) -> None:
+		if count_attempt:
+			attempts = self._attempts.get(chat_id, 0) + 1
+			if attempts >= self.max_attempts:
+				self._attempts.pop(chat_id, None)
+				logger.warning("Giving up on notification for chat %s after %d attempts", chat_id, attempts)
+				return
+			self._attempts[chat_id] = attempts
+		# Keep the undelivered texts ahead of anything queued meanwhile
+		queued = self._pending.get(chat_id)
+		if queued is not None:
+			queued[:0] = texts
+			return
+		self._pending[chat_id] = list(texts)
+		heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), chat_id))
+		self._wakeup.set()
+
+
+class ChangeNotifier:
+	"""Turns an import's ChangeSet into one queued message per subscribed chat."""
+
+	def __init__(self, subscriptions: SubscriptionStore, queue: SendQueue) -> None:
+		self.subscriptions = subscriptions
+		self.queue = queue
+
+	async def notify(self, changes: ChangeSet) -> int:
+		"""Queue notifications for changes; returns the number of chats notified."""
+		if changes.is_empty():
+			return 0
+		parts = {("group", name): part for name, part in changes.by_group().items()}
+		parts.update({("teacher", name): part for name, part in changes.by_teacher().items()})
+		if not parts:
+			return 0
+		# One batched lookup, off the event loop
+		subscribers = await asyncio.to_thread(self.subscriptions.subscribers_of, parts)
+		per_chat: Dict[int, List[str]] = {}
+		for (kind, name), part in parts.items():
+			chats = subscribers.get((kind, name))
+			if not chats:
+				continue
+			text = render_changes(kind, name, part)
+			for chat_id in chats:
+				per_chat.setdefault(chat_id, []).append(text)
+		for chat_id, texts in per_chat.items():
+			self.queue.put(chat_id, "\n\n".join(texts))
+		return len(per_chat)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import Callable, Tuple, TypeVar
+import cProfile
+import io
+import pstats
+
+try:
+	from pyinstrument import Profiler
+except ImportError:  # optional: cProfile is always available
+	Profiler = None
+
+
+T = TypeVar("T")
+
+# Functions listed in the cProfile report
+TOP_FUNCTIONS = 40
+
+
+def profile_call(fn: Callable[..., T], *args, **kwargs) -> Tuple[T, bytes, str]:
+	"""Run fn under a profiler; returns its result, the report and a file name for it.
+
+	pyinstrument gives a readable HTML call tree when it is installed;
+	otherwise the cProfile report lists the top functions by cumulative time.
+	"""
+	if Profiler is not None:
+		profiler = Profiler()
+		profiler.start()
+		try:
+			result = fn(*args, **kwargs)
+		finally:
+			profiler.stop()
+		return result, profiler.output_html().encode("utf-8"), "import_profile.html"
+
+	profiler = cProfile.Profile()
+	result = profiler.runcall(fn, *args, **kwargs)
+	out = io.StringIO()
+	stats = pstats.Stats(profiler, stream=out)
+	stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+	out.write("\n")
+	stats.sort_stats(pstats.SortKey.TIME).print_stats(TOP_FUNCTIONS // 2)
+	return result, out.getvalue().encode("utf-8"), "import_profile.txt"
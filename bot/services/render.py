@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+import re
+import threading
+
+from bot.excel_importer import NormalizedRow
+from bot.services.metrics import CACHE_LOOKUPS
+
+if TYPE_CHECKING:
+	from bot.services.diff import ChangeSet
+
+
+DAY_ORDER = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+
+DAY_NAMES = {
+	"Mon": "Dúyshembi",
+	"Tue": "Shiyshembi",
+	"Wed": "Sárshembi",
+	"Thu": "Piyshembi",
+	"Fri": "Juma",
+	"Sat": "Shembi",
+}
+
+# Longest text Telegram accepts in one message
+MESSAGE_LIMIT = 4096
+TRUNCATED_MARK = "…"
+# A tag or an entity, which a message must not be cut inside
+_MARKUP = re.compile(r"<[^<>]*>|&#?\w+;")
+
+T = TypeVar("T")
+
+
+class RenderCache(Generic[T]):
+	"""Rendered message texts (or keyboards) for one schedule version.
+
+	Entries are dropped as soon as a lookup arrives with a different version,
+	so publishing a new ScheduleData invalidates everything at once. Callers
+	must read the version before reading the data they render from.
+	"""
+
+	def __init__(self, name: str = "render") -> None:
+		self.name = name
+		self._version: Optional[int] = None
+		self._entries: Dict[Hashable, T] = {}
+		self._lock = threading.Lock()
+
+	def get_or_render(self, key: Hashable, version: int, render: Callable[[], T]) -> T:
+		with self._lock:
+			if version == self._version:
+				text = self._entries.get(key)
+				if text is not None:
+					CACHE_LOOKUPS.inc(cache=self.name, result="hit")
+					return text
+		CACHE_LOOKUPS.inc(cache=self.name, result="miss")
+		text = render()
+		with self._lock:
+			if version != self._version:
+				if self._version is not None and version < self._version:
+					return text
+				self._version = version
+				self._entries = {}
+			self._entries[key] = text
+		return text
+
+	def advance(self, old_version: int, new_version: int, is_stale: Callable[[Hashable], bool]) -> None:
+		"""Relabel entries of old_version as new_version, dropping those is_stale flags."""
+		with self._lock:
+			if self._version != old_version:
+				return
+			self._entries = {k: v for k, v in self._entries.items() if not is_stale(k)}
+			self._version = new_version
+
+	def clear(self) -> None:
+		with self._lock:
+			self._version = None
+			self._entries = {}
+
+
+def week_start(now: Optional[datetime] = None) -> date:
+	now = now or datetime.now()
+	return (now - timedelta(days=now.weekday())).date()  # Monday
+
+
+def render_group_day(group: str, day: str, rows: List[NormalizedRow]) -> str:
+	if not rows:
+		return f"{group} gruppasında {day} kúni sabaq joq."
+
+	day_name = DAY_NAMES.get(day, day)
+	lines = [f"<b>{group} — {day_name} ({day})</b>", ""]  # Bold group name + empty line
+
+	# Filter out rows that are just teacher names (no subject)
+	valid_rows = [r for r in rows if r.subject and r.subject.strip()]
+
+	for i, r in enumerate(valid_rows, 1):
+		lines.append(f"{i}. Pán: {r.subject}")
+		if r.teacher:
+			lines.append(f"   Muǵallim: {r.teacher}")
+		if r.room:
+			lines.append(f"   [{r.room}-auditoriya]")
+		lines.append("")  # Empty line between subjects
+
+	return "\n".join(lines)
+
+
+def parse_para_num(time_val: str | None) -> int | None:
+	if not time_val:
+		return None
+	v = str(time_val).strip().upper()
+	roman_map = {
+		"I": 1, "II": 2, "III": 3, "IV": 4, "V": 5, "VI": 6,
+		"VII": 7, "VIII": 8, "IX": 9, "X": 10,
+	}
+	if v in roman_map:
+		return roman_map[v]
+	# If starts with digits, use that
+	digits = ""
+	for ch in v:
+		if ch.isdigit():
+			digits += ch
+		else:
+			break
+	try:
+		return int(digits) if digits else None
+	except ValueError:
+		return None
+
+
+@dataclass(frozen=True)
+class TeacherLesson:
+	para: int
+	subject: str
+	room: str
+	groups: Tuple[str, ...]
+
+
+TeacherWeek = Dict[str, List[TeacherLesson]]
+
+
+def build_teacher_week(rows: List[NormalizedRow]) -> TeacherWeek:
+	"""Bucket one teacher's rows by day and merge same-lesson rows across groups."""
+	# Group rows by day preserving input order
+	by_day: Dict[str, List[NormalizedRow]] = {d: [] for d in DAY_ORDER}
+	for r in rows:
+		if r.day in by_day and r.subject and r.subject.strip():
+			by_day[r.day].append(r)
+
+	week: TeacherWeek = {}
+	for d in DAY_ORDER:
+		# Merge consecutive rows that represent the same lesson ONLY when
+		# subject, room, and para number match (same-time common subject across groups)
+		merged = []  # each item: [para_num, subject, room, groups]
+		for r in by_day[d]:
+			subj = r.subject.strip()
+			room = r.room or ""
+			current_para = parse_para_num(r.time or "")
+			if merged and merged[-1][1] == subj and merged[-1][2] == room and merged[-1][0] == current_para:
+				if r.group:
+					merged[-1][3].append(r.group)
+			else:
+				merged.append([current_para, subj, room, [r.group] if r.group else []])
+		if not merged:
+			continue
+		# unique groups, keep order; lessons without a para number are labelled by position
+		week[d] = [
+			TeacherLesson(
+				para=para_num if para_num is not None else idx,
+				subject=subj,
+				room=room,
+				groups=tuple(dict.fromkeys(g for g in groups if g)),
+			)
+			for idx, (para_num, subj, room, groups) in enumerate(merged, 1)
+		]
+	return week
+
+
+def render_teacher_week(teacher: str, week: TeacherWeek, monday: date) -> str:
+	if not week:
+		return f"{teacher} ushın sabaqlar tabılmadı."
+
+	# Current week's dates (Mon..Sat)
+	day_to_date = {DAY_ORDER[i]: (monday + timedelta(days=i)).strftime("%d.%m.%Y") for i in range(len(DAY_ORDER))}
+
+	lines = [f"<b>Muǵallim: {teacher}</b>", ""]
+	for d in DAY_ORDER:
+		lessons = week.get(d)
+		if not lessons:
+			continue
+		lines.append(f"<b>{DAY_NAMES.get(d, d)} ({day_to_date.get(d, '')}):</b>")
+		for item in lessons:
+			lines.append(f"{item.para}-para. {item.subject}")
+			# each group on its own line
+			for g in item.groups:
+				lines.append(f"              {g}")
+			if item.room:
+				lines.append(f"              [{item.room} - auditoriya]")
+			lines.append("")
+
+	return "\n".join(lines)
+
+
+def render_lesson_list(title: str, rows: List[NormalizedRow]) -> str:
+	"""Lessons of a subject or room across groups, in timetable order."""
+	if not rows:
+		return f"{title}: sabaqlar tabılmadı."
+	lines = [f"<b>{title}</b>", ""]
+	for d in DAY_ORDER:
+		day_rows = [r for r in rows if r.day == d]
+		if not day_rows:
+			continue
+		lines.append(f"<b>{DAY_NAMES.get(d, d)}:</b>")
+		for r in day_rows:
+			para = parse_para_num(r.time)
+			label = f"{para}-para" if para is not None else (r.time or "")
+			room = f" [{r.room}]" if r.room else ""
+			lines.append(f"{label}. {r.subject} — {r.group}{room}")
+			if r.teacher:
+				lines.append(f"   Muǵallim: {r.teacher}")
+		lines.append("")
+	return "\n".join(lines)
+
+
+def _lesson_slot(r: NormalizedRow) -> str:
+	para = parse_para_num(r.time)
+	label = f"{para}-para" if para is not None else (r.time or "")
+	room = f" [{r.room}]" if r.room else ""
+	return f"{DAY_NAMES.get(r.day, r.day)}, {label}{room}"
+
+
+def render_changes(kind: str, name: str, changes: "ChangeSet") -> str:
+	"""Change notification for one subscribed group or teacher."""
+	title = f"Gruppa: {name}" if kind == "group" else f"Muǵallim: {name}"
+	lines = [f"<b>🔔 {title} — tablica ózgerdi</b>"]
+	for r in changes.added:
+		lines.append(f"➕ {_lesson_slot(r)}: {r.subject}" + (f" ({r.group})" if kind == "teacher" else ""))
+	for r in changes.removed:
+		lines.append(f"➖ {_lesson_slot(r)}: {r.subject}" + (f" ({r.group})" if kind == "teacher" else ""))
+	for old, new in changes.moved:
+		lines.append(f"↔ {new.subject}: {_lesson_slot(old)} → {_lesson_slot(new)}" + (f" ({new.group})" if kind == "teacher" else ""))
+	return "\n".join(lines)
+
+
+def _split_line(line: str, limit: int) -> List[str]:
+	"""A line too long for one message cut into pieces of at most limit characters.
+
+	Cuts fall between tags and entities, never inside one; a tag still open
+	at a cut is closed at the end of the piece and opened again at the start
+	of the next, so every piece is valid HTML on its own.
+	"""
+	pieces: List[str] = []
+	opened: List[Tuple[str, str]] = []  # (tag name, opening tag)
+	piece = ""
+	pos = 0
+	while pos < len(line):
+		match = _MARKUP.match(line, pos)
+		atom = match.group(0) if match else line[pos]
+		pos += len(atom)
+		after = list(opened)
+		name = re.match(r"</?\s*(\w*)", atom).group(1) if match and atom.startswith("<") else ""
+		if name and atom.startswith("</"):
+			if any(n == name for n, _ in after):
+				last = max(i for i, (n, _) in enumerate(after) if n == name)
+				del after[last:]
+		elif name and not atom.endswith("/>"):
+			after.append((name, atom))
+		closing = "".join(f"</{n}>" for n, _ in reversed(after))
+		if piece and len(piece) + len(atom) + len(closing) > limit:
+			pieces.append(piece + "".join(f"</{n}>" for n, _ in reversed(opened)))
+			piece = "".join(tag for _, tag in opened)
+		piece += atom
+		opened = after
+	pieces.append(piece)
+	return pieces
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+	"""Cut text into messages of at most limit characters, on line boundaries so HTML tags stay closed.
+
+	A single line longer than limit is cut further by _split_line.
+	"""
+	parts: List[str] = []
+	current: List[str] = []
+	size = 0
+	for line in text.split("\n"):
+		for piece in _split_line(line, limit) if len(line) > limit else (line,):
+			if current and size + len(piece) + 1 > limit:
+				parts.append("\n".join(current))
+				current, size = [], 0
+			current.append(piece)
+			size += len(piece) + 1
+	if current:
+		parts.append("\n".join(current))
+	return parts
+
+
+def truncate_message(text: str, limit: int = MESSAGE_LIMIT) -> str:
+	"""text cut to whole lines that fit in one message, ending with a mark when anything was dropped."""
+	if len(text) <= limit:
+		return text
+	return split_message(text, limit - len(TRUNCATED_MARK) - 1)[0] + "\n" + TRUNCATED_MARK
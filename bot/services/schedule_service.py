@@ -1,10 +1,43 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
-import re
+from collections import Counter, OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import date
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+import time
 
-from bot.excel_importer import load_schedule_from_excel, NormalizedRow
+from bot.excel_importer import (
+	DEFAULT_XLSX_READER,
+	is_table_file,
+	load_schedule_from_excel,
+	load_schedule_with_phases,
+	sheet_names,
+	NormalizedRow,
+)
+from bot.keyboards.callbacks import CallbackCodec
+from bot.services.diff import ChangeSet, diff_rows
+from bot.services.metrics import record_import
+from bot.services.render import (
+	DAY_ORDER,
+	RenderCache,
+	TeacherWeek,
+	build_teacher_week,
+	render_group_day,
+	render_lesson_list,
+	render_teacher_week,
+	week_start,
+)
+from bot.services.search import SearchHit, SearchIndex
+from bot.services.snapshot import load_snapshot, save_snapshot, snapshot_path
+from bot.storage.schedule_image import ScheduleImage
+from bot.storage.schedule_store import ScheduleStore
 
 
 @dataclass
@@ -14,85 +47,690 @@ class ScheduleData:
 	by_group_day: Dict[Tuple[str, str], List[NormalizedRow]]
 	by_teacher: Dict[str, List[NormalizedRow]]
 	total_rows: int
+	rows: List[NormalizedRow]
+	# Per-teacher lessons bucketed by day and merged across groups
+	teacher_week: Dict[str, TeacherWeek]
+	search: SearchIndex
+	source_path: Optional[str] = None
+	# Assigned by ScheduleService when the data is published
+	version: int = 0
+
+
+def build_schedule_data(file_path: str) -> ScheduleData:
+	"""Parse file_path and build every index."""
+	# Rows arrive with teacher names already normalized and strings interned
+	return index_rows(load_schedule_from_excel(file_path), file_path)
+
+
+def index_rows(rows: List[NormalizedRow], source_path: Optional[str] = None) -> ScheduleData:
+	groups: List[str] = sorted({r.group for r in rows})
+	teachers: List[str] = sorted({r.teacher for r in rows if r.teacher})
+
+	by_group_day: Dict[Tuple[str, str], List[NormalizedRow]] = {}
+	for r in rows:
+		by_group_day.setdefault((r.group, r.day), []).append(r)
+	# Keep original order from Excel parsing (no sorting by time)
+
+	by_teacher: Dict[str, List[NormalizedRow]] = {}
+	for r in rows:
+		if not r.teacher:
+			continue
+		by_teacher.setdefault(r.teacher, []).append(r)
+	# Keep original Excel order for teacher listings as well (no sorting)
+
+	return ScheduleData(
+		groups=groups,
+		teachers=teachers,
+		by_group_day=by_group_day,
+		by_teacher=by_teacher,
+		total_rows=len(rows),
+		rows=rows,
+		teacher_week={t: build_teacher_week(t_rows) for t, t_rows in by_teacher.items()},
+		search=SearchIndex(rows),
+		source_path=source_path,
+	)
+
+
+def update_schedule_data(old: ScheduleData, rows: List[NormalizedRow], changes: ChangeSet, source_path: Optional[str] = None) -> ScheduleData:
+	"""Derive the next ScheduleData from old, rebuilding only buckets that changes touches."""
+	if changes.is_empty():
+		# Same lessons in the same bucket order; rows may still differ in order across buckets
+		return replace(old, rows=rows, source_path=source_path, version=0)
+
+	affected_group_days = changes.group_days
+	affected_teachers = changes.teachers
+	fresh_group_days: Dict[Tuple[str, str], List[NormalizedRow]] = {}
+	fresh_teachers: Dict[str, List[NormalizedRow]] = {}
+	for r in rows:
+		key = (r.group, r.day)
+		if key in affected_group_days:
+			fresh_group_days.setdefault(key, []).append(r)
+		if r.teacher in affected_teachers:
+			fresh_teachers.setdefault(r.teacher, []).append(r)
+
+	by_group_day = dict(old.by_group_day)
+	for key in affected_group_days:
+		if key in fresh_group_days:
+			by_group_day[key] = fresh_group_days[key]
+		else:
+			by_group_day.pop(key, None)
+
+	by_teacher = dict(old.by_teacher)
+	teacher_week = dict(old.teacher_week)
+	for t in affected_teachers:
+		if t in fresh_teachers:
+			by_teacher[t] = fresh_teachers[t]
+			teacher_week[t] = build_teacher_week(fresh_teachers[t])
+		else:
+			by_teacher.pop(t, None)
+			teacher_week.pop(t, None)
+
+	return ScheduleData(
+		groups=sorted({g for g, _ in by_group_day}),
+		teachers=sorted(by_teacher),
+		by_group_day=by_group_day,
+		by_teacher=by_teacher,
+		total_rows=len(rows),
+		rows=rows,
+		teacher_week=teacher_week,
+		# Subject and room listings reference rows directly, so the (cheap) index is rebuilt
+		search=SearchIndex(rows),
+		source_path=source_path,
+	)
+
+
+# Shard of files in data/schedules itself; faculty subdirectories get their own
+DEFAULT_SHARD = ""
+# Sheets parsed at once; each worker holds one sheet's grid
+IMPORT_WORKERS = max(1, min(8, os.cpu_count() or 1))
+
+# shard name -> (source file, its lessons)
+Shards = Dict[str, Tuple[Optional[str], List[NormalizedRow]]]
+
+_import_executor: Optional[Executor] = None
+_import_executor_lock = threading.Lock()
+
+
+def _get_import_executor() -> Executor:
+	# Spawned workers: openpyxl parsing is CPU-bound and would hold the GIL
+	# against the event loop if it ran in a thread
+	global _import_executor
+	with _import_executor_lock:
+		if _import_executor is None:
+			_import_executor = ProcessPoolExecutor(max_workers=IMPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+		return _import_executor
+
+
+async def parse_files_async(
+	files: Dict[str, str],
+	executor: Optional[Executor] = None,
+	reader: str = DEFAULT_XLSX_READER,
+) -> Tuple[Dict[str, List[NormalizedRow]], Dict[str, float]]:
+	"""Parse every sheet of every file in parallel; returns rows per shard and summed phase timings.
+
+	Each (file, sheet) pair is a separate job, so a faculty workbook with one
+	sheet per course spreads over the pool just like several workbooks do.
+	Rows keep file and sheet order within a shard.
+	"""
+	loop = asyncio.get_running_loop()
+	executor = executor or _get_import_executor()
+	started = time.perf_counter()
+	jobs: List[Tuple[str, str, Optional[str]]] = []
+	for shard, path in files.items():
+		try:
+			# CSV/TSV files are a single table
+			names = [] if is_table_file(path) else await asyncio.to_thread(sheet_names, path)
+		except Exception:
+			# Not a readable xlsx; the worker raises the real error
+			names = []
+		jobs.extend((shard, path, name) for name in names or [None])
+	results = await asyncio.gather(*(
+		loop.run_in_executor(executor, load_schedule_with_phases, path, sheet, reader) for _, path, sheet in jobs
+	))
+	rows: Dict[str, List[NormalizedRow]] = {shard: [] for shard in files}
+	phases: Dict[str, float] = {}
+	for (shard, _, _), (sheet_rows, sheet_phases) in zip(jobs, results):
+		rows[shard].extend(sheet_rows)
+		for phase, seconds in sheet_phases.items():
+			phases[phase] = phases.get(phase, 0.0) + seconds
+	phases["parse_wall"] = time.perf_counter() - started
+	return rows, phases
+
+
+def merged_source(shards: Shards) -> Optional[str]:
+	"""Source recorded for the merged timetable.
+
+	The file itself when the default shard is the only one; otherwise a JSON
+	object of shard name -> file, so split_source can tell a store's shards
+	apart again in another process.
+	"""
+	if list(shards) == [DEFAULT_SHARD]:
+		return shards[DEFAULT_SHARD][0]
+	return json.dumps({shard: path for shard, (path, _) in sorted(shards.items())}, ensure_ascii=False, sort_keys=True)
+
+
+def split_source(source: Optional[str]) -> Dict[str, Optional[str]]:
+	"""Shard name -> file of a source written by merged_source."""
+	if not source:
+		return {}
+	if source.startswith("{"):
+		try:
+			files = json.loads(source)
+		except ValueError:
+			files = None
+		if isinstance(files, dict):
+			return files
+	return {DEFAULT_SHARD: source}
+
+
+# Data in memory mode, shards, and the merged source it replaced with the changes from it
+_Warm = Tuple[Optional[ScheduleData], Shards, Optional[Tuple[str, ChangeSet]]]
 
 
 class ScheduleService:
-	def __init__(self) -> None:
+	"""Timetable lookups backed by in-memory indexes or by a store shared between processes.
+
+	In memory mode all state lives in one ScheduleData that is built completely
+	before being published with a single reference assignment, so readers
+	always see either the old or the new timetable, never a mix.
+
+	The timetable is the union of shards, one per faculty workbook. Loading a
+	file replaces only its shard; the merged rows then go through the usual
+	diff and incremental index update, so global lookups see every faculty.
+	"""
+
+	def __init__(
+		self,
+		store: Optional[Union[ScheduleStore, ScheduleImage]] = None,
+		xlsx_reader: str = DEFAULT_XLSX_READER,
+		warm_versions: int = 3,
+	) -> None:
 		self._data: Optional[ScheduleData] = None
-		self._source_path: Optional[str] = None
-
-	def load_from_file(self, file_path: str) -> None:
-		rows_raw = load_schedule_from_excel(file_path)
-
-		def normalize_teacher(name: str) -> str:
-			if not name:
-				return ""
-			# Drop anything in parentheses and trim
-			clean = re.sub(r"\s*\(.*?\)\s*$", "", name).strip()
-			# Collapse internal whitespace
-			clean = re.sub(r"\s+", " ", clean)
-			return clean
-
-		# Normalize teacher names for menus and indexing (create new instances)
-		rows = [
-			NormalizedRow(
-				group=r.group,
-				day=r.day,
-				time=r.time,
-				subject=r.subject,
-				teacher=normalize_teacher(r.teacher) if getattr(r, 'teacher', None) else "",
-				room=r.room,
-			)
-			for r in rows_raw
-		]
-
-		groups: List[str] = sorted({r.group for r in rows})
-		teachers: List[str] = sorted({r.teacher for r in rows if r.teacher})
-
-		by_group_day: Dict[Tuple[str, str], List[NormalizedRow]] = {}
-		for r in rows:
-			by_group_day.setdefault((r.group, r.day), []).append(r)
-		# Keep original order from Excel parsing (no sorting by time)
-
-		by_teacher: Dict[str, List[NormalizedRow]] = {}
-		for r in rows:
-			if not r.teacher:
-				continue
-			by_teacher.setdefault(r.teacher, []).append(r)
-		# Keep original Excel order for teacher listings as well (no sorting)
-
-		self._data = ScheduleData(groups=groups, teachers=teachers, by_group_day=by_group_day, by_teacher=by_teacher, total_rows=len(rows))
-		self._source_path = file_path
+		self._store = store
+		# Backend for .xlsx files, one of excel_importer.XLSX_READERS
+		self.xlsx_reader = xlsx_reader
+		self._version_lock = threading.Lock()
+		self._last_version = 0
+		self.render_cache: RenderCache[str] = RenderCache()
+		# Menu keyboards, filled by bot.keyboards.menus
+		self.menu_cache: RenderCache[object] = RenderCache("menu")
+		self.callbacks = CallbackCodec(self.catalog)
+		# (version, index) built on demand in SQLite mode
+		self._store_search: Optional[Tuple[int, SearchIndex]] = None
+		# absolute path -> (mtime_ns, size) of each file the live timetable came from
+		self._loaded_stat: Dict[str, Tuple[int, int]] = {}
+		self._shards: Shards = {}
+		# Serializes publishes: uploads and the file watcher run them from worker threads
+		self._publish_lock = threading.Lock()
+		# Absolute paths being parsed right now, with how many imports are at them
+		self._importing: Counter = Counter()
+		self._importing_lock = threading.Lock()
+		# Recently live timetables by merged source, most recent last
+		self._warm: "OrderedDict[str, _Warm]" = OrderedDict()
+		self.warm_versions = warm_versions
+		# Merged source of the live timetable, once this process has published one
+		self._live_key: Optional[str] = None
+
+	@contextmanager
+	def _importing_files(self, paths: Iterable[str]) -> Iterator[None]:
+		keys = [os.path.abspath(path) for path in paths]
+		with self._importing_lock:
+			self._importing.update(keys)
+		try:
+			yield
+		finally:
+			with self._importing_lock:
+				self._importing.subtract(keys)
+				self._importing += Counter()
+
+	def is_importing(self, file_path: str) -> bool:
+		"""Whether file_path is being parsed and published right now."""
+		with self._importing_lock:
+			return self._importing[os.path.abspath(file_path)] > 0
+
+	def load_from_file(self, file_path: str, write_snapshot: bool = True, shard: str = DEFAULT_SHARD) -> ChangeSet:
+		with self._importing_files([file_path]):
+			rows, phases = load_schedule_with_phases(file_path, reader=self.xlsx_reader)
+			return self.publish_rows(rows, file_path, write_snapshot=write_snapshot, phases=phases, shard=shard)
+
+	async def load_from_file_async(
+		self,
+		file_path: str,
+		write_snapshot: bool = True,
+		executor: Optional[Executor] = None,
+		shard: str = DEFAULT_SHARD,
+	) -> ChangeSet:
+		"""Parse file_path in worker processes and publish it as shard without blocking the event loop."""
+		return await self.load_files_async({shard: file_path}, write_snapshot=write_snapshot, executor=executor)
+
+	async def load_files_async(self, files: Dict[str, str], write_snapshot: bool = True, executor: Optional[Executor] = None) -> ChangeSet:
+		"""Parse several shard files (all their sheets) in parallel and publish them in one swap."""
+		with self._importing_files(files.values()):
+			rows, phases = await parse_files_async(files, executor, self.xlsx_reader)
+			updates: Shards = {shard: (files[shard], shard_rows) for shard, shard_rows in rows.items()}
+			return await asyncio.to_thread(self.publish_shards, updates, write_snapshot, phases)
+
+	def publish_rows(
+		self,
+		rows: List[NormalizedRow],
+		source_path: Optional[str],
+		write_snapshot: bool = True,
+		phases: Optional[Dict[str, float]] = None,
+		shard: str = DEFAULT_SHARD,
+	) -> ChangeSet:
+		"""Replace one shard with rows, publish the merged timetable and return what changed."""
+		return self.publish_shards({shard: (source_path, rows)}, write_snapshot=write_snapshot, phases=phases)
+
+	def publish_shards(self, updates: Shards, write_snapshot: bool = True, phases: Optional[Dict[str, float]] = None) -> ChangeSet:
+		"""Replace the given shards, diff the merged rows against the live timetable and publish them.
+
+		phases holds parse timings to report together with the diff, index
+		build and publish timings measured here.
+		"""
+		phases = dict(phases or {})
+		with self._publish_lock:
+			shards = self._current_shards(replacing=updates)
+			shards.update(updates)
+			rows = [r for _, (_, shard_rows) in sorted(shards.items()) for r in shard_rows]
+			source_path = merged_source(shards)
+			started = time.perf_counter()
+			if self._store is not None:
+				changes = diff_rows(self._store.all_rows(), rows)
+				phases["diff"] = time.perf_counter() - started
+				started = time.perf_counter()
+				# Other processes sharing the database pick this up without parsing Excel
+				self._store.replace_all(rows, source_path)
+				self._set_shards(shards, changes=changes)
+				if write_snapshot and list(shards) != [DEFAULT_SHARD]:
+					self._save_shard_snapshots(shards, updates)
+				self.warm_render_cache()
+				phases["publish"] = time.perf_counter() - started
+				record_import(phases)
+				return changes
+			old = self._data
+			if old is None:
+				changes = diff_rows([], rows)
+				phases["diff"] = time.perf_counter() - started
+				started = time.perf_counter()
+				data = index_rows(rows, source_path)
+			else:
+				changes = diff_rows(old.rows, rows)
+				phases["diff"] = time.perf_counter() - started
+				started = time.perf_counter()
+				data = update_schedule_data(old, rows, changes, source_path)
+			phases["index_build"] = time.perf_counter() - started
+			started = time.perf_counter()
+			single = list(shards) == [DEFAULT_SHARD]
+			self.publish(data, write_snapshot=write_snapshot and single, changes=changes)
+			self._set_shards(shards, data, changes)
+			if write_snapshot and not single:
+				self._save_shard_snapshots(shards, updates)
+			phases["publish"] = time.perf_counter() - started
+		record_import(phases)
+		return changes
+
+	def _current_shards(self, replacing: Iterable[str] = ()) -> Shards:
+		"""The live shards; rows of shards in replacing may be left out of a store split back."""
+		shards = dict(self._shards)
+		if shards or self._store is None or not self._store.has_data():
+			return shards
+		# Store filled by another process or an earlier run: split it back into the shards it was merged from
+		files = split_source(self._store.source_path())
+		if list(files) in ([], [DEFAULT_SHARD]):
+			return {DEFAULT_SHARD: (files.get(DEFAULT_SHARD), self._store.all_rows())}
+		missing = [shard for shard, path in files.items() if not (path and os.path.exists(path))]
+		# Shards about to be replaced are only needed to work out a missing file's rows
+		skip = set() if missing else set(replacing)
+		for shard, path in files.items():
+			if shard not in skip and shard not in missing:
+				shards[shard] = (path, self._shard_rows(path))
+		if missing:
+			# Rows no readable file accounts for stay with the shard whose file is gone
+			rows = self._store.all_rows()
+			left = Counter(rows)
+			for _, shard_rows in shards.values():
+				left.subtract(shard_rows)
+			leftover = []
+			for r in rows:
+				if left[r] > 0:
+					left[r] -= 1
+					leftover.append(r)
+			for i, shard in enumerate(missing):
+				shards[shard] = (files[shard], leftover if i == 0 else [])
+		return shards
+
+	def _shard_rows(self, path: str) -> List[NormalizedRow]:
+		# Every shard gets a snapshot when a multi-shard timetable is published; parsing is the fallback
+		data = load_snapshot(path)
+		if isinstance(data, ScheduleData):
+			return data.rows
+		return load_schedule_from_excel(path, reader=self.xlsx_reader)
+
+	def _set_shards(self, shards: Shards, data: Optional[ScheduleData] = None, changes: Optional[ChangeSet] = None) -> None:
+		self._shards = shards
+		self._remember_sources([path for path, _ in shards.values()])
+		key = merged_source(shards)
+		previous, self._live_key = self._live_key, key
+		if key is None or self.warm_versions <= 0:
+			return
+		came_from = (previous, changes) if previous is not None and previous != key and changes is not None else None
+		self._warm[key] = (data, shards, came_from)
+		self._warm.move_to_end(key)
+		while len(self._warm) > self.warm_versions:
+			self._warm.popitem(last=False)
+
+	def _known_changes(self, old_key: Optional[str], new_key: str) -> Optional[ChangeSet]:
+		"""Changes between two warm timetables, when one was published straight after the other."""
+		if old_key is None:
+			return None
+		new = self._warm.get(new_key)
+		if new is not None and new[2] is not None and new[2][0] == old_key:
+			return new[2][1]
+		old = self._warm.get(old_key)
+		if old is not None and old[2] is not None and old[2][0] == new_key:
+			return old[2][1].inverted()
+		return None
+
+	def restore(self, updates: Dict[str, str]) -> Optional[ChangeSet]:
+		"""Switch shards back to files that were live recently, without reading them again.
+
+		The shard paths after the update must match a timetable still in the
+		warm set. In memory mode that timetable is published again by
+		reference (unchanged index buckets are shared between versions, so
+		keeping a few costs little); a SQLite store is rewritten from the kept
+		rows. The changes come from the publish that linked the two timetables
+		when there was one; otherwise they are diffed after the swap, outside
+		the publish lock. Returns None when nothing warm matches. Paths are the
+		cache key, so this is only meant for files that never change in place,
+		like content-addressed versions.
+		"""
+		with self._publish_lock:
+			if self._shards:
+				paths = {shard: path for shard, (path, _) in self._shards.items()}
+			else:
+				paths = split_source(self._store.source_path()) if self._store is not None else {}
+			paths.update(updates)
+			key = merged_source({shard: (path, []) for shard, path in paths.items()})
+			warm = self._warm.get(key) if key is not None else None
+			if warm is None or (self._store is None and warm[0] is None):
+				return None
+			data, shards, _ = warm
+			started = time.perf_counter()
+			previous = self._live_key
+			changes = self._known_changes(previous, key)
+			old_rows: List[NormalizedRow] = []
+			if self._store is not None:
+				rows = [r for _, (_, shard_rows) in sorted(shards.items()) for r in shard_rows]
+				if changes is None:
+					old_rows = self._store.all_rows()
+				self._store.replace_all(rows, key)
+			else:
+				rows = data.rows
+				if changes is None and self._data is not None:
+					old_rows = self._data.rows
+				# A copy, so the version stamped on it does not touch the object readers may still hold;
+				# without changes the render cache starts over rather than being re-warmed here
+				data = replace(data, version=0)
+				self._swap(data, changes)
+			self._set_shards(shards, data, changes)
+			phases = {"restore": time.perf_counter() - started}
+		if changes is None:
+			changes = diff_rows(old_rows, rows)
+			with self._publish_lock:
+				entry = self._warm.get(key)
+				if entry is not None and self._live_key == key and previous is not None:
+					self._warm[key] = (entry[0], entry[1], (previous, changes))
+		record_import(phases)
+		return changes
+
+	async def switch_file_async(self, shard: str, file_path: str, executor: Optional[Executor] = None) -> Tuple[ChangeSet, str]:
+		"""Make file_path the live file of shard by the cheapest route available.
+
+		Returns the changes and where the timetable came from: "warm" (still in
+		memory), "snapshot" (its compiled snapshot) or "parsed".
+		"""
+		changes = await asyncio.to_thread(self.restore, {shard: file_path})
+		if changes is not None:
+			return changes, "warm"
+		data = await asyncio.to_thread(load_snapshot, file_path)
+		if isinstance(data, ScheduleData):
+			changes = await asyncio.to_thread(self.publish_shards, {shard: (file_path, data.rows)}, False)
+			return changes, "snapshot"
+		changes = await self.load_from_file_async(file_path, executor=executor, shard=shard)
+		return changes, "parsed"
+
+	def _remember_sources(self, paths: List[Optional[str]]) -> None:
+		loaded: Dict[str, Tuple[int, int]] = {}
+		for path in paths:
+			try:
+				st = os.stat(path) if path else None
+			except OSError:
+				st = None
+			if st is not None:
+				loaded[os.path.abspath(path)] = (st.st_mtime_ns, st.st_size)
+		self._loaded_stat = loaded
+
+	@staticmethod
+	def _save_shard_snapshots(shards: Shards, updates: Shards) -> None:
+		# Each faculty file gets its own snapshot so a restart, or another process splitting
+		# a shared store back into shards, parses only files that changed
+		for shard, (path, rows) in shards.items():
+			if path and (shard in updates or not snapshot_path(path).exists()):
+				save_snapshot(path, index_rows(rows, path))
+
+	def publish(self, data: ScheduleData, write_snapshot: bool = True, changes: Optional[ChangeSet] = None) -> None:
+		"""Make data the live timetable; with changes, render cache entries it does not touch survive."""
+		if self._store is not None:
+			# Other processes sharing the database pick this up without parsing Excel
+			self._store.replace_all(data.rows, data.source_path)
+		else:
+			self._swap(data, changes)
+			if write_snapshot and data.source_path:
+				save_snapshot(data.source_path, data)
+		self.warm_render_cache()
+
+	def _swap(self, data: ScheduleData, changes: Optional[ChangeSet] = None) -> None:
+		with self._version_lock:
+			old = self._data
+			# Seeded from the clock so versions (and callback tokens built on them)
+			# are not reused after a restart
+			self._last_version = max(self._last_version + 1, int(time.time()))
+			data.version = self._last_version
+			if old is not None and changes is not None:
+				# Advance the cache before the swap so readers of the new version find the carried entries
+				self.render_cache.advance(old.version, data.version, changes.render_key_filter())
+			self._data = data
+
+	def is_current(self, file_path: str) -> bool:
+		"""Whether a shard of the live timetable was loaded from file_path as it is on disk now."""
+		loaded = self._loaded_stat.get(os.path.abspath(file_path))
+		if loaded is None:
+			return False
+		try:
+			st = os.stat(file_path)
+		except OSError:
+			return False
+		return (st.st_mtime_ns, st.st_size) == loaded
+
+	def load_cached(self, file_path: str) -> bool:
+		"""Load from the compiled snapshot next to file_path, parsing Excel only if it is missing or stale.
+
+		Returns True when the snapshot was used. With a SQLite store the store
+		itself is the snapshot: it is reused when it was loaded from file_path.
+		"""
+		if self._store is not None:
+			if self._store.has_data() and self._store.source_path() == file_path:
+				self._set_shards({DEFAULT_SHARD: (file_path, self._store.all_rows())})
+				return True
+			self.load_from_file(file_path)
+			return False
+		data = load_snapshot(file_path)
+		if isinstance(data, ScheduleData):
+			if data.source_path != file_path:
+				data = replace(data, source_path=file_path)
+			with self._publish_lock:
+				self._swap(data)
+				self._set_shards({DEFAULT_SHARD: (file_path, data.rows)}, data)
+			return True
+		self.load_from_file(file_path)
+		return False
+
+	async def load_cached_files_async(self, files: Dict[str, str], executor: Optional[Executor] = None) -> int:
+		"""Startup load of several shards: snapshots where fresh, the rest parsed in parallel.
+
+		Returns how many shards came from snapshots (or from a store already
+		holding exactly these files).
+		"""
+		if len(files) == 1 and DEFAULT_SHARD in files:
+			return int(await asyncio.to_thread(self.load_cached, files[DEFAULT_SHARD]))
+		if self._store is not None:
+			if self._store.has_data() and self._store.source_path() == merged_source({k: (v, []) for k, v in files.items()}):
+				# Shard rows are read back from their snapshots only when one of them is replaced
+				self._remember_sources(list(files.values()))
+				return len(files)
+			await self.load_files_async(files, executor=executor)
+			return 0
+		cached: Shards = {}
+		for shard, path in files.items():
+			data = await asyncio.to_thread(load_snapshot, path)
+			if isinstance(data, ScheduleData):
+				cached[shard] = (path, data.rows)
+		missing = {shard: path for shard, path in files.items() if shard not in cached}
+		phases: Dict[str, float] = {}
+		if missing:
+			rows, phases = await parse_files_async(missing, executor, self.xlsx_reader)
+			parsed: Shards = {shard: (missing[shard], shard_rows) for shard, shard_rows in rows.items()}
+			await asyncio.to_thread(self._save_shard_snapshots, parsed, parsed)
+			cached.update(parsed)
+		await asyncio.to_thread(self.publish_shards, cached, False, phases)
+		return len(files) - len(missing)
+
+	def shards(self) -> Dict[str, int]:
+		"""Lessons per loaded shard (faculty); "" is the top-level schedule directory."""
+		return {shard: len(rows) for shard, (_, rows) in sorted(self._shards.items())}
 
 	def get_groups(self) -> List[str]:
-		return list(self._data.groups) if self._data else []
+		if self._store is not None:
+			return self._store.get_groups()
+		data = self._data
+		return list(data.groups) if data else []
 
 	def get_teachers(self) -> List[str]:
-		return list(self._data.teachers) if self._data else []
+		if self._store is not None:
+			return self._store.get_teachers()
+		data = self._data
+		return list(data.teachers) if data else []
+
+	def catalog(self) -> Tuple[int, List[str], List[str]]:
+		"""(version, groups, teachers) taken from a single published timetable."""
+		if self._store is not None:
+			return self._store.catalog()
+		data = self._data
+		if not data:
+			return 0, [], []
+		return data.version, data.groups, data.teachers
 
 	def get_group_day(self, group: str, day: str) -> List[NormalizedRow]:
-		if not self._data:
+		if self._store is not None:
+			return self._store.get_group_day(group, day)
+		data = self._data
+		if not data:
 			return []
-		return self._data.by_group_day.get((group, day), [])
+		return data.by_group_day.get((group, day), [])
 
 	def get_teacher(self, teacher: str) -> List[NormalizedRow]:
-		if not self._data:
+		if self._store is not None:
+			return self._store.get_teacher(teacher)
+		data = self._data
+		if not data:
 			return []
-		return self._data.by_teacher.get(teacher, [])
+		return data.by_teacher.get(teacher, [])
+
+	def get_teacher_week(self, teacher: str) -> TeacherWeek:
+		if self._store is not None:
+			return build_teacher_week(self._store.get_teacher(teacher))
+		data = self._data
+		if not data:
+			return {}
+		return data.teacher_week.get(teacher, {})
+
+	def search_index(self) -> Optional[SearchIndex]:
+		if self._store is not None:
+			version = self._store.version()
+			cached = self._store_search
+			if cached is None or cached[0] != version:
+				cached = self._store_search = (version, SearchIndex(self._store.all_rows()))
+			return cached[1]
+		data = self._data
+		return data.search if data else None
+
+	def search(self, query: str, limit: int = 20) -> Tuple[List[SearchHit], Optional[str]]:
+		"""Fuzzy match groups, teachers, subjects and rooms; also returns a day named in the query."""
+		index = self.search_index()
+		if index is None:
+			return [], None
+		return index.search(query, limit=limit)
+
+	def render_search_hit(self, hit: SearchHit, day: str) -> str:
+		if hit.kind == "group":
+			return self.render_group_day(hit.value, day)
+		if hit.kind == "teacher":
+			return self.render_teacher_week(hit.value)
+		version = self.version()
+		index = self.search_index()
+		title = hit.value if hit.kind == "subject" else f"{hit.value}-auditoriya"
+		return self.render_cache.get_or_render(
+			(hit.kind, hit.value), version,
+			lambda: render_lesson_list(title, index.rows_for(hit.kind, hit.value) if index else []),
+		)
 
 	def has_data(self) -> bool:
+		if self._store is not None:
+			return self._store.has_data()
 		return self._data is not None
 
 	def source_path(self) -> Optional[str]:
-		return self._source_path
+		if self._store is not None:
+			return self._store.source_path()
+		data = self._data
+		return data.source_path if data else None
+
+	def version(self) -> int:
+		"""Monotonic id of the published timetable; changes whenever a new one is loaded."""
+		if self._store is not None:
+			return self._store.version()
+		data = self._data
+		return data.version if data else 0
+
+	def render_group_day(self, group: str, day: str) -> str:
+		# Read the version before the rows: a concurrent swap then only leaves an entry the next version drops
+		version = self.version()
+		return self.render_cache.get_or_render(
+			("group_day", group, day), version,
+			lambda: render_group_day(group, day, self.get_group_day(group, day)),
+		)
+
+	def render_teacher_week(self, teacher: str, monday: Optional[date] = None) -> str:
+		monday = monday or week_start()
+		version = self.version()
+		return self.render_cache.get_or_render(
+			("teacher_week", teacher, monday), version,
+			lambda: render_teacher_week(teacher, self.get_teacher_week(teacher), monday),
+		)
+
+	def warm_render_cache(self) -> None:
+		for group in self.get_groups():
+			for day in DAY_ORDER:
+				self.render_group_day(group, day)
 
 	def stats(self) -> Dict[str, int]:
-		if not self._data:
+		if self._store is not None:
+			return self._store.stats()
+		data = self._data
+		if not data:
 			return {"groups": 0, "teachers": 0, "lessons": 0}
 		return {
-			"groups": len(self._data.groups),
-			"teachers": len(self._data.teachers),
-			"lessons": self._data.total_rows,
+			"groups": len(data.groups),
+			"teachers": len(data.teachers),
+			"lessons": data.total_rows,
 		}
-
-
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+import re
+import unicodedata
+
+from bot.excel_importer import DAY_ALIASES, NormalizedRow
+
+
+# Cyrillic (Russian, Uzbek and Karakalpak letters) to the Latin spelling used in the timetables
+_CYRILLIC = {
+	"а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo", "ж": "j",
+	"з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+	"п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "x", "ц": "ts",
+	"ч": "ch", "ш": "sh", "щ": "sh", "ъ": "", "ы": "i", "ь": "", "э": "e", "ю": "yu",
+	"я": "ya", "ә": "a", "ғ": "g", "қ": "q", "ң": "n", "ө": "o", "ү": "u", "ў": "w",
+	"ҳ": "h", "і": "i",
+}
+# Letters NFKD does not decompose into ASCII
+_LATIN = {"ı": "i", "ʻ": "", "ʼ": "", "'": "", "`": "", "’": "", "‘": ""}
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+	"""Fold case, diacritics, Cyrillic and Uzbek apostrophes so "Dúyshembi", "Duyshembi" and "Дуйшемби" match."""
+	out: List[str] = []
+	for ch in (text or "").lower():
+		if ch in _CYRILLIC:
+			out.append(_CYRILLIC[ch])
+		elif ch in _LATIN:
+			out.append(_LATIN[ch])
+		else:
+			out.append(ch)
+	decomposed = unicodedata.normalize("NFKD", "".join(out))
+	ascii_text = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+	return _NON_WORD.sub(" ", ascii_text).strip()
+
+
+def _trigrams(word: str) -> Iterable[str]:
+	padded = f"  {word} "
+	for i in range(len(padded) - 2):
+		yield padded[i:i + 3]
+
+
+_DAYS_NORMALIZED: Dict[str, str] = {normalize(k): v for k, v in DAY_ALIASES.items() if normalize(k)}
+
+
+@dataclass(frozen=True, slots=True)
+class SearchHit:
+	kind: str  # "group", "teacher", "subject" or "room"
+	value: str
+	score: float
+
+
+class SearchIndex:
+	"""Trigram and word-prefix index over the distinct names of one timetable."""
+
+	KINDS = ("group", "teacher", "subject", "room")
+
+	def __init__(self, rows: Iterable[NormalizedRow]) -> None:
+		docs: Dict[Tuple[str, str], int] = {}
+		self._ids = docs
+		self._docs: List[Tuple[str, str]] = []
+		self._rows_by_doc: List[List[NormalizedRow]] = []
+		for r in rows:
+			for kind, value in (("group", r.group), ("teacher", r.teacher), ("subject", r.subject), ("room", r.room)):
+				if not value:
+					continue
+				doc_id = docs.get((kind, value))
+				if doc_id is None:
+					doc_id = docs[(kind, value)] = len(self._docs)
+					self._docs.append((kind, value))
+					self._rows_by_doc.append([])
+				self._rows_by_doc[doc_id].append(r)
+
+		self._trigrams: Dict[str, List[int]] = {}
+		# Words of 1-2 characters ("du", "a") match through word prefixes instead of trigrams
+		self._prefixes: Dict[str, List[int]] = {}
+		for doc_id, (_, value) in enumerate(self._docs):
+			seen_grams = set()
+			seen_prefixes = set()
+			for word in normalize(value).split():
+				seen_grams.update(_trigrams(word))
+				seen_prefixes.update((word[:1], word[:2]))
+			for gram in seen_grams:
+				self._trigrams.setdefault(gram, []).append(doc_id)
+			for prefix in seen_prefixes:
+				self._prefixes.setdefault(prefix, []).append(doc_id)
+
+	def __len__(self) -> int:
+		return len(self._docs)
+
+	def rows_for(self, kind: str, value: str) -> List[NormalizedRow]:
+		doc_id = self._ids.get((kind, value))
+		return [] if doc_id is None else self._rows_by_doc[doc_id]
+
+	def _candidates(self, words: List[str], min_score: float) -> Dict[int, float]:
+		scores: Counter = Counter()
+		total = 0
+		for word in words:
+			if len(word) < 3:
+				total += 1
+				for doc_id in self._prefixes.get(word, ()):
+					scores[doc_id] += 1
+				continue
+			grams = set(_trigrams(word))
+			total += 1
+			word_scores: Counter = Counter()
+			for gram in grams:
+				for doc_id in self._trigrams.get(gram, ()):
+					word_scores[doc_id] += 1
+			for doc_id, hits in word_scores.items():
+				scores[doc_id] += hits / len(grams)
+		if not total:
+			return {}
+		return {doc_id: s / total for doc_id, s in scores.items() if s / total >= min_score}
+
+	def search(self, query: str, limit: int = 20, min_score: float = 0.5) -> Tuple[List[SearchHit], Optional[str]]:
+		"""Return best matching names and the day named in query, if any ("IS-21 Mon")."""
+		day: Optional[str] = None
+		words: List[str] = []
+		for word in normalize(query).split():
+			if day is None and word in _DAYS_NORMALIZED and not word.isdigit():
+				day = _DAYS_NORMALIZED[word]
+				continue
+			words.append(word)
+		if not words:
+			return [], day
+		scored = self._candidates(words, min_score)
+		best = sorted(scored.items(), key=lambda item: (-item[1], self.KINDS.index(self._docs[item[0]][0]), self._docs[item[0]][1]))
+		hits = [SearchHit(kind=self._docs[d][0], value=self._docs[d][1], score=round(s, 3)) for d, s in best[:limit]]
+		return hits, day
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+import hashlib
+import logging
+import os
+import pickle
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when the pickled payload layout or the parser's output changes so old
+# snapshots are ignored
+SNAPSHOT_VERSION = 6
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+@dataclass(frozen=True)
+class SourceKey:
+	sha256: str
+	mtime_ns: int
+	size: int
+
+
+def snapshot_path(source_path: str) -> Path:
+	"""<source file name>.snapshot, so x.csv and x.xlsx in one directory keep separate snapshots."""
+	source = Path(source_path)
+	return source.with_name(source.name + SNAPSHOT_SUFFIX)
+
+
+def file_sha256(path: str) -> str:
+	h = hashlib.sha256()
+	with open(path, "rb") as fh:
+		for chunk in iter(lambda: fh.read(1 << 20), b""):
+			h.update(chunk)
+	return h.hexdigest()
+
+
+def source_key(source_path: str) -> SourceKey:
+	st = os.stat(source_path)
+	return SourceKey(sha256=file_sha256(source_path), mtime_ns=st.st_mtime_ns, size=st.st_size)
+
+
+def save_snapshot(source_path: str, payload: Any, key: SourceKey | None = None) -> Optional[Path]:
+	"""Write payload next to the source file, keyed by the source's hash and mtime."""
+	key = key or source_key(source_path)
+	out = snapshot_path(source_path)
+	tmp = out.with_name(out.name + ".tmp")
+	try:
+		with open(tmp, "wb") as fh:
+			pickle.dump((SNAPSHOT_VERSION, key, payload), fh, protocol=pickle.HIGHEST_PROTOCOL)
+		os.replace(tmp, out)
+	except OSError as exc:
+		logger.warning("Failed to write snapshot %s: %s", out, exc)
+		tmp.unlink(missing_ok=True)
+		return None
+	return out
+
+
+def load_snapshot(source_path: str) -> Any | None:
+	"""Return the payload stored for source_path, or None when missing or stale."""
+	path = snapshot_path(source_path)
+	if not path.exists():
+		return None
+	try:
+		with open(path, "rb") as fh:
+			version, key, payload = pickle.load(fh)
+	except Exception as exc:
+		logger.warning("Ignoring unreadable snapshot %s: %s", path, exc)
+		return None
+	if version != SNAPSHOT_VERSION:
+		return None
+	try:
+		st = os.stat(source_path)
+	except OSError:
+		return None
+	if st.st_size != key.size:
+		return None
+	# mtime match is the fast path; a touched-but-identical file still matches by hash
+	if st.st_mtime_ns != key.mtime_ns and file_sha256(source_path) != key.sha256:
+		return None
+	return payload
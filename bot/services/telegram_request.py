@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import time
+
+from telegram.request import HTTPXRequest
+
+from bot.services.metrics import TELEGRAM_API_ERRORS, TELEGRAM_API_SECONDS
+
+
+class TimedRequest(HTTPXRequest):
+	"""HTTPXRequest that records how long each Bot API method takes.
+
+	Used for the bot's outgoing calls only; getUpdates long polls keep PTB's
+	default request, as their duration is the poll timeout rather than latency.
+	"""
+
+	async def do_request(self, url: str, method: str, *args, **kwargs):
+		api_method = url.rsplit("/", 1)[-1]
+		started = time.perf_counter()
+		try:
+			return await super().do_request(url, method, *args, **kwargs)
+		except Exception:
+			TELEGRAM_API_ERRORS.inc(method=api_method)
+			raise
+		finally:
+			TELEGRAM_API_SECONDS.observe(time.perf_counter() - started, method=api_method)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Dict, FrozenSet, Optional, Pattern, Tuple
+import asyncio
+import re
+import time
+
+from telegram import Update
+from telegram.ext import Application, BaseUpdateProcessor, CallbackQueryHandler, CommandHandler
+
+from bot.services.metrics import HANDLER_SECONDS
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+	"""Runs updates concurrently while keeping each chat's updates in order.
+
+	A slow Bot API call for one user no longer holds up everyone else, but two
+	button presses from the same chat are still handled one after the other,
+	in arrival order (asyncio.Lock wakes waiters first-come first-served).
+	Updates without a chat, such as inline queries, run unordered.
+
+	PTB takes its semaphore before do_process_update is called, so it is
+	sized as the backlog of admitted updates (backlog); the concurrency limit
+	proper is applied only after the chat lock is held, so updates queued
+	behind their own chat never occupy a processing slot.
+	"""
+
+	def __init__(self, max_concurrent_updates: int = 32, backlog: Optional[int] = None) -> None:
+		super().__init__(backlog or max_concurrent_updates * 8)
+		self.limit = max_concurrent_updates
+		self._slots = asyncio.BoundedSemaphore(max_concurrent_updates)
+		# chat id -> (lock, number of updates holding or waiting for it)
+		self._chats: Dict[int, Tuple[asyncio.Lock, int]] = {}
+		self.in_flight = 0
+		self.waiting = 0
+		self.processed = 0
+		self.peak_waiting = 0
+		self.wait_seconds = 0.0
+		self.max_wait_seconds = 0.0
+		# Commands and callback patterns that get their own handler metric; set once handlers are registered
+		self.commands: FrozenSet[str] = frozenset()
+		self.callbacks: Tuple[Pattern[str], ...] = ()
+
+	async def initialize(self) -> None:
+		pass
+
+	async def shutdown(self) -> None:
+		pass
+
+	async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+		chat_id = _chat_id(update)
+		lock = self._acquire_chat(chat_id)
+		queued = time.monotonic()
+		self.waiting += 1
+		self.peak_waiting = max(self.peak_waiting, self.waiting)
+		started = False
+		try:
+			if lock is not None:
+				await lock.acquire()
+			try:
+				async with self._slots:
+					self._record_wait(time.monotonic() - queued)
+					started = True
+					self.in_flight += 1
+					began = time.perf_counter()
+					try:
+						await coroutine
+					finally:
+						HANDLER_SECONDS.observe(time.perf_counter() - began, handler=handler_label(update, self.commands, self.callbacks))
+						self.in_flight -= 1
+						self.processed += 1
+			finally:
+				if lock is not None:
+					lock.release()
+		finally:
+			if not started:
+				# Cancelled while queued (shutdown): the coroutine never ran
+				self.waiting -= 1
+			self._release_chat(chat_id)
+
+	def _record_wait(self, waited: float) -> None:
+		self.waiting -= 1
+		self.wait_seconds += waited
+		self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+	def _acquire_chat(self, chat_id: Optional[int]) -> Optional[asyncio.Lock]:
+		if chat_id is None:
+			return None
+		lock, users = self._chats.get(chat_id, (None, 0))
+		if lock is None:
+			lock = asyncio.Lock()
+		self._chats[chat_id] = (lock, users + 1)
+		return lock
+
+	def _release_chat(self, chat_id: Optional[int]) -> None:
+		if chat_id is None:
+			return
+		lock, users = self._chats[chat_id]
+		if users <= 1:
+			del self._chats[chat_id]
+		else:
+			self._chats[chat_id] = (lock, users - 1)
+
+	def stats(self) -> Dict[str, float]:
+		"""Backpressure figures: how many updates run, how many wait and for how long."""
+		return {
+			"limit": self.limit,
+			"in_flight": self.in_flight,
+			"waiting": self.waiting,
+			"peak_waiting": self.peak_waiting,
+			"active_chats": len(self._chats),
+			"processed": self.processed,
+			"avg_wait_ms": round(self.wait_seconds / self.processed * 1000, 1) if self.processed else 0.0,
+			"max_wait_ms": round(self.max_wait_seconds * 1000, 1),
+		}
+
+
+def registered_commands(app: Application) -> FrozenSet[str]:
+	"""Every command some CommandHandler of app answers to."""
+	return frozenset(
+		command
+		for handlers in app.handlers.values()
+		for handler in handlers
+		if isinstance(handler, CommandHandler)
+		for command in handler.commands
+	)
+
+
+def registered_callbacks(app: Application) -> Tuple[Pattern[str], ...]:
+	"""The regex pattern of every CallbackQueryHandler of app."""
+	return tuple(
+		handler.pattern
+		for handlers in app.handlers.values()
+		for handler in handlers
+		if isinstance(handler, CallbackQueryHandler) and isinstance(handler.pattern, re.Pattern)
+	)
+
+
+def handler_label(
+	update: object,
+	commands: FrozenSet[str] = frozenset(),
+	callbacks: Tuple[Pattern[str], ...] = (),
+) -> str:
+	"""Low-cardinality name for what an update asks for: callback prefix, command or update type.
+
+	Only commands in commands are named; any other text starting with "/" is
+	user input and counts as "command". Likewise callback data is client
+	input: its prefix is named only when one of callbacks accepts it, and
+	anything else counts as "cb:other".
+	"""
+	if not isinstance(update, Update):
+		return "other"
+	if update.callback_query is not None:
+		prefix = (update.callback_query.data or "").split(":", 1)[0]
+		if any(pattern.match(prefix + ":") for pattern in callbacks):
+			return "cb:" + prefix
+		return "cb:other"
+	if update.inline_query is not None:
+		return "inline_query"
+	message = update.effective_message
+	if message is not None:
+		if message.document is not None:
+			return "document"
+		text = message.text or ""
+		if text.startswith("/"):
+			command = text.split()[0].split("@", 1)[0][1:].lower()
+			return f"/{command}" if command in commands else "command"
+		return "message"
+	return "other"
+
+
+def _chat_id(update: object) -> Optional[int]:
+	if isinstance(update, Update) and update.effective_chat is not None:
+		return update.effective_chat.id
+	return None
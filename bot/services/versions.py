@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+
+from bot.services.diff import ChangeSet
+from bot.services.schedule_service import ScheduleService
+from bot.storage.versions import ScheduleVersion, VersionStore
+
+
+logger = logging.getLogger(__name__)
+
+
+class VersionManager:
+	"""Publishes timetable files as content-addressed versions and switches between them.
+
+	Every upload or dropped file becomes a version of its shard; a file whose
+	content is already live is recognised by its hash and not imported again.
+	Switching to a version goes through ScheduleService.switch_file_async, so
+	rolling back to a recent timetable is a reference swap, and an older one
+	still skips Excel when its snapshot is kept. Only the keep most recent
+	versions of each shard are kept on disk.
+	"""
+
+	def __init__(self, schedule: ScheduleService, store: VersionStore, keep: int = 10) -> None:
+		self.schedule = schedule
+		self.store = store
+		self.keep = keep
+		# Uploads, the file watcher and rollbacks switch versions one at a time
+		self._lock = asyncio.Lock()
+
+	def startup_files(self, dropped: Dict[str, str]) -> Dict[str, str]:
+		"""Files to load at startup: the active version of each shard.
+
+		Files found in the schedules directory are registered first; one with
+		content not seen before becomes the active version of its shard, so a
+		file copied in while the bot was down wins over an earlier rollback,
+		while the same file left in place does not undo one.
+		"""
+		active = self.store.active()
+		for shard, path in dropped.items():
+			version, created = self.store.add(shard, path, Path(path).name, move=False)
+			if created or shard not in active:
+				self.store.activate(version.id)
+		files = dict(dropped)
+		for shard, version in self.store.active().items():
+			if Path(version.path).exists():
+				files[shard] = version.path
+		return files
+
+	async def publish_file(
+		self,
+		shard: str,
+		file_path: str,
+		file_name: str,
+		move: bool = True,
+		executor: Optional[Executor] = None,
+	) -> Tuple[ScheduleVersion, Optional[ChangeSet], str]:
+		"""Make file_path live as a version of shard.
+
+		Returns the version, the changes (None when it already was the live
+		version) and how it was loaded: "warm", "snapshot", "parsed" or
+		"unchanged". A file that fails to load is not kept as a version.
+		"""
+		async with self._lock:
+			sha256, path = await asyncio.to_thread(self.store.store_file, file_path, move)
+			version = self.store.find(shard, sha256)
+			active = self.store.active().get(shard)
+			if version is not None and active is not None and active.id == version.id and self.schedule.is_current(path):
+				return version, None, "unchanged"
+			try:
+				changes, how = await self.schedule.switch_file_async(shard, path, executor)
+			except Exception:
+				if version is None:
+					await asyncio.to_thread(self.store.discard_file, path)
+				raise
+			if version is None:
+				version, _ = await asyncio.to_thread(self.store.register, shard, sha256, path, file_name)
+			await asyncio.to_thread(self._activate, version)
+			return version, changes, how
+
+	async def rollback(self, version_id: Optional[int] = None) -> Tuple[ScheduleVersion, ChangeSet, str]:
+		"""Make version_id live again; without one, the version active before the most recent switch.
+
+		Raises LookupError when there is no such version.
+		"""
+		async with self._lock:
+			if version_id is not None:
+				target = self.store.get(version_id)
+			else:
+				recent = self.store.history(limit=1)
+				target = self.store.previous(recent[0].shard) if recent else None
+			if target is None:
+				raise LookupError(version_id)
+			changes, how = await self.schedule.switch_file_async(target.shard, target.path)
+			await asyncio.to_thread(self._activate, target)
+			logger.info("Rolled back shard %r to version %d (%s)", target.shard, target.id, how)
+			return target, changes, how
+
+	async def record(self, shard: str, sha256: str, path: str, file_name: str) -> ScheduleVersion:
+		"""Register and activate a file from store.store_file() once it was loaded some other way (the profiled import)."""
+		async with self._lock:
+			version, _ = await asyncio.to_thread(self.store.register, shard, sha256, path, file_name)
+			await asyncio.to_thread(self._activate, version)
+			return version
+
+	def _activate(self, version: ScheduleVersion) -> None:
+		self.store.activate(version.id)
+		for old in self.store.collect_garbage(self.keep):
+			logger.info("Dropped schedule version %d (%s)", old.id, old.file_name)
+
+	def history(self, limit: int = 10) -> Tuple[List[ScheduleVersion], Dict[str, int]]:
+		"""Recent versions and the active version id of each shard."""
+		return self.store.history(limit=limit), {shard: v.id for shard, v in self.store.active().items()}
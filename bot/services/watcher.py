@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import logging
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from bot.excel_importer import SCHEDULE_SUFFIXES
+from bot.services.diff import ChangeSet
+from bot.services.schedule_service import DEFAULT_SHARD, ScheduleService
+from bot.services.versions import VersionManager
+
+
+logger = logging.getLogger(__name__)
+
+ReloadCallback = Callable[[str, ChangeSet], Awaitable[None]]
+
+
+def is_schedule_file(path: str) -> bool:
+	name = Path(path).name
+	return name.lower().endswith(SCHEDULE_SUFFIXES) and not name.startswith(("~$", ".~lock"))
+
+
+def shard_for(directory: Path, path: str) -> str:
+	"""Faculty shard of a file: its subdirectory under directory, "" for files directly in it."""
+	try:
+		parent = Path(path).resolve().parent.relative_to(Path(directory).resolve())
+	except ValueError:
+		return DEFAULT_SHARD
+	return parent.parts[0] if parent.parts else DEFAULT_SHARD
+
+
+def latest_schedule_files(directory: Path) -> Dict[str, str]:
+	"""Newest schedule file per shard: directory itself plus one level of faculty subdirectories.
+
+	Newest by modification time, then by name (uploads are named by timestamp).
+	"""
+	directory = Path(directory)
+	found: Dict[str, str] = {}
+	for folder in [directory] + sorted(p for p in directory.iterdir() if p.is_dir()):
+		files = [f for f in folder.iterdir() if f.is_file() and is_schedule_file(str(f))]
+		if files:
+			newest = str(max(files, key=lambda f: (f.stat().st_mtime_ns, f.name)))
+			found[shard_for(directory, newest)] = newest
+	return found
+
+
+class _Handler(FileSystemEventHandler):
+	def __init__(self, watcher: "ScheduleWatcher") -> None:
+		self._watcher = watcher
+
+	def on_any_event(self, event: FileSystemEvent) -> None:
+		if event.is_directory or event.event_type not in ("created", "modified", "moved", "closed"):
+			return
+		path = getattr(event, "dest_path", "") or event.src_path
+		if is_schedule_file(path):
+			self._watcher.notify(path)
+
+
+class ScheduleWatcher:
+	"""Reimports .xlsx, .csv and .tsv files dropped into a directory without restarting the bot.
+
+	A file in a subdirectory replaces only that faculty's shard.
+
+	watchdog delivers events on its own thread; they are handed to the event
+	loop, debounced per file (editors and copies emit bursts of writes) and
+	imported through ScheduleService.load_from_file_async, one at a time.
+	With a VersionManager each file is published as a version instead, so a
+	file whose content is already live is not imported again.
+	"""
+
+	def __init__(
+		self,
+		directory: Path,
+		schedule: ScheduleService,
+		loop: asyncio.AbstractEventLoop,
+		debounce: float = 2.0,
+		on_reload: Optional[ReloadCallback] = None,
+		versions: Optional[VersionManager] = None,
+	) -> None:
+		self.directory = Path(directory)
+		self.schedule = schedule
+		self.versions = versions
+		self.debounce = debounce
+		self.on_reload = on_reload
+		self._loop = loop
+		self._timers: Dict[str, asyncio.TimerHandle] = {}
+		self._lock = asyncio.Lock()
+		self._observer: Optional[Observer] = None
+
+	def start(self) -> None:
+		self._observer = Observer()
+		# Faculty subdirectories are shards of their own
+		self._observer.schedule(_Handler(self), str(self.directory), recursive=True)
+		self._observer.daemon = True
+		self._observer.start()
+		logger.info("Watching %s for schedule files", self.directory)
+
+	def stop(self) -> None:
+		for timer in self._timers.values():
+			timer.cancel()
+		self._timers.clear()
+		if self._observer is not None:
+			self._observer.stop()
+			self._observer.join(timeout=5)
+			self._observer = None
+
+	def notify(self, path: str) -> None:
+		"""Thread-safe entry point for file events."""
+		self._loop.call_soon_threadsafe(self._debounce, path)
+
+	def _debounce(self, path: str) -> None:
+		timer = self._timers.pop(path, None)
+		if timer is not None:
+			timer.cancel()
+		self._timers[path] = self._loop.call_later(self.debounce, self._fire, path)
+
+	def _fire(self, path: str) -> None:
+		self._timers.pop(path, None)
+		self._loop.create_task(self._reload(path))
+
+	async def _reload(self, path: str) -> None:
+		async with self._lock:
+			if not Path(path).exists():
+				return
+			if self.schedule.is_importing(path):
+				# An upload is importing this file now; look again once it is published
+				self._debounce(path)
+				return
+			if self.schedule.is_current(path):
+				return
+			shard = shard_for(self.directory, path)
+			try:
+				if self.versions is not None:
+					_, changes, _ = await self.versions.publish_file(shard, path, Path(path).name, move=False)
+					if changes is None:
+						return
+				else:
+					changes = await self.schedule.load_from_file_async(path, shard=shard)
+			except Exception:
+				logger.exception("Failed to reload schedule from %s", path)
+				return
+			logger.info("Reloaded schedule from %s: %s", path, changes.summary())
+			if self.on_reload is not None:
+				try:
+					await self.on_reload(path, changes)
+				except Exception:
+					logger.exception("Reload callback failed for %s", path)
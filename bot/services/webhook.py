@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from typing import Optional
+from urllib.parse import urlsplit
+import hmac
+import json
+import logging
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from bot.services.metrics import REGISTRY
+from bot.services.schedule_service import ScheduleService
+
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+HEALTH_PATH = "/healthz"
+METRICS_PATH = "/metrics"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class StatusServer:
+	"""Small HTTP server with GET /healthz and GET /metrics (Prometheus text).
+
+	/healthz reports whether a timetable is loaded and how far behind update
+	processing is, for a load balancer or systemd. Runs on its own in polling
+	mode when METRICS_PORT is set.
+	"""
+
+	def __init__(
+		self,
+		application: Application,
+		schedule: ScheduleService,
+		listen: str = "0.0.0.0",
+		port: int = 8080,
+		reuse_port: bool = False,
+	) -> None:
+		self.application = application
+		self.schedule = schedule
+		self.listen = listen
+		self.port = port
+		self.reuse_port = reuse_port
+		self._runner: Optional[web.AppRunner] = None
+		self._accepting = False
+
+	def _make_app(self) -> web.Application:
+		app = web.Application(client_max_size=1024 * 1024)
+		app.router.add_get(HEALTH_PATH, self._on_health)
+		app.router.add_get(METRICS_PATH, self._on_metrics)
+		return app
+
+	async def start(self) -> None:
+		self._runner = web.AppRunner(self._make_app(), access_log=None)
+		await self._runner.setup()
+		site = web.TCPSite(self._runner, self.listen, self.port, reuse_port=self.reuse_port or None)
+		await site.start()
+		self._accepting = True
+		logger.info("HTTP server listening on %s:%s", self.listen, self.port)
+
+	async def stop(self) -> None:
+		"""Stop taking requests, then wait for in-flight ones to finish."""
+		self._accepting = False
+		if self._runner is not None:
+			await self._runner.cleanup()
+			self._runner = None
+
+	def health(self) -> dict:
+		body = {
+			"status": "ok" if self._accepting else "stopping",
+			"schedule_loaded": self.schedule.has_data(),
+			"schedule_version": self.schedule.version(),
+			"update_queue": self.application.update_queue.qsize(),
+		}
+		processor = self.application.update_processor
+		if hasattr(processor, "stats"):
+			body["processing"] = processor.stats()
+		return body
+
+	async def _on_health(self, request: web.Request) -> web.Response:
+		return web.json_response(self.health(), status=200 if self._accepting else 503)
+
+	async def _on_metrics(self, request: web.Request) -> web.Response:
+		return web.Response(body=REGISTRY.render().encode("utf-8"), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+
+class WebhookServer(StatusServer):
+	"""Receives updates over HTTP instead of long polling.
+
+	Telegram POSTs each update to the path of the public webhook URL; the
+	body is decoded into an Update and put on the application's update queue,
+	the same queue the polling updater feeds, so handlers don't change. The
+	secret token Telegram echoes in a header is compared in constant time and
+	anything else gets 403.
+	"""
+
+	def __init__(
+		self,
+		application: Application,
+		schedule: ScheduleService,
+		url: str,
+		listen: str = "0.0.0.0",
+		port: int = 8080,
+		secret_token: str = "",
+		max_connections: int = 40,
+		register: bool = True,
+		reuse_port: bool = False,
+	) -> None:
+		super().__init__(application, schedule, listen=listen, port=port, reuse_port=reuse_port)
+		self.url = url
+		self.path = urlsplit(url).path or "/"
+		self.secret_token = secret_token
+		self.max_connections = max_connections
+		# Worker processes sharing a port leave setWebhook to the main process
+		self.register = register
+		self.received = 0
+		self.rejected = 0
+
+	def _make_app(self) -> web.Application:
+		app = super()._make_app()
+		app.router.add_post(self.path, self._on_update)
+		return app
+
+	async def start(self) -> None:
+		await super().start()
+		if not self.register:
+			logger.info("Webhook worker serving %s", self.path)
+			return
+		await self.application.bot.set_webhook(
+			url=self.url,
+			secret_token=self.secret_token or None,
+			max_connections=self.max_connections,
+			allowed_updates=Update.ALL_TYPES,
+		)
+		logger.info("Webhook registered, serving %s", self.path)
+
+	async def stop(self) -> None:
+		"""Stop taking updates, then wait for in-flight requests to finish.
+
+		The webhook stays registered with Telegram, which holds new updates
+		until the next process comes up rather than dropping them.
+		"""
+		await super().stop()
+
+	async def _on_update(self, request: web.Request) -> web.Response:
+		if not self._accepting:
+			return web.Response(status=503)
+		if self.secret_token:
+			given = request.headers.get(SECRET_HEADER, "")
+			if not hmac.compare_digest(given.encode(), self.secret_token.encode()):
+				self.rejected += 1
+				return web.Response(status=403)
+		try:
+			payload = await request.json()
+			update = Update.de_json(payload, self.application.bot)
+		except (json.JSONDecodeError, ValueError, TypeError, KeyError):
+			self.rejected += 1
+			return web.Response(status=400)
+		if update is None:
+			self.rejected += 1
+			return web.Response(status=400)
+		self.received += 1
+		await self.application.update_queue.put(update)
+		return web.Response()
+
+	def health(self) -> dict:
+		body = super().health()
+		body["received"] = self.received
+		body["rejected"] = self.rejected
+		return body
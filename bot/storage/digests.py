@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+from bot.db import Database
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+	chat_id INTEGER NOT NULL,
+	grp TEXT NOT NULL,
+	minute INTEGER NOT NULL,
+	PRIMARY KEY (chat_id, grp)
+);
+CREATE INDEX IF NOT EXISTS idx_digests_minute ON digests(minute, grp);
+"""
+
+DEFAULT_MINUTE = 20 * 60
+
+
+class DigestStore:
+	"""Daily "tomorrow's timetable" deliveries, indexed by minute of day (0..1439)."""
+
+	def __init__(self, db: Database) -> None:
+		self.db = db
+		self.db.executescript(SCHEMA)
+
+	def set(self, chat_id: int, group: str, minute: int = DEFAULT_MINUTE) -> None:
+		with self.db.transaction() as conn:
+			conn.execute(
+				"INSERT INTO digests (chat_id, grp, minute) VALUES (?, ?, ?) "
+				"ON CONFLICT(chat_id, grp) DO UPDATE SET minute = excluded.minute",
+				(chat_id, group, minute % 1440),
+			)
+
+	def set_minute(self, chat_id: int, minute: int) -> int:
+		"""Move every digest of chat_id to minute; returns how many were updated."""
+		with self.db.transaction() as conn:
+			return conn.execute("UPDATE digests SET minute = ? WHERE chat_id = ?", (minute % 1440, chat_id)).rowcount
+
+	def remove_all(self, chat_id: int) -> int:
+		with self.db.transaction() as conn:
+			return conn.execute("DELETE FROM digests WHERE chat_id = ?", (chat_id,)).rowcount
+
+	def for_chat(self, chat_id: int) -> List[Tuple[str, int]]:
+		cur = self.db.connection().execute("SELECT grp, minute FROM digests WHERE chat_id = ? ORDER BY grp", (chat_id,))
+		return [(grp, minute) for grp, minute in cur]
+
+	def due(self, minute: int) -> Dict[str, List[int]]:
+		"""Subscribers of the given minute, grouped by group; touches only that minute's index range."""
+		cur = self.db.connection().execute("SELECT grp, chat_id FROM digests WHERE minute = ? ORDER BY grp", (minute % 1440,))
+		out: Dict[str, List[int]] = {}
+		for grp, chat_id in cur:
+			out.setdefault(grp, []).append(chat_id)
+		return out
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+import mmap
+import os
+import struct
+import threading
+import time
+
+from bot.excel_importer import NormalizedRow
+
+
+MAGIC = b"SCHIMG02"
+NONE_ID = 0xFFFFFFFF
+
+# magic, version, source path id, strings, rows, group-day keys, teachers
+_HEADER = struct.Struct("<8sQIIIII")
+# group, day, time, subject, teacher, room as string ids
+_ROW = struct.Struct("<6I")
+# group id, day id, first, end (into the group-day row list)
+_GROUP_DAY = struct.Struct("<4I")
+# teacher id, first, end (into the teacher row list)
+_TEACHER = struct.Struct("<3I")
+_U32 = struct.Struct("<I")
+
+
+class _Mapped:
+	"""One published image file, mapped read-only.
+
+	Layout after the header: string offsets (u32 * (strings + 1)), UTF-8
+	string blob, fixed-width row records, group-day records sorted by
+	(group id, day id), teacher records sorted by teacher id, then the two
+	u32 row-number lists those records slice. The string table is sorted, so
+	comparing ids compares names and the group/teacher lists come out sorted
+	without reading any strings.
+	"""
+
+	def __init__(self, path: str) -> None:
+		with open(path, "rb") as f:
+			st = os.fstat(f.fileno())
+			self.identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+			self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, self.version, self._source_id, self.n_strings, self.n_rows, self.n_group_days, self.n_teachers = _HEADER.unpack_from(self.buf, 0)
+		if magic != MAGIC:
+			raise ValueError(f"{path} is not a schedule image")
+		self._str_offsets = _HEADER.size
+		self._str_blob = self._str_offsets + (self.n_strings + 1) * _U32.size
+		blob_size = _U32.unpack_from(self.buf, self._str_offsets + self.n_strings * _U32.size)[0]
+		self._rows = self._str_blob + blob_size
+		self._group_days = self._rows + self.n_rows * _ROW.size
+		self._teachers = self._group_days + self.n_group_days * _GROUP_DAY.size
+		self._group_day_rows = self._teachers + self.n_teachers * _TEACHER.size
+		self._teacher_rows = self._group_day_rows + self.n_rows * _U32.size
+
+	def string(self, sid: int) -> Optional[str]:
+		if sid == NONE_ID:
+			return None
+		start, end = struct.unpack_from("<2I", self.buf, self._str_offsets + sid * _U32.size)
+		return self.buf[self._str_blob + start:self._str_blob + end].decode("utf-8")
+
+	def string_id(self, value: str) -> Optional[int]:
+		lo, hi = 0, self.n_strings
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if self.string(mid) < value:
+				lo = mid + 1
+			else:
+				hi = mid
+		if lo < self.n_strings and self.string(lo) == value:
+			return lo
+		return None
+
+	def source_path(self) -> Optional[str]:
+		return self.string(self._source_id)
+
+	def row(self, index: int) -> NormalizedRow:
+		g, d, t, s, te, r = _ROW.unpack_from(self.buf, self._rows + index * _ROW.size)
+		string = self.string
+		return NormalizedRow(group=string(g), day=string(d), time=string(t), subject=string(s), teacher=string(te), room=string(r))
+
+	def rows_at(self, base: int, first: int, end: int) -> List[NormalizedRow]:
+		return [self.row(_U32.unpack_from(self.buf, base + i * _U32.size)[0]) for i in range(first, end)]
+
+	def group_day_key(self, i: int) -> Tuple[int, int]:
+		return _GROUP_DAY.unpack_from(self.buf, self._group_days + i * _GROUP_DAY.size)[:2]
+
+	def group_day(self, group: str, day: str) -> List[NormalizedRow]:
+		gid, did = self.string_id(group), self.string_id(day)
+		if gid is None or did is None:
+			return []
+		i = bisect_left(_RecordKeys(self.group_day_key, self.n_group_days), (gid, did))
+		if i == self.n_group_days or self.group_day_key(i) != (gid, did):
+			return []
+		_, _, first, end = _GROUP_DAY.unpack_from(self.buf, self._group_days + i * _GROUP_DAY.size)
+		return self.rows_at(self._group_day_rows, first, end)
+
+	def teacher_key(self, i: int) -> int:
+		return _TEACHER.unpack_from(self.buf, self._teachers + i * _TEACHER.size)[0]
+
+	def teacher(self, teacher: str) -> List[NormalizedRow]:
+		tid = self.string_id(teacher)
+		if tid is None:
+			return []
+		i = bisect_left(_RecordKeys(self.teacher_key, self.n_teachers), tid)
+		if i == self.n_teachers or self.teacher_key(i) != tid:
+			return []
+		_, first, end = _TEACHER.unpack_from(self.buf, self._teachers + i * _TEACHER.size)
+		return self.rows_at(self._teacher_rows, first, end)
+
+	def groups(self) -> List[str]:
+		names: List[str] = []
+		last = None
+		for i in range(self.n_group_days):
+			gid = self.group_day_key(i)[0]
+			if gid != last:
+				names.append(self.string(gid))
+				last = gid
+		return names
+
+	def teachers(self) -> List[str]:
+		return [self.string(self.teacher_key(i)) for i in range(self.n_teachers)]
+
+
+class _RecordKeys:
+	"""Sequence view over record keys so bisect can search the mapped file."""
+
+	def __init__(self, key, size: int) -> None:
+		self._key = key
+		self._size = size
+
+	def __len__(self) -> int:
+		return self._size
+
+	def __getitem__(self, i: int):
+		return self._key(i)
+
+
+def write_image(path: str, rows: List[NormalizedRow], version: int, source_path: Optional[str] = None) -> None:
+	"""Write rows as an image next to path and atomically move it into place."""
+	strings = {source_path} if source_path else set()
+	for r in rows:
+		strings.update(v for v in (r.group, r.day, r.time, r.subject, r.teacher, r.room) if v is not None)
+	table = sorted(strings)
+	ids: Dict[str, int] = {s: i for i, s in enumerate(table)}
+
+	def sid(value: Optional[str]) -> int:
+		return NONE_ID if value is None else ids[value]
+
+	blob = bytearray()
+	offsets = bytearray()
+	for s in table:
+		offsets += _U32.pack(len(blob))
+		blob += s.encode("utf-8")
+	offsets += _U32.pack(len(blob))
+
+	# Row numbers are kept in file order inside each bucket, matching the in-memory indexes
+	by_group_day: Dict[Tuple[int, int], List[int]] = {}
+	by_teacher: Dict[int, List[int]] = {}
+	records = bytearray()
+	for i, r in enumerate(rows):
+		records += _ROW.pack(sid(r.group), sid(r.day), sid(r.time), sid(r.subject), sid(r.teacher), sid(r.room))
+		by_group_day.setdefault((ids[r.group], ids[r.day]), []).append(i)
+		if r.teacher:
+			by_teacher.setdefault(ids[r.teacher], []).append(i)
+
+	group_days = bytearray()
+	group_day_rows = bytearray()
+	n = 0
+	for (gid, did), members in sorted(by_group_day.items()):
+		group_days += _GROUP_DAY.pack(gid, did, n, n + len(members))
+		group_day_rows += struct.pack(f"<{len(members)}I", *members)
+		n += len(members)
+	teachers = bytearray()
+	teacher_rows = bytearray()
+	n = 0
+	for tid, members in sorted(by_teacher.items()):
+		teachers += _TEACHER.pack(tid, n, n + len(members))
+		teacher_rows += struct.pack(f"<{len(members)}I", *members)
+		n += len(members)
+	# Fixed-size tail so offsets derive from counts alone
+	teacher_rows += bytes(_U32.size * (len(rows) - n))
+
+	header = _HEADER.pack(MAGIC, version, sid(source_path), len(table), len(rows), len(by_group_day), len(by_teacher))
+	tmp = f"{path}.{os.getpid()}.tmp"
+	with open(tmp, "wb") as f:
+		for part in (header, offsets, blob, records, group_days, teachers, group_day_rows, teacher_rows):
+			f.write(part)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(tmp, path)
+
+
+class ScheduleImage:
+	"""Timetable published as a memory-mapped file that any number of processes read.
+
+	One process writes a new image with replace_all (an upload or a watched
+	file); every process maps the file read-only and shares its pages through
+	the OS page cache, so workers neither parse Excel nor build their own
+	indexes. The image is replaced with os.replace, and readers notice a new
+	inode within check_interval seconds and remap; each lookup works on one
+	mapping, so it never mixes two versions. Drop-in for ScheduleStore.
+	"""
+
+	def __init__(self, path: str, check_interval: float = 1.0) -> None:
+		self.path = path
+		self.check_interval = check_interval
+		self._mapped: Optional[_Mapped] = None
+		self._checked = 0.0
+		self._lock = threading.Lock()
+		# (version, groups, teachers) of the current mapping
+		self._catalog: Optional[Tuple[int, List[str], List[str]]] = None
+		os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+	def _current(self) -> Optional[_Mapped]:
+		now = time.monotonic()
+		mapped = self._mapped
+		if mapped is not None and now - self._checked < self.check_interval:
+			return mapped
+		with self._lock:
+			self._checked = now
+			try:
+				st = os.stat(self.path)
+			except OSError:
+				return self._mapped
+			if self._mapped is None or self._mapped.identity != (st.st_ino, st.st_mtime_ns, st.st_size):
+				# The old mapping stays valid for lookups still holding it and is unmapped once unreferenced
+				self._mapped = _Mapped(self.path)
+				self._catalog = None
+			return self._mapped
+
+	def replace_all(self, rows: Iterable[NormalizedRow], source_path: Optional[str] = None) -> int:
+		"""Publish rows as a new image and return its version."""
+		rows = list(rows)
+		with self._lock:
+			self._checked = 0.0
+		current = self._current()
+		# Seeded from the clock so a deleted image does not make versions repeat
+		version = max((current.version if current else 0) + 1, int(time.time()))
+		write_image(self.path, rows, version, source_path)
+		with self._lock:
+			self._checked = 0.0
+		return version
+
+	def version(self) -> int:
+		mapped = self._current()
+		return mapped.version if mapped else 0
+
+	def source_path(self) -> Optional[str]:
+		mapped = self._current()
+		return mapped.source_path() if mapped else None
+
+	def has_data(self) -> bool:
+		mapped = self._current()
+		return bool(mapped and mapped.n_rows)
+
+	def get_groups(self) -> List[str]:
+		return list(self.catalog()[1])
+
+	def get_teachers(self) -> List[str]:
+		return list(self.catalog()[2])
+
+	def catalog(self) -> Tuple[int, List[str], List[str]]:
+		mapped = self._current()
+		if mapped is None:
+			return 0, [], []
+		cached = self._catalog
+		if cached is None or cached[0] != mapped.version:
+			cached = self._catalog = (mapped.version, mapped.groups(), mapped.teachers())
+		return cached
+
+	def get_group_day(self, group: str, day: str) -> List[NormalizedRow]:
+		mapped = self._current()
+		return mapped.group_day(group, day) if mapped else []
+
+	def get_teacher(self, teacher: str) -> List[NormalizedRow]:
+		mapped = self._current()
+		return mapped.teacher(teacher) if mapped else []
+
+	def all_rows(self) -> List[NormalizedRow]:
+		mapped = self._current()
+		return [mapped.row(i) for i in range(mapped.n_rows)] if mapped else []
+
+	def stats(self) -> Dict[str, int]:
+		mapped = self._current()
+		if mapped is None:
+			return {"groups": 0, "teachers": 0, "lessons": 0}
+		_, groups, teachers = self.catalog()
+		return {"groups": len(groups), "teachers": len(teachers), "lessons": mapped.n_rows}
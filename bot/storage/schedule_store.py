@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bot.db import Database
+from bot.excel_importer import NormalizedRow
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lessons (
+	id INTEGER PRIMARY KEY,
+	position INTEGER NOT NULL,
+	grp TEXT NOT NULL,
+	day TEXT NOT NULL,
+	time TEXT,
+	subject TEXT NOT NULL,
+	teacher TEXT NOT NULL DEFAULT '',
+	room TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_lessons_group_day ON lessons(grp, day, position);
+CREATE INDEX IF NOT EXISTS idx_lessons_teacher_day ON lessons(teacher, day, position);
+CREATE TABLE IF NOT EXISTS meta (
+	key TEXT PRIMARY KEY,
+	value TEXT
+);
+"""
+
+_COLUMNS = "grp, day, time, subject, teacher, room"
+
+
+def _to_row(rec: tuple) -> NormalizedRow:
+	return NormalizedRow(group=rec[0], day=rec[1], time=rec[2], subject=rec[3], teacher=rec[4], room=rec[5])
+
+
+class ScheduleStore:
+	"""Lessons table shared by every bot process pointing at the same database file."""
+
+	def __init__(self, db: Database) -> None:
+		self.db = db
+		self.db.executescript(SCHEMA)
+
+	def replace_all(self, rows: Iterable[NormalizedRow], source_path: Optional[str] = None) -> int:
+		"""Replace the stored timetable in one transaction and bump the version."""
+		with self.db.transaction() as conn:
+			conn.execute("DELETE FROM lessons")
+			conn.executemany(
+				f"INSERT INTO lessons (position, {_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+				((i, r.group, r.day, r.time, r.subject, r.teacher or "", r.room) for i, r in enumerate(rows)),
+			)
+			version = self._get_meta(conn, "version")
+			new_version = int(version or 0) + 1
+			conn.executemany(
+				"INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+				[("version", str(new_version)), ("source_path", source_path or "")],
+			)
+		return new_version
+
+	@staticmethod
+	def _get_meta(conn, key: str) -> Optional[str]:
+		rec = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+		return rec[0] if rec else None
+
+	def version(self) -> int:
+		return int(self._get_meta(self.db.connection(), "version") or 0)
+
+	def source_path(self) -> Optional[str]:
+		return self._get_meta(self.db.connection(), "source_path") or None
+
+	def has_data(self) -> bool:
+		return self.db.connection().execute("SELECT 1 FROM lessons LIMIT 1").fetchone() is not None
+
+	def get_groups(self) -> List[str]:
+		cur = self.db.connection().execute("SELECT DISTINCT grp FROM lessons ORDER BY grp")
+		return [rec[0] for rec in cur]
+
+	def get_teachers(self) -> List[str]:
+		cur = self.db.connection().execute("SELECT DISTINCT teacher FROM lessons WHERE teacher != '' ORDER BY teacher")
+		return [rec[0] for rec in cur]
+
+	def catalog(self) -> Tuple[int, List[str], List[str]]:
+		"""Version, groups and teachers read inside one transaction so they always match."""
+		conn = self.db.connection()
+		conn.execute("BEGIN")
+		try:
+			version = int(self._get_meta(conn, "version") or 0)
+			groups = [rec[0] for rec in conn.execute("SELECT DISTINCT grp FROM lessons ORDER BY grp")]
+			teachers = [rec[0] for rec in conn.execute("SELECT DISTINCT teacher FROM lessons WHERE teacher != '' ORDER BY teacher")]
+		finally:
+			conn.rollback()
+		return version, groups, teachers
+
+	def get_group_day(self, group: str, day: str) -> List[NormalizedRow]:
+		cur = self.db.connection().execute(
+			f"SELECT {_COLUMNS} FROM lessons WHERE grp = ? AND day = ? ORDER BY position", (group, day)
+		)
+		return [_to_row(rec) for rec in cur]
+
+	def get_teacher(self, teacher: str) -> List[NormalizedRow]:
+		cur = self.db.connection().execute(
+			f"SELECT {_COLUMNS} FROM lessons WHERE teacher = ? ORDER BY position", (teacher,)
+		)
+		return [_to_row(rec) for rec in cur]
+
+	def all_rows(self) -> List[NormalizedRow]:
+		cur = self.db.connection().execute(f"SELECT {_COLUMNS} FROM lessons ORDER BY position")
+		return [_to_row(rec) for rec in cur]
+
+	def stats(self) -> Dict[str, int]:
+		conn = self.db.connection()
+		groups, teachers, lessons = conn.execute(
+			"SELECT COUNT(DISTINCT grp), COUNT(DISTINCT NULLIF(teacher, '')), COUNT(*) FROM lessons"
+		).fetchone()
+		return {"groups": groups, "teachers": teachers, "lessons": lessons}
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Tuple
+
+from bot.db import Database
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+	chat_id INTEGER NOT NULL,
+	kind TEXT NOT NULL,
+	name TEXT NOT NULL,
+	PRIMARY KEY (chat_id, kind, name)
+);
+CREATE INDEX IF NOT EXISTS idx_subscriptions_target ON subscriptions(kind, name);
+"""
+
+KINDS = ("group", "teacher")
+# Names bound per query, well under SQLite's variable limit
+_BATCH = 500
+
+
+class SubscriptionStore:
+	"""Which chats want change notifications for which groups and teachers."""
+
+	def __init__(self, db: Database) -> None:
+		self.db = db
+		self.db.executescript(SCHEMA)
+
+	def toggle(self, chat_id: int, kind: str, name: str) -> bool:
+		"""Subscribe, or unsubscribe if already subscribed; returns the new state."""
+		with self.db.transaction() as conn:
+			cur = conn.execute("DELETE FROM subscriptions WHERE chat_id = ? AND kind = ? AND name = ?", (chat_id, kind, name))
+			if cur.rowcount:
+				return False
+			conn.execute("INSERT INTO subscriptions (chat_id, kind, name) VALUES (?, ?, ?)", (chat_id, kind, name))
+			return True
+
+	def unsubscribe_all(self, chat_id: int) -> int:
+		with self.db.transaction() as conn:
+			return conn.execute("DELETE FROM subscriptions WHERE chat_id = ?", (chat_id,)).rowcount
+
+	def for_chat(self, chat_id: int) -> List[Tuple[str, str]]:
+		cur = self.db.connection().execute("SELECT kind, name FROM subscriptions WHERE chat_id = ? ORDER BY kind, name", (chat_id,))
+		return [(kind, name) for kind, name in cur]
+
+	def subscribers(self, kind: str, name: str) -> List[int]:
+		cur = self.db.connection().execute("SELECT chat_id FROM subscriptions WHERE kind = ? AND name = ?", (kind, name))
+		return [rec[0] for rec in cur]
+
+	def subscribers_of(self, targets: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], List[int]]:
+		"""Chats subscribed to each (kind, name) in targets that has any, looked up in batches."""
+		names_by_kind: Dict[str, List[str]] = {}
+		for kind, name in dict.fromkeys(targets):
+			names_by_kind.setdefault(kind, []).append(name)
+		found: Dict[Tuple[str, str], List[int]] = {}
+		conn = self.db.connection()
+		for kind, names in names_by_kind.items():
+			for i in range(0, len(names), _BATCH):
+				batch = names[i:i + _BATCH]
+				cur = conn.execute(
+					f"SELECT name, chat_id FROM subscriptions WHERE kind = ? AND name IN ({', '.join('?' * len(batch))})",
+					(kind, *batch),
+				)
+				for name, chat_id in cur:
+					found.setdefault((kind, name), []).append(chat_id)
+		return found
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import os
+import shutil
+import time
+
+from bot.db import Database
+from bot.services.snapshot import file_sha256, snapshot_path
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedule_versions (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	shard TEXT NOT NULL,
+	sha256 TEXT NOT NULL,
+	path TEXT NOT NULL,
+	file_name TEXT NOT NULL,
+	created_at REAL NOT NULL,
+	activated_at REAL,
+	UNIQUE (shard, sha256)
+);
+CREATE TABLE IF NOT EXISTS active_versions (
+	shard TEXT PRIMARY KEY,
+	version_id INTEGER NOT NULL REFERENCES schedule_versions(id)
+);
+"""
+
+_FIELDS = ("id", "shard", "sha256", "path", "file_name", "created_at", "activated_at")
+_COLUMNS = ", ".join(_FIELDS)
+# Hex digits of the hash used in file names; plenty to never collide
+_NAME_DIGITS = 24
+
+
+@dataclass(frozen=True)
+class ScheduleVersion:
+	id: int
+	shard: str
+	sha256: str
+	# Content-addressed copy under the store's directory
+	path: str
+	# Name the file was uploaded or dropped as
+	file_name: str
+	created_at: float
+	activated_at: Optional[float]
+
+
+class VersionStore:
+	"""Timetable files kept once per content, with the active version of each shard.
+
+	Files are stored as <sha256 prefix><suffix> in directory, so the same
+	content uploaded twice is one file and one version, and its snapshot
+	stays valid for as long as the version exists.
+	"""
+
+	def __init__(self, db: Database, directory: str) -> None:
+		self.db = db
+		self.directory = Path(directory)
+		self.directory.mkdir(parents=True, exist_ok=True)
+		self.db.executescript(SCHEMA)
+
+	def incoming_path(self, suffix: str) -> Path:
+		"""Where to download a file before add() moves it into place."""
+		return self.directory / f".incoming_{time.time_ns()}{suffix}"
+
+	def store_file(self, source: str, move: bool = True) -> Tuple[str, str]:
+		"""Put source's content in place under its hash; returns the hash and the stored path.
+
+		With move the source file is consumed (moved in, or deleted when the
+		content is already stored); otherwise it is copied and left alone. The
+		file is not a version until register() records it.
+		"""
+		sha256 = file_sha256(source)
+		path = self.directory / f"{sha256[:_NAME_DIGITS]}{Path(source).suffix.lower()}"
+		if path.exists():
+			if move:
+				os.unlink(source)
+		elif move:
+			os.replace(source, path)
+		else:
+			shutil.copy2(source, path)
+		return sha256, str(path)
+
+	def register(self, shard: str, sha256: str, path: str, file_name: str) -> Tuple[ScheduleVersion, bool]:
+		"""Record a stored file as a version of shard; returns it and whether its content is new to the shard."""
+		with self.db.transaction() as conn:
+			created = conn.execute(
+				"INSERT OR IGNORE INTO schedule_versions (shard, sha256, path, file_name, created_at) VALUES (?, ?, ?, ?, ?)",
+				(shard, sha256, path, file_name, time.time()),
+			).rowcount == 1
+			row = conn.execute(
+				f"SELECT {_COLUMNS} FROM schedule_versions WHERE shard = ? AND sha256 = ?", (shard, sha256)
+			).fetchone()
+		return ScheduleVersion(*row), created
+
+	def add(self, shard: str, source: str, file_name: str, move: bool = True) -> Tuple[ScheduleVersion, bool]:
+		"""store_file() and register() in one go."""
+		sha256, path = self.store_file(source, move)
+		return self.register(shard, sha256, path, file_name)
+
+	def find(self, shard: str, sha256: str) -> Optional[ScheduleVersion]:
+		row = self.db.connection().execute(
+			f"SELECT {_COLUMNS} FROM schedule_versions WHERE shard = ? AND sha256 = ?", (shard, sha256)
+		).fetchone()
+		return ScheduleVersion(*row) if row else None
+
+	def discard_file(self, path: str) -> None:
+		"""Delete a stored file (and its snapshot) that no version refers to, e.g. after it failed to load."""
+		used = self.db.connection().execute("SELECT 1 FROM schedule_versions WHERE path = ? LIMIT 1", (path,)).fetchone()
+		if used is None:
+			Path(path).unlink(missing_ok=True)
+			snapshot_path(path).unlink(missing_ok=True)
+
+	def activate(self, version_id: int) -> None:
+		with self.db.transaction() as conn:
+			shard = conn.execute("SELECT shard FROM schedule_versions WHERE id = ?", (version_id,)).fetchone()
+			if shard is None:
+				raise KeyError(version_id)
+			conn.execute("UPDATE schedule_versions SET activated_at = ? WHERE id = ?", (time.time(), version_id))
+			conn.execute(
+				"INSERT INTO active_versions (shard, version_id) VALUES (?, ?) "
+				"ON CONFLICT(shard) DO UPDATE SET version_id = excluded.version_id",
+				(shard[0], version_id),
+			)
+
+	def get(self, version_id: int) -> Optional[ScheduleVersion]:
+		row = self.db.connection().execute(
+			f"SELECT {_COLUMNS} FROM schedule_versions WHERE id = ?", (version_id,)
+		).fetchone()
+		return ScheduleVersion(*row) if row else None
+
+	def active(self) -> Dict[str, ScheduleVersion]:
+		"""Active version per shard."""
+		cur = self.db.connection().execute(
+			f"SELECT {', '.join('v.' + f for f in _FIELDS)} "
+			"FROM active_versions a JOIN schedule_versions v ON v.id = a.version_id"
+		)
+		return {row[1]: ScheduleVersion(*row) for row in cur}
+
+	def history(self, shard: Optional[str] = None, limit: int = 10) -> List[ScheduleVersion]:
+		"""Versions, most recently activated (or added, if never active) first."""
+		where, args = ("WHERE shard = ?", (shard,)) if shard is not None else ("", ())
+		cur = self.db.connection().execute(
+			f"SELECT {_COLUMNS} FROM schedule_versions {where} "
+			"ORDER BY COALESCE(activated_at, created_at) DESC, id DESC LIMIT ?",
+			(*args, limit),
+		)
+		return [ScheduleVersion(*row) for row in cur]
+
+	def previous(self, shard: str) -> Optional[ScheduleVersion]:
+		"""The version of shard that was active before the current one."""
+		active = self.active().get(shard)
+		cur = self.db.connection().execute(
+			f"SELECT {_COLUMNS} FROM schedule_versions WHERE shard = ? AND id != ? AND activated_at IS NOT NULL "
+			"ORDER BY activated_at DESC LIMIT 1",
+			(shard, active.id if active else -1),
+		)
+		row = cur.fetchone()
+		return ScheduleVersion(*row) if row else None
+
+	def collect_garbage(self, keep: int) -> List[ScheduleVersion]:
+		"""Forget all but the keep most recent versions of each shard (never an active one) and delete their files."""
+		active_ids = {v.id for v in self.active().values()}
+		removed: List[ScheduleVersion] = []
+		with self.db.transaction() as conn:
+			shards = [row[0] for row in conn.execute("SELECT DISTINCT shard FROM schedule_versions")]
+			for shard in shards:
+				cur = conn.execute(
+					f"SELECT {_COLUMNS} FROM schedule_versions WHERE shard = ? "
+					"ORDER BY COALESCE(activated_at, created_at) DESC, id DESC",
+					(shard,),
+				)
+				stale = [ScheduleVersion(*row) for row in cur][max(keep, 1):]
+				removed.extend(v for v in stale if v.id not in active_ids)
+			conn.executemany("DELETE FROM schedule_versions WHERE id = ?", [(v.id,) for v in removed])
+			still_used = {row[0] for row in conn.execute("SELECT DISTINCT path FROM schedule_versions")}
+		# The same content can be a version of several shards; its file goes with the last one
+		for path in {v.path for v in removed} - still_used:
+			Path(path).unlink(missing_ok=True)
+			snapshot_path(path).unlink(missing_ok=True)
+		return removed
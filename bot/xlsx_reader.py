@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+from typing import Dict, IO, Iterator, List, Optional, Set, Tuple
+from xml.etree.ElementTree import Element, iterparse, parse
+import posixpath
+import zipfile
+
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, WINDOWS_EPOCH, from_excel, from_ISO8601
+
+
+# Transitional and strict OOXML spell the main namespace differently
+_NAMESPACES = (
+	"http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+	"http://purl.oclc.org/ooxml/spreadsheetml/main",
+)
+_REL_NAMESPACES = (
+	"http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+	"http://purl.oclc.org/ooxml/officeDocument/relationships",
+)
+
+
+def _tags(name: str) -> frozenset:
+	return frozenset(f"{{{ns}}}{name}" for ns in _NAMESPACES)
+
+
+_ROW = _tags("row")
+_VALUE = _tags("v")
+_INLINE = _tags("is")
+_TEXT = _tags("t")
+_RUN = _tags("r")
+_SHARED_ITEM = _tags("si")
+_MERGE_CELL = _tags("mergeCell")
+_DIMENSION = _tags("dimension")
+
+WORKBOOK_PATH = "xl/workbook.xml"
+WORKBOOK_RELS_PATH = "xl/_rels/workbook.xml.rels"
+STYLES_PATH = "xl/styles.xml"
+SHARED_STRINGS_PATH = "xl/sharedStrings.xml"
+
+# Merge ranges as returned by openpyxl's range_boundaries: (min_col, min_row, max_col, max_row)
+MergeRange = Tuple[int, int, int, int]
+
+
+def _local(tag: str) -> str:
+	return tag.rsplit("}", 1)[-1]
+
+
+def _string_content(el: Element) -> str:
+	"""Text of an <si> or <is> element: its plain <t> plus every rich-text run, without phonetics."""
+	parts = []
+	for child in el:
+		if child.tag in _TEXT:
+			parts.append(child.text or "")
+		elif child.tag in _RUN:
+			for t in child:
+				if t.tag in _TEXT:
+					parts.append(t.text or "")
+	return "".join(parts)
+
+
+def _column_index(ref: str) -> int:
+	col = 0
+	for ch in ref:
+		if "A" <= ch <= "Z":
+			col = col * 26 + ord(ch) - 64
+		else:
+			break
+	return col
+
+
+def _cast_number(value: str):
+	if "." in value or "E" in value or "e" in value:
+		return float(value)
+	return int(value)
+
+
+class _SharedStrings:
+	"""The shared-strings table, parsed only as far as the highest index asked for.
+
+	Sheets usually reference strings roughly in table order, so most of the
+	table is decoded just before it is first needed and never held twice.
+	"""
+
+	def __init__(self, zf: zipfile.ZipFile) -> None:
+		self._strings: List[str] = []
+		self._source: Optional[IO[bytes]] = None
+		self._events = None
+		if SHARED_STRINGS_PATH in zf.NameToInfo:
+			self._source = zf.open(SHARED_STRINGS_PATH)
+			self._events = iterparse(self._source, events=("end",))
+
+	def __getitem__(self, index: int) -> str:
+		while index >= len(self._strings) and self._events is not None:
+			try:
+				_, el = next(self._events)
+			except StopIteration:
+				self.close()
+				break
+			if el.tag in _SHARED_ITEM:
+				self._strings.append(_string_content(el).replace("x005F_", ""))
+				el.clear()
+		return self._strings[index]
+
+	def close(self) -> None:
+		self._events = None
+		if self._source is not None:
+			self._source.close()
+			self._source = None
+
+
+class StreamingWorkbook:
+	"""Reads worksheet cell values straight from the xlsx XML with iterparse.
+
+	A lighter alternative to openpyxl's read-only mode: no cell objects are
+	built, rows are cleared as soon as they are read, and merged ranges come
+	out of the same pass. Values are typed the way openpyxl types them with
+	data_only=True (numbers, dates by number format, booleans, cached formula
+	results), so rows match ws.iter_rows(values_only=True).
+	"""
+
+	def __init__(self, file_path: str) -> None:
+		self._zip = zipfile.ZipFile(file_path)
+		try:
+			self._sheets, self.epoch = self._read_workbook()
+			self._date_styles, self._timedelta_styles = self._read_styles()
+		except Exception:
+			self._zip.close()
+			raise
+		self._strings = _SharedStrings(self._zip)
+
+	def __enter__(self) -> "StreamingWorkbook":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+	def close(self) -> None:
+		self._strings.close()
+		self._zip.close()
+
+	def _read_workbook(self) -> Tuple[List[Tuple[str, str, str]], object]:
+		targets: Dict[str, str] = {}
+		with self._zip.open(WORKBOOK_RELS_PATH) as fh:
+			for rel in parse(fh).getroot():
+				target = rel.get("Target", "")
+				path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+				targets[rel.get("Id", "")] = path
+		sheets: List[Tuple[str, str, str]] = []
+		epoch = WINDOWS_EPOCH
+		with self._zip.open(WORKBOOK_PATH) as fh:
+			for el in parse(fh).getroot().iter():
+				tag = _local(el.tag)
+				if tag == "workbookPr" and el.get("date1904", "").lower() in ("1", "true"):
+					epoch = CALENDAR_MAC_1904
+				elif tag == "sheet":
+					rid = next((el.get(f"{{{ns}}}id") for ns in _REL_NAMESPACES if el.get(f"{{{ns}}}id")), None)
+					if rid in targets:
+						sheets.append((el.get("name", ""), el.get("state", "visible"), targets[rid]))
+		return sheets, epoch
+
+	def _read_styles(self) -> Tuple[Set[int], Set[int]]:
+		"""Indexes of cell formats that make a number a date, and those that make it a duration."""
+		dates: Set[int] = set()
+		durations: Set[int] = set()
+		if STYLES_PATH not in self._zip.NameToInfo:
+			return dates, durations
+		with self._zip.open(STYLES_PATH) as fh:
+			root = parse(fh).getroot()
+		custom: Dict[int, str] = {}
+		cell_xfs = None
+		for el in root:
+			tag = _local(el.tag)
+			if tag == "numFmts":
+				for fmt in el:
+					custom[int(fmt.get("numFmtId", "0"))] = fmt.get("formatCode", "")
+			elif tag == "cellXfs":
+				cell_xfs = el
+		for idx, xf in enumerate(cell_xfs if cell_xfs is not None else ()):
+			fmt_id = int(xf.get("numFmtId", "0"))
+			fmt = custom.get(fmt_id, BUILTIN_FORMATS.get(fmt_id))
+			if fmt and is_date_format(fmt):
+				dates.add(idx)
+			if fmt and is_timedelta_format(fmt):
+				durations.add(idx)
+		return dates, durations
+
+	def sheet_names(self, visible_only: bool = True) -> List[str]:
+		return [name for name, state, _ in self._sheets if not visible_only or state == "visible"]
+
+	def _sheet_path(self, name: str) -> str:
+		for sheet_name, _, path in self._sheets:
+			if sheet_name == name:
+				return path
+		raise KeyError(f"Worksheet {name} does not exist.")
+
+	def _value(self, c: Element):
+		kind = c.get("t", "n")
+		raw: Optional[str] = None
+		for child in c:
+			if child.tag in _VALUE:
+				raw = child.text
+			elif child.tag in _INLINE and kind == "inlineStr":
+				return _string_content(child)
+		if not raw:
+			return None
+		if kind == "n":
+			value = _cast_number(raw)
+			style = int(c.get("s", "0"))
+			if style in self._date_styles:
+				try:
+					return from_excel(value, self.epoch, timedelta=style in self._timedelta_styles)
+				except (OverflowError, ValueError):
+					return "#VALUE!"
+			return value
+		if kind == "s":
+			return self._strings[int(raw)]
+		if kind == "b":
+			return bool(int(raw))
+		if kind == "d":
+			return from_ISO8601(raw)
+		return raw
+
+	def iter_rows(self, name: str, merges: Optional[List[MergeRange]] = None) -> Iterator[tuple]:
+		"""Row tuples of sheet name from row 1, gaps filled with empty rows.
+
+		Rows are padded to the sheet's declared width when it has one. Merged
+		ranges found after the cell data are appended to merges.
+		"""
+		width = 0
+		row_number = 0
+		with self._zip.open(self._sheet_path(name)) as src:
+			for _, el in iterparse(src, events=("end",)):
+				tag = el.tag
+				if tag in _ROW:
+					r = el.get("r")
+					current = int(r) if r else row_number + 1
+					while row_number < current - 1:
+						row_number += 1
+						yield (None,) * width
+					row_number = current
+					values: List[object] = []
+					col = 0
+					for c in el:
+						ref = c.get("r")
+						col = _column_index(ref) if ref else col + 1
+						value = self._value(c)
+						if value is None:
+							continue
+						if col > len(values):
+							values.extend([None] * (col - len(values)))
+						values[col - 1] = value
+					el.clear()
+					if len(values) < width:
+						values.extend([None] * (width - len(values)))
+					yield tuple(values)
+				elif tag in _MERGE_CELL:
+					if merges is not None and el.get("ref"):
+						merges.append(range_boundaries(el.get("ref")))
+				elif tag in _DIMENSION:
+					ref = el.get("ref", "")
+					try:
+						width = range_boundaries(ref)[2] if ":" in ref else 0
+					except ValueError:
+						width = 0
+
+	def read_sheet(self, name: str) -> Tuple[List[tuple], List[MergeRange]]:
+		"""All rows of sheet name and its merged ranges, from a single pass over its XML."""
+		merges: List[MergeRange] = []
+		rows = list(self.iter_rows(name, merges))
+		return rows, merges
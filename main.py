@@ -1,14 +1,32 @@
 import asyncio
 import logging
 import os
+import signal
 from pathlib import Path
 from dotenv import load_dotenv
 from bot.config import get_config
+from bot.db import Database
 from bot.handlers.admin import register_admin_handlers
 from bot.handlers.students import register_student_handlers
 from bot.handlers.teachers import register_teacher_handlers
 from bot.handlers.start import register_start_handlers
+from bot.handlers.digests import register_digest_handlers
+from bot.handlers.search import register_search_handlers
+from bot.handlers.subscriptions import register_subscription_handlers
+from bot.services.digest import DigestScheduler
+from bot.services.metrics import register_gauge
+from bot.services.notifier import ChangeNotifier, SendQueue
 from bot.services.schedule_service import ScheduleService
+from bot.services.telegram_request import TimedRequest
+from bot.services.updates import ChatOrderedUpdateProcessor, registered_callbacks, registered_commands
+from bot.services.versions import VersionManager
+from bot.services.watcher import ScheduleWatcher, latest_schedule_files
+from bot.services.webhook import StatusServer, WebhookServer
+from bot.storage.digests import DigestStore
+from bot.storage.schedule_image import ScheduleImage
+from bot.storage.schedule_store import ScheduleStore
+from bot.storage.subscriptions import SubscriptionStore
+from bot.storage.versions import VersionStore
 
 from telegram.ext import Application, ApplicationBuilder
 
@@ -26,34 +44,121 @@ async def main() -> None:
     data_dir.mkdir(parents=True, exist_ok=True)
 
     # Initialize schedule service
-    schedule_service = ScheduleService()
-    # Attempt to load last schedule if exists (skip temp files)
-    excel_files = [f for f in data_dir.glob(
-        "*.xlsx") if not f.name.startswith("~$")]
-    latest = next(iter(sorted(excel_files, reverse=True)), None)
-    if latest is not None:
+    db = Database(config.database_path)
+    store = None
+    if config.schedule_backend == "sqlite":
+        store = ScheduleStore(db)
+    elif config.schedule_backend == "image":
+        store = ScheduleImage(config.schedule_image_path)
+    schedule_service = ScheduleService(
+        store=store, xlsx_reader=config.xlsx_reader, warm_versions=config.warm_versions)
+    # Workers only read what the main process published
+    is_worker = config.bot_role == "worker" and store is not None
+    versions = None
+    if not is_worker:
+        versions = VersionManager(
+            schedule_service, VersionStore(db, str(data_dir.parent / "versions")), keep=config.keep_versions)
+    # Load the active version of each faculty shard, parsing only those without a fresh snapshot
+    latest = latest_schedule_files(data_dir)
+    if versions is not None:
         try:
-            schedule_service.load_from_file(str(latest))
-            logging.info("Loaded schedule from %s", latest)
+            latest = versions.startup_files(latest)
+        except Exception as exc:
+            logging.exception("Failed to read schedule versions: %s", exc)
+    if latest and not is_worker:
+        try:
+            from_snapshot = await schedule_service.load_cached_files_async(latest)
+            logging.info("Loaded schedule from %s (%d of %d from snapshot)",
+                         ", ".join(latest.values()), from_snapshot, len(latest))
         except Exception as exc:
             logging.exception("Failed to load existing schedule: %s", exc)
 
-    application: Application = ApplicationBuilder().token(config.bot_token).build()
+    update_processor = ChatOrderedUpdateProcessor(config.max_concurrent_updates)
+    application: Application = (
+        ApplicationBuilder()
+        .token(config.bot_token)
+        .concurrent_updates(update_processor)
+        .request(TimedRequest(connection_pool_size=256))
+        .build()
+    )
+
+    subscriptions = SubscriptionStore(db)
+    send_queue = SendQueue(application.bot)
+    notifier = ChangeNotifier(subscriptions, send_queue)
+    digests = DigestStore(db)
+    digest_scheduler = DigestScheduler(schedule_service, digests, send_queue)
+
+    register_gauge("schedule_bot_updates", "Update processing state.",
+                   lambda: {(k,): v for k, v in update_processor.stats().items()}, ("state",))
+    register_gauge("schedule_bot_send_queue_chats", "Chats with messages waiting in the send queue.",
+                   lambda: {(): len(send_queue)})
+    register_gauge("schedule_bot_schedule_version", "Version of the live timetable.",
+                   lambda: {(): schedule_service.version()})
 
     # Register handlers
     register_start_handlers(application, schedule_service)
     register_student_handlers(application, schedule_service)
     register_teacher_handlers(application, schedule_service)
-    register_admin_handlers(application, schedule_service)
+    register_admin_handlers(application, schedule_service, notifier, versions, accept_uploads=not is_worker)
+    register_search_handlers(application, schedule_service)
+    register_subscription_handlers(application, schedule_service, subscriptions)
+    register_digest_handlers(application, schedule_service, digests)
+    update_processor.commands = registered_commands(application)
+    update_processor.callbacks = registered_callbacks(application)
 
     await application.initialize()
     await application.start()
     logging.info("Bot started")
+    send_queue.start()
+    if not is_worker:
+        digest_scheduler.start(application)
+
+    async def on_reload(path: str, changes) -> None:
+        await notifier.notify(changes)
+
+    watcher = None
+    if config.watch_schedules and not is_worker:
+        watcher = ScheduleWatcher(
+            data_dir, schedule_service, asyncio.get_running_loop(), on_reload=on_reload,
+            versions=versions)
+        watcher.start()
+
+    # SIGTERM (systemd, docker stop) shuts down the same way as Ctrl+C
+    stop_event = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+
+    http_server = None
     try:
-        await application.updater.start_polling()
-        await asyncio.Event().wait()
+        if config.update_mode == "webhook":
+            http_server = WebhookServer(
+                application, schedule_service, config.webhook_url,
+                listen=config.webhook_listen, port=config.webhook_port,
+                secret_token=config.webhook_secret,
+                max_connections=config.webhook_max_connections,
+                register=not is_worker, reuse_port=config.webhook_reuse_port)
+            await http_server.start()
+        else:
+            if config.metrics_port:
+                http_server = StatusServer(
+                    application, schedule_service, listen=config.webhook_listen,
+                    port=config.metrics_port, reuse_port=config.webhook_reuse_port)
+                await http_server.start()
+            await application.updater.start_polling()
+        await stop_event.wait()
     finally:
-        await application.updater.stop()
+        logging.info("Shutting down")
+        if http_server is not None:
+            await http_server.stop()
+        if watcher is not None:
+            watcher.stop()
+        await digest_scheduler.stop()
+        await send_queue.stop()
+        if application.updater.running:
+            await application.updater.stop()
         await application.stop()
         await application.shutdown()
 